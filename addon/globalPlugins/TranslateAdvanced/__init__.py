@@ -19,9 +19,12 @@ from nvwave import playWaveFile
 # Carga Python
 import os
 import wx
+import sys
 import time
-from threading import Thread
+from threading import Thread, Event
 # Carga personal
+# Los diálogos se importan al abrirlos por primera vez; aquí solo se mide lo que se carga al iniciar NVDA
+_tiempo_importacion = time.perf_counter()
 from .app.managers.managers_settings import GestorSettings
 from .app.managers.managers_lang import TraductorIdiomas
 from .app.managers.managers_translate import GestorTranslate
@@ -30,18 +33,16 @@ from .app.managers.managers_clipboard import ClipboardMonitor
 from .app.managers.managers_apis import APIManager
 from .app.managers.managers_updates_langs import GestorRepositorios
 from .app.managers.managers_helps import AdministradorAyuda
-from .app.guis.guis_options import ConfigDialog
-from .app.guis.guis_lang import DialogoLang
-from .app.guis.guis_progress import ProgressDialog
-from .app.guis.guis_result import DialogResults
-from .app.guis.guis_hostory import DialogHistory
-from .app.guis.guis_update import UpdateDialog
-from .app.guis.guis_progress_update import ProgresoDescargaInstalacion
-from .app.guis.guis_guitrans import TranslateDialog
+from .app.managers.managers_speech import GestorVozAsincrona
+from .app.managers.managers_prefetch import GestorPrecarga
+from .app.managers.managers_terminal import GestorTerminal
+from .app.managers.managers_history import GestorHistorial
 from .app.utils.utils_security import disableInSecureMode
-from .app.utils.utils_network import check_internet_connection, realizar_solicitud_https
+from .app.utils.utils_network import check_internet_connection, realizar_solicitud_https, monitor
+from .app.utils.utils_http import pool
 from .app.utils.utils_various import getSelectedText
 from .app.utils.utils_nvda import mute
+_tiempo_importacion = time.perf_counter() - _tiempo_importacion
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -53,9 +54,11 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 	"""
 	def __init__(self, *args, **kwargs):
 		"""
-		Inicializa el complemento y comienza la verificación de conexión a internet.
+		Inicializa el complemento: registra los gestores, los ganchos de la voz y el menú, y deja
+		en segundo plano la comprobación de certificados, la caché y las actualizaciones.
 		"""
 		super(GlobalPlugin, self).__init__(*args, **kwargs)
+		inicio = time.perf_counter()
 
 		# Gestores globales
 		self.gestor_settings = None
@@ -65,29 +68,43 @@ class GlobalPlugin(globalPluginHandler.GlobalPlugin):
 		self.gestor_apis = None
 		self.gestor_repositorio = None
 		self.gestor_ayuda = None
+		self.gestor_voz = None
+		self.gestor_precarga = None
+		self.gestor_terminal = None
+		self.gestor_historial = None
 		# Utilidades
 		self._cache = None
 		self.menu = None
 		self.oldSpeak = None
 		# Bandera para la activación y desactivación de la capa de comandos
 		self.switch = False
-		# Comprobación de almacén de certificados raíz de Windows.
-		# Si no están correctos se actualizan.
-		url = "https://www.google.com"
-		contenido = realizar_solicitud_https(url)
-		if not contenido.get("succesful", True):
-			msg = \
-_("""Se a encontrado errores en la carga del complemento.
+		# Resultado de la comprobación de los certificados en el arranque en segundo plano
+		self.IS_OK = False
+		# Los eventos empiezan a atenderse cuando el arranque en segundo plano ha preparado la caché
+		self._listo = Event()
+		self._hilo_arranque = None
+		self._parar_arranque = Event()
+		# Estado de la conexión a Internet en segundo plano
+		monitor.iniciar()
+		self.__inicio()
+		# Las tareas lentas se hacen en segundo plano para no retrasar el inicio de NVDA
+		self._hilo_arranque = Thread(target=self.__arranque, daemon=True)
+		self._hilo_arranque.start()
+		self.informe_carga(time.perf_counter() - inicio)
 
-Error:
+	def informe_carga(self, tiempo_inicio):
+		"""
+		Registra cuánto ha tardado el complemento en cargarse al iniciar NVDA.
 
-{}""").format(contenido.get("data"))
-			logHandler.log.error(msg)
-			self.IS_OK = False
-		else:
-			self.IS_OK = True
+		Sirve para detectar módulos que vuelven a cargarse al inicio en lugar de al usarse.
 
-		self.__inicio()
+		:param tiempo_inicio: Segundos que ha tardado la parte del inicio que se hace en el hilo principal.
+		"""
+		modulos = sorted(nombre[len(__name__) + 1:] for nombre in sys.modules if nombre.startswith(__name__ + "."))
+		msg = \
+_("""Traductor Avanzado: importación {importacion:.0f} ms, inicio {inicio:.0f} ms, {total} módulos cargados:
+{modulos}""").format(importacion=_tiempo_importacion * 1000, inicio=tiempo_inicio * 1000, total=len(modulos), modulos=", ".join(modulos))
+		logHandler.log.info(msg)
 
 	def __inicio(self):
 		"""
@@ -99,17 +116,26 @@ Error:
 		self.gestor_ayuda = AdministradorAyuda()
 		# Gestor de APIS
 		self.gestor_apis = APIManager(self.gestor_settings.file_api)
-		# Carga el cache
+		# Carga el cache; el almacén se abre en el arranque en segundo plano
 		self._cache = LocalCacheHandler(self.gestor_settings, logHandler)
-		if self.gestor_settings.chkCache:
-			self._cache.loadLocalCache()
+		self._cache.startWriter()
 		# Carga gestor de lenguajes
 		self.gestor_lang = TraductorIdiomas(self)
 		# Carga el gestor de traducción y todo lo necesario
 		self.gestor_translate = GestorTranslate(self)
+		# Carga el gestor de traducción asíncrona de la voz
+		self.gestor_voz = GestorVozAsincrona(self)
+		# Carga el gestor de traducción anticipada
+		self.gestor_precarga = GestorPrecarga(self)
+		# Carga el gestor de líneas traducidas de las terminales
+		self.gestor_terminal = GestorTerminal(self)
+		# Carga el gestor del historial de traducciones
+		self.gestor_historial = GestorHistorial(self)
 		self.gestor_settings._nvdaSpeak = speech._manager.speak
 		self.gestor_settings._nvdaGetPropertiesSpeech = speech.getPropertiesSpeech
 		speech._manager.speak = self.gestor_translate.speak
+		self.gestor_settings._nvdaCancel = speech._manager.cancel
+		speech._manager.cancel = self.gestor_voz.cancelar
 		speech.getPropertiesSpeech = self.gestor_settings._nvdaGetPropertiesSpeech
 		self.oldSpeak = speech.speech.speak
 		speech.speech.speak = self.gestor_translate.mySpeak
@@ -131,36 +157,109 @@ Error:
 		for i in items:
 			gui.mainFrame.sysTrayIcon.Bind(wx.EVT_MENU, self.onSettings, i)
 
-		if self.IS_OK:
+	def __arranque(self):
+		"""
+		Completa el inicio en segundo plano: prepara la caché, comprueba los certificados y
+		empieza a buscar actualizaciones de idiomas.
+
+		Los ganchos y el menú ya están registrados. Los eventos se atienden en cuanto la caché está
+		preparada, aunque falle la comprobación de los certificados (por ejemplo sin conexión al iniciar),
+		y la búsqueda de actualizaciones se programa siempre; en el registro se indica si el complemento
+		ha iniciado correctamente.
+		"""
+		if self.gestor_settings.chkCache:
+			self._cache.loadLocalCache()
+		if self._parar_arranque.is_set():
+			return
+		self._listo.set()
+		# Comprobación de almacén de certificados raíz de Windows.
+		# Si no están correctos se actualizan.
+		url = "https://www.google.com"
+		contenido = realizar_solicitud_https(url)
+		if self._parar_arranque.is_set():
+			return
+		self.IS_OK = contenido.get("succesful", True)
+		if not self.IS_OK:
+			msg = \
+_("""Se a encontrado errores en la carga del complemento.
+
+Error:
+
+{}""").format(contenido.get("data"))
+			logHandler.log.error(msg)
 			msg = \
-_("""Traductor Avanzado iniciado correctamente.""")
+_("""Traductor Avanzado iniciado con errores.""")
 			logHandler.log.info(msg)
 		else:
 			msg = \
-_("""Traductor Avanzado iniciado con errores.""")
+_("""Traductor Avanzado iniciado correctamente.""")
 			logHandler.log.info(msg)
-
 		self._update(self.update)
 
 	def terminate(self):
 		"""
 		Finaliza el complemento y guarda la configuración.
 		"""
-		if not hasattr(self, 'IS_OK') or not self.IS_OK:
-			# No hacer nada si el complemento aún no está completamente inicializado
+		if getattr(self, 'gestor_translate', None) is None:
+			# No hacer nada si los ganchos de la voz aún no se han registrado
 			return
+		self._parar_arranque.set()
+		if self._hilo_arranque is not None:
+			# Se espera a que el arranque deje de usar la caché antes de cerrarla
+			self._hilo_arranque.join(timeout=5)
 		try:
 			speech._manager.speak = self.gestor_settings._nvdaSpeak
+			speech._manager.cancel = self.gestor_settings._nvdaCancel
 			speech.getPropertiesSpeech = self.gestor_settings._nvdaGetPropertiesSpeech
 			speech.speech.speak = self.oldSpeak
+			self.gestor_voz.terminar()
+			self.gestor_precarga.terminar()
+			self.gestor_historial.terminar()
+			monitor.terminar()
+			pool.cerrar()
+			self._cache.stopWriter()
 			if self.gestor_settings.chkCache:
 				self._cache.saveLocalCache()
+			self._cache.closeStore()
+			contadores = self.gestor_translate.filtro.contadores
+			logHandler.log.info(_("Textos no enviados al servicio de traducción en esta sesión: {}").format(", ".join("{}: {}".format(categoria, cantidad) for categoria, cantidad in contadores.items())))
 			self.gestor_settings.guardaConfiguracion()
 			self.menu.Remove(self.mainItem)
 		except Exception as e:
 			pass
 		super().terminate()
 
+	def event_gainFocus(self, obj, nextHandler):
+		"""
+		Adelanta en segundo plano la carga de la caché de la aplicación que recibe el foco y la
+		traducción de los elementos cercanos, y anota si el foco está en una terminal.
+
+		:param obj: El objeto que recibe el foco.
+		:param nextHandler: El siguiente manejador del evento.
+		"""
+		listo = self._listo.is_set()
+		if listo:
+			if self.gestor_settings._enableTranslation and self.gestor_settings.chkCache:
+				self._cache.prefetchPartition(self.gestor_translate.get_particion(obj))
+			# La terminal se anota antes de anunciar el foco, porque su traducción la usa
+			self.gestor_terminal.enfoque(obj)
+		nextHandler()
+		if listo:
+			# La traducción anticipada se prepara después de anunciar el foco para no retrasarlo
+			self.gestor_precarga.enfoque(obj)
+			self.gestor_precarga.documento(obj)
+
+	def event_documentLoadComplete(self, obj, nextHandler):
+		"""
+		Vuelve a empezar la traducción anticipada del documento cuando termina de cargarse.
+
+		:param obj: El documento cargado.
+		:param nextHandler: El siguiente manejador del evento.
+		"""
+		if self._listo.is_set() and self.gestor_settings.chkPrecargaDocumento:
+			self.gestor_precarga.reiniciar_documento()
+		nextHandler()
+
 	def chk_banderas(self, menu=False, toogle=False):
 		"""
 		Verifica condiciones antes de realizar acciones específicas.
@@ -401,23 +500,14 @@ Desactívela para realizar esta acción.""")
 			if getLastScriptRepeatCount() == 0:
 				ui.message(_("Pulse dos veces para eliminar todas las traducciones en caché de todas las aplicaciones."))
 				return
-		self.gestor_settings._translationCache = {}
-		path = self.gestor_settings.dir_cache
-		error = False
-		if os.path.isdir(path):
-			if not os.listdir(path):
-				ui.message(_("No hay cache para borrar."))
-				return
-			for entry in os.listdir(path):
-				try:
-					os.unlink(os.path.join(path, entry))
-				except Exception:
-					logHandler.log.error(_(f"Fallo al eliminar {entry}"))
-					error = True
+		self.gestor_terminal.limpiar()
+		borradas = self._cache.clearLocalCache()
+		if borradas is None:
+			ui.message(_("No se a podido eliminar toda la cache."))
+		elif borradas == 0:
+			ui.message(_("No hay cache para borrar."))
 		else:
-			ui.message(_("El directorio de la cache no existe."))
-			return
-		ui.message(_("Se ha eliminado toda la cache.")) if not error else ui.message(_("No se a podido eliminar toda la cache."))
+			ui.message(_("Se ha eliminado toda la cache."))
 
 	@script(gesture=None, description=_("Eliminar la caché de traducción para la aplicación enfocada actualmente"), category=_("Traductor Avanzado"))
 	def script_flushCurrentAppCache(self, event):
@@ -438,17 +528,13 @@ Desactívela para realizar esta acción.""")
 				data = languageHandler.getLanguageDescription(self.gestor_translate.get_choice_lang_destino())
 				ui.message(_("Pulse dos veces para eliminar todas las traducciones de {} en lenguaje {}").format(appName, self.gestor_translate.get_choice_lang_destino() if data is None else data))
 				return
-		self.gestor_settings._translationCache[appName] = {}
-		fullPath = os.path.join(self.gestor_settings.dir_cache, "{}_{}.json".format(appName, self.gestor_translate.get_choice_lang_destino()))
-		if os.path.exists(fullPath):
-			try:
-				os.unlink(fullPath)
-				ui.message(_("Se ha borrado la cache de la aplicación {} correctamente.").format(appName))
-			except Exception as e:
-				logHandler.log.error(_("Fallo al borrar la cache de la aplicación {} : {}").format(appName, str(e)))
-				ui.message(_("Error al borrar la caché de traducción de la aplicación."))
-		else:
+		borradas = self._cache.clearLocalCache(appName, self.gestor_translate.get_choice_lang_destino())
+		if borradas is None:
+			ui.message(_("Error al borrar la caché de traducción de la aplicación."))
+		elif borradas == 0:
 			ui.message(_("No hay traducciones guardadas para {}").format(appName))
+		else:
+			ui.message(_("Se ha borrado la cache de la aplicación {} correctamente.").format(appName))
 
 	@script(gesture=None, description=_("Activa o desactiva la cache de traducción"), category=_("Traductor Avanzado"))
 	def script_toggleCache(self, event):
@@ -467,7 +553,7 @@ Desactívela para realizar esta acción.""")
 				self.gestor_settings._enableTranslation = False
 				temp = True
 				if self.gestor_settings.chkCache:
-					self._cache.saveLocalCache()
+					self._cache.requestSave()
 			else:
 				temp = False
 			
@@ -582,7 +668,7 @@ Desactívela para realizar esta acción.""")
 				ui.message(_("Traducción activada."))
 				self.gestor_settings._enableTranslation = True
 			if self.gestor_settings.chkCache:
-				self._cache.loadLocalCache() if self.gestor_settings._enableTranslation else self._cache.saveLocalCache()
+				self._cache.loadLocalCache() if self.gestor_settings._enableTranslation else self._cache.requestSave()
 
 	@script(gesture=None, description=_("Traduce el texto seleccionado"), category=_("Traductor Avanzado"))
 	def script_translate_select(self, event):
@@ -794,6 +880,7 @@ class LaunchThread(Thread):
 			"""
 			Lanza el diálogo de configuración.
 			"""
+			from .app.guis.guis_options import ConfigDialog
 			self._main = ConfigDialog(gui.mainFrame, self.frame)
 			gui.mainFrame.prePopup()
 			self._main.Show()
@@ -802,6 +889,7 @@ class LaunchThread(Thread):
 			"""
 			Cambia el idioma de origen.
 			"""
+			from .app.guis.guis_lang import DialogoLang
 			gui.mainFrame.prePopup()
 			dlg = DialogoLang(None, self.frame, 0)
 			dlg.ShowModal()
@@ -812,6 +900,7 @@ class LaunchThread(Thread):
 			"""
 			Cambia el idioma de destino.
 			"""
+			from .app.guis.guis_lang import DialogoLang
 			gui.mainFrame.prePopup()
 			dlg = DialogoLang(None, self.frame, 1)
 			dlg.ShowModal()
@@ -822,6 +911,7 @@ class LaunchThread(Thread):
 			"""
 			Cambia el módulo de traducción.
 			"""
+			from .app.guis.guis_lang import DialogoLang
 			gui.mainFrame.prePopup()
 			dlg = DialogoLang(None, self.frame, 2)
 			dlg.ShowModal()
@@ -839,6 +929,7 @@ class LaunchThread(Thread):
 			Resultado:
 				Inicia el proceso de traducción del texto y maneja el diálogo de resultados.
 			"""
+			from .app.guis.guis_progress import ProgressDialog
 			self.progress_dialog = ProgressDialog(self.frame, self.text)
 			result = self.progress_dialog.ShowModal()
 			if result == wx.ID_OK:
@@ -863,6 +954,7 @@ class LaunchThread(Thread):
 				self.frame.gestor_portapapeles.set_clipboard_text(data)
 				mute(0.3, _("Traducción copiada al portapapeles"))
 			else:
+				from .app.guis.guis_result import DialogResults
 				gui.mainFrame.prePopup()
 				dlg = DialogResults(None, _("Resultado de la traducción"), data)
 				dlg.ShowModal()
@@ -873,6 +965,7 @@ class LaunchThread(Thread):
 			"""
 			Muestra el historial de traducción.
 			"""
+			from .app.guis.guis_hostory import DialogHistory
 			gui.mainFrame.prePopup()
 			dlg = DialogHistory(None, self.frame)
 			dlg.ShowModal()
@@ -883,6 +976,8 @@ class LaunchThread(Thread):
 			"""
 			Actualiza idiomas del complemento.
 			"""
+			from .app.guis.guis_update import UpdateDialog
+			from .app.guis.guis_progress_update import ProgresoDescargaInstalacion
 			datos = self.frame.gestor_repositorio.comprobar_nuevos_y_actualizaciones()
 			if datos['success']:
 				self.update_dialog = UpdateDialog(self.frame, datos['data'])
@@ -924,6 +1019,7 @@ class LaunchThread(Thread):
 			Resultado:
 				Muestra el diálogo de la interfaz de traducción.
 			"""
+			from .app.guis.guis_guitrans import TranslateDialog
 			self._main = TranslateDialog(gui.mainFrame, self.frame, self.text)
 			gui.mainFrame.prePopup()
 			self._main.Show()
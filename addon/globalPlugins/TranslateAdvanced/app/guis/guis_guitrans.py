@@ -17,7 +17,6 @@ import time
 from ..managers.managers_dict import LanguageDictionary
 from ..src_translations.src_detect import DetectorDeIdioma
 from .guis_progress import ProgressDialog
-from .guis_player import ReproductorWav
 from ..utils.utils_network import check_internet_connection
 
 # Carga traducción
@@ -348,6 +347,8 @@ _("""El cuadro de texto destino está vacío. Por favor, traduce algo.""")
 			gui.messageBox(msg, _("Advertencia"), wx.ICON_WARNING)
 			return
 
+		# El reproductor usa wx.media, que solo se carga cuando se escucha una traducción
+		from .guis_player import ReproductorWav
 		# Si el texto destino no ha cambiado y ya se ha obtenido el audio previamente
 		if self.texto_destino.GetValue().strip() == self.texto_destino_anterior and self.audio_obtenido is not None:
 			# Reutilizar el audio obtenido previamente
@@ -27,8 +27,7 @@ class DialogHistory(wx.Dialog):
 		self.SetSize((800, 600))
 		self.SetTitle(_("Historial de Traductor Avanzado"))
 
-		self.historialOrigen = list(self.frame.gestor_settings.historialOrigen)
-		self.historialDestino = list(self.frame.gestor_settings.historialDestino)
+		self.historialOrigen, self.historialDestino = self.frame.gestor_historial.copia()
 		self.historialFiltradoOrigen = []
 		self.historialFiltradoDestino = []
 		self.ordenInverso = False
@@ -222,8 +221,7 @@ class DialogHistory(wx.Dialog):
 		"""
 		Borra el historial de traducciones.
 		"""
-		self.frame.gestor_settings.historialOrigen.clear()
-		self.frame.gestor_settings.historialDestino.clear()
+		self.frame.gestor_historial.limpiar()
 		self.onCerrar(None)
 
 	def onCopiarPortapapeles(self, event):
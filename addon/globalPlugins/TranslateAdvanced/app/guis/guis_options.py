@@ -10,6 +10,7 @@ import gui
 import wx
 # Carga personal
 from ..managers.managers_dict import LanguageDictionary
+from ..utils.utils_filtro import CATEGORIAS
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -87,6 +88,14 @@ class ConfigDialog(wx.Dialog):
 		"""
 		self.SetHelp(self.cache_checkbox, _("Activa o desactiva el uso de la caché de traducción. Esta opción almacena traducciones anteriores para mejorar la velocidad y eficiencia."))
 		self.SetHelp(self.results_checkbox, _("Activa o desactiva la visualización del diálogo de resultados y copia el resultado al portapapeles. Esto permite revisar y utilizar las traducciones de manera rápida."))
+		self.SetHelp(self.async_checkbox, _("Activa la traducción simultánea en segundo plano. NVDA no espera a la traducción y, si esta tarda más que el tiempo máximo de espera, se verbaliza el texto original y la traducción se guarda en la caché para la próxima vez."))
+		self.SetHelp(self.async_spin, _("Tiempo máximo en milisegundos que se espera a una traducción asíncrona antes de verbalizar el texto original."))
+		self.SetHelp(self.filter_checklist, _("Marque los tipos de texto que se verbalizan sin traducir y nunca se envían al servicio de traducción, porque no cambian al traducirlos. Junto a cada tipo se indica cuántos textos se han dejado de enviar desde que se inició NVDA."))
+		self.SetHelp(self.prefetch_checkbox, _("Al llegar a una lista, árbol, menú o diálogo, traduce en segundo plano los elementos cercanos y los guarda en la caché para que la navegación sea inmediata. Requiere la caché de traducción activada."))
+		self.SetHelp(self.prefetch_document_checkbox, _("En las páginas web en modo exploración y en los campos de edición grandes, traduce en segundo plano las líneas alrededor del cursor y las guarda en la caché para que la lectura línea a línea sea inmediata. Requiere la caché de traducción activada."))
+		self.SetHelp(self.context_checkbox, _("Traduce juntos los fragmentos de cada frase que verbaliza NVDA para que el servicio vea la frase completa y la traducción sea mejor, y reparte el resultado entre los fragmentos. Solo funciona con Microsoft Translator; con el resto de servicios los fragmentos se traducen por separado."))
+		self.SetHelp(self.fallback_checkbox, _("Si el servicio de traducción seleccionado da errores o tarda demasiado, deja de usarse durante un tiempo y se traduce con el siguiente servicio disponible: Google API gratuita, Microsoft Translator, DeepL gratuito y LibreTranslate (si tiene una clave configurada). El idioma de destino se adapta a cada servicio. Pasado un tiempo se vuelve a probar el servicio seleccionado. Tenga en cuenta que mientras tanto el texto se envía a esos otros servicios."))
+		self.SetHelp(self.prefetch_sayall_checkbox, _("Durante la lectura continua (verbalizar todo) traduce en segundo plano las líneas siguientes del documento mientras se habla la actual, para que la lectura no se detenga entre líneas. Requiere la caché de traducción activada."))
 		self.SetHelp(self.change_lang_checkbox, _("Activa el intercambio automático si el origen detectado coincide con el destino (experimental). Si se detecta que el idioma del texto de origen es el mismo que el de destino, el traductor cambiará automáticamente el idioma de destino para evitar traducciones innecesarias."))
 		self.SetHelp(self.default_choice_lang, _("Selecciona el idioma por defecto para las traducciones. Este es el idioma principal al que se traducirán los textos por defecto. Ejemplo: Inglés - en."))
 		self.SetHelp(self.alternate_choice_lang, _("Selecciona el idioma alternativo para las traducciones. Este idioma se utilizará cuando se active la opción de intercambio automático. Ejemplo: Español - es."))
@@ -158,6 +167,53 @@ class ConfigDialog(wx.Dialog):
 		self.results_checkbox = wx.CheckBox(panel, label=_("No mostrar dialogo de &resultados y copiar al portapapeles"))
 		sizer.Add(self.results_checkbox, 0, wx.ALL, 10)
 
+		# Checkbox para activar la traducción simultánea asíncrona
+		self.async_checkbox = wx.CheckBox(panel, label=_("Traducción simultánea a&síncrona (no bloquea la voz de NVDA)"))
+		sizer.Add(self.async_checkbox, 0, wx.ALL, 10)
+
+		# Spin para el presupuesto de latencia de la traducción asíncrona
+		async_label = wx.StaticText(panel, label=_("&Tiempo máximo de espera de la traducción asíncrona (milisegundos):"))
+		sizer.Add(async_label, 0, wx.ALL, 10)
+		self.async_spin = wx.SpinCtrl(panel, min=100, max=10000, initial=1500)
+		sizer.Add(self.async_spin, 0, wx.ALL, 10)
+
+		# Checkbox para activar la traducción con contexto
+		self.context_checkbox = wx.CheckBox(panel, label=_("Traducir cada frase completa con conte&xto (solo Microsoft Translator)"))
+		sizer.Add(self.context_checkbox, 0, wx.ALL, 10)
+
+		# Checkbox para usar los servicios de respaldo cuando el seleccionado falla
+		self.fallback_checkbox = wx.CheckBox(panel, label=_("Cambiar a otro servicio si el traductor seleccionado &falla"))
+		sizer.Add(self.fallback_checkbox, 0, wx.ALL, 10)
+
+		# Lista de las categorías de textos que no se envían al servicio, con los textos evitados en la sesión
+		filter_label = wx.StaticText(panel, label=_("Textos que nunca s&e envían al servicio de traducción:"))
+		sizer.Add(filter_label, 0, wx.ALL, 10)
+		nombres = {
+			"caracteres": _("Caracteres sueltos (eco de teclado)"),
+			"puntuacion": _("Solo puntuación y símbolos"),
+			"numeros": _("Números, porcentajes, precios, horas y fechas"),
+			"urls": _("Direcciones web y de correo electrónico"),
+			"rutas": _("Rutas y nombres de archivo"),
+		}
+		contadores = self.frame.gestor_translate.filtro.contadores
+		self.filter_checklist = wx.CheckListBox(panel, choices=[
+			_("{nombre} ({cantidad} sin enviar en esta sesión)").format(nombre=nombres[categoria], cantidad=contadores[categoria])
+			for categoria in CATEGORIAS
+		])
+		sizer.Add(self.filter_checklist, 0, wx.ALL | wx.EXPAND, 10)
+
+		# Checkbox para activar la traducción anticipada de los elementos cercanos al foco
+		self.prefetch_checkbox = wx.CheckBox(panel, label=_("Traducir por adelantado los elementos &cercanos al foco"))
+		sizer.Add(self.prefetch_checkbox, 0, wx.ALL, 10)
+
+		# Checkbox para activar la traducción anticipada de los documentos
+		self.prefetch_document_checkbox = wx.CheckBox(panel, label=_("Traducir por adelantado el documento alrededor del c&ursor"))
+		sizer.Add(self.prefetch_document_checkbox, 0, wx.ALL, 10)
+
+		# Checkbox para activar la traducción anticipada durante la lectura continua
+		self.prefetch_sayall_checkbox = wx.CheckBox(panel, label=_("Traducir por adelantado las líneas siguientes durante la lectura c&ontinua"))
+		sizer.Add(self.prefetch_sayall_checkbox, 0, wx.ALL, 10)
+
 		# Checkbox para activar intercambio de lenguajes
 		self.change_lang_checkbox = wx.CheckBox(panel, label=_("Activar el &intercambio automático si el origen detectado coincide con el destino (experimental)"))
 		sizer.Add(self.change_lang_checkbox, 0, wx.ALL, 10)
@@ -389,6 +445,14 @@ class ConfigDialog(wx.Dialog):
 		"""
 		self.cache_checkbox.SetValue(self.frame.gestor_settings.chkCache)
 		self.results_checkbox.SetValue(self.frame.gestor_settings.chkResults)
+		self.async_checkbox.SetValue(self.frame.gestor_settings.chkAsync)
+		self.async_spin.SetValue(self.frame.gestor_settings.asyncLatencia)
+		self.context_checkbox.SetValue(self.frame.gestor_settings.chkContexto)
+		self.fallback_checkbox.SetValue(self.frame.gestor_settings.chkRespaldo)
+		self.prefetch_checkbox.SetValue(self.frame.gestor_settings.chkPrecarga)
+		self.prefetch_document_checkbox.SetValue(self.frame.gestor_settings.chkPrecargaDocumento)
+		self.prefetch_sayall_checkbox.SetValue(self.frame.gestor_settings.chkPrecargaLectura)
+		self.filter_checklist.SetCheckedItems([indice for indice, categoria in enumerate(CATEGORIAS) if categoria in self.frame.gestor_settings.filtroVoz])
 		nombre_lenguaje = self.descripcion_lenguaje(self.destino_default) or self.idiomas_name[self.idiomas_code.index(self.destino_default)]
 		self.default_choice_lang.SetSelection(self.idiomas_code.index(self.destino_default))
 
@@ -566,6 +630,16 @@ class ConfigDialog(wx.Dialog):
 		"""
 		self.frame.gestor_settings.chkCache = self.cache_checkbox.GetValue()
 		self.frame.gestor_settings.chkResults = self.results_checkbox.GetValue()
+		self.frame.gestor_settings.chkAsync = self.async_checkbox.GetValue()
+		self.frame.gestor_settings.asyncLatencia = self.async_spin.GetValue()
+		self.frame.gestor_settings.chkContexto = self.context_checkbox.GetValue()
+		self.frame.gestor_settings.chkRespaldo = self.fallback_checkbox.GetValue()
+		self.frame.gestor_settings.chkPrecarga = self.prefetch_checkbox.GetValue()
+		self.frame.gestor_settings.chkPrecargaDocumento = self.prefetch_document_checkbox.GetValue()
+		self.frame.gestor_settings.chkPrecargaLectura = self.prefetch_sayall_checkbox.GetValue()
+		self.frame.gestor_settings.filtroVoz = [CATEGORIAS[indice] for indice in self.filter_checklist.GetCheckedItems()]
+		# El filtro de la voz se actualiza sin esperar a reiniciar NVDA
+		self.frame.gestor_translate.filtro.set_categorias(self.frame.gestor_settings.filtroVoz)
 		self.frame.gestor_settings.chkAltLang = self.change_lang_checkbox.GetValue()
 		if self.frame.gestor_settings.chkAltLang:
 			self.frame.gestor_settings.choiceLangDestino_google_def = self.default_choice_lang.GetString(self.default_choice_lang.GetSelection()).split()[-1:][0]
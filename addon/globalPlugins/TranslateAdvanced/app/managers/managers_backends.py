@@ -0,0 +1,449 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga NVDA
+import addonHandler
+import logHandler
+# Carga Python
+import threading
+# Carga personal
+from ..utils.utils_http import registrar_peticiones, PeticionAbandonada
+from ..utils.utils_threads import InterruptorCircuito
+
+# Carga traducción
+addonHandler.initTranslation()
+
+# Servicios de traducción registrados por su identificador (el valor de choiceOnline)
+SERVICIOS = {}
+
+def registrar_servicio(clase):
+	"""
+	Registra un servicio de traducción creando su única instancia.
+
+	Se usa como decorador de las clases de servicio.
+
+	:param clase: La clase del servicio.
+	:return: La misma clase.
+	"""
+	SERVICIOS[clase.id] = clase()
+	return clase
+
+# Códigos de idioma equivalentes que cada servicio escribe de forma distinta
+_EQUIVALENCIAS = {
+	"zh-cn": "zh-hans",
+	"zh-hans": "zh-cn",
+	"zh-tw": "zh-hant",
+	"zh-hant": "zh-tw",
+	"he": "iw",
+	"iw": "he",
+	"jw": "jv",
+	"jv": "jw",
+	"no": "nb",
+	"nb": "no",
+	"fil": "tl",
+	"tl": "fil",
+}
+
+def convertir_idioma(codigo, idiomas):
+	"""
+	Busca el código de un idioma entre los idiomas de otro servicio.
+
+	Se prueba el mismo código sin distinguir mayúsculas, después su equivalente conocido (zh-CN y
+	zh-Hans, he e iw...) y por último el idioma sin la variante regional (pt-PT y pt).
+
+	:param codigo: Código del idioma en el servicio de origen.
+	:param idiomas: Diccionario de idiomas del otro servicio con los códigos como claves.
+	:return: El código del idioma en el otro servicio o None si no lo admite.
+	"""
+	if not codigo:
+		return None
+	codigos = {clave.lower(): clave for clave in idiomas}
+	codigo = codigo.lower()
+	for candidato in (codigo, _EQUIVALENCIAS.get(codigo), codigo.split("-")[0]):
+		if candidato in codigos:
+			return codigos[candidato]
+	base = codigo.split("-")[0]
+	for clave, original in codigos.items():
+		if clave.split("-")[0] == base:
+			return original
+	return None
+
+def obtener_servicio(id):
+	"""
+	Obtiene el servicio de traducción registrado con un identificador.
+
+	:param id: El identificador del servicio (el valor de choiceOnline).
+	:return: La instancia del servicio o None si no existe.
+	"""
+	return SERVICIOS.get(id)
+
+class ServicioTraduccion:
+	"""
+	Clase base de los servicios de traducción.
+
+	Cada servicio declara sus capacidades y mantiene una única instancia de su traductor, que se
+	crea (importando su módulo) la primera vez que se usa y se reutiliza en todas las traducciones.
+	Las instancias se comparten entre hilos, por lo que los traductores no deben guardar el estado
+	de una traducción concreta.
+	"""
+	# Identificador del servicio (valor de choiceOnline)
+	id = None
+	# Nombre del servicio
+	nombre = ""
+	# Lista de idiomas del servicio en el gestor de idiomas
+	idiomas = "google"
+	# Sufijo del ajuste choiceLangDestino_ con el idioma de destino
+	ajuste_destino = "google"
+	# Si el servicio usa el idioma de origen elegido en lugar de la detección automática
+	elige_origen = False
+	# Si el servicio traduce varios textos en una sola petición
+	lote = False
+	# Si el servicio puede repartir la traducción de un texto entre sus fragmentos
+	contexto = False
+	# Caracteres máximos por petición o None si el propio traductor divide el texto
+	max_caracteres = None
+	# Tipo de API en el gestor de APIs y ajuste con la clave elegida, o None si no necesita clave
+	api = None
+	ajuste_api = None
+	# Si además de la clave necesita la URL del servidor
+	necesita_url = False
+
+	def __init__(self):
+		"""
+		Inicializa el servicio sin crear todavía su traductor.
+		"""
+		self._traductor = None
+		self._lock = threading.Lock()
+		# Deja de usarse el servicio mientras falle o responda demasiado lento
+		self.circuito = InterruptorCircuito()
+
+	@property
+	def traductor(self):
+		"""
+		Obtiene el traductor del servicio, creándolo la primera vez.
+
+		:return: La instancia del traductor.
+		"""
+		if self._traductor is None:
+			with self._lock:
+				if self._traductor is None:
+					self._traductor = self.crear()
+		return self._traductor
+
+	def llamar(self, funcion, *args):
+		"""
+		Llama a un método del servicio y registra en su interruptor si ha ido bien y cuánto ha tardado.
+
+		Los módulos de traducción suelen capturar sus errores y devolver el texto original, por lo que
+		el fallo se detecta por las peticiones de esta llamada que han fallado. La latencia es la de la
+		petición más lenta, para que las esperas locales y los textos largos no cuenten como lentitud.
+		Antes hay que comprobar con circuito.permitir() que el servicio puede usarse. Una llamada
+		abandonada porque su resultado ya no se necesita no cuenta para el interruptor.
+
+		:param funcion: El método del servicio.
+		:return: Tupla con el resultado y True si la llamada ha ido bien o False si ha fallado.
+		:raises PeticionAbandonada: Si alguna petición se ha abandonado.
+		"""
+		with registrar_peticiones() as registro:
+			try:
+				resultado = funcion(*args)
+			except PeticionAbandonada:
+				self.circuito.liberar()
+				raise
+			except Exception:
+				self._registrar(False, registro.latencia)
+				raise
+		correcto = registro.fallos == 0
+		self._registrar(correcto, registro.latencia)
+		return resultado, correcto
+
+	def _registrar(self, correcto, latencia):
+		"""
+		Registra el resultado de una llamada y avisa en el registro si el servicio deja de usarse.
+
+		:param correcto: True si la llamada ha ido bien.
+		:param latencia: Segundos de red de la petición más lenta de la llamada.
+		"""
+		if self.circuito.registrar(correcto, latencia):
+			logHandler.log.warning(_("El servicio {} falla o responde demasiado lento; se deja de usar durante un tiempo.").format(self.nombre))
+
+	def clave_particion(self, origen, destino):
+		"""
+		Obtiene la clave con la que se guardan en la caché las traducciones del servicio.
+
+		Un servicio de respaldo que detecta el idioma recibe None como origen. En la caché se guarda
+		como "auto", porque el almacén no admite un idioma de origen vacío.
+
+		:param origen: Idioma de origen enviado al servicio o None.
+		:param destino: Idioma de destino enviado al servicio.
+		:return: Tupla (servicio, origen, destino).
+		"""
+		return (self.id, "auto" if origen is None else origen, destino)
+
+	def crear(self):
+		"""
+		Importa el módulo del traductor y crea su instancia.
+
+		:return: La instancia del traductor.
+		"""
+		raise NotImplementedError
+
+	def traducir(self, texto, origen, destino, clave, url):
+		"""
+		Traduce un texto.
+
+		:param texto: El texto a traducir.
+		:param origen: Código del idioma de origen o "auto".
+		:param destino: Código del idioma de destino.
+		:param clave: Clave de la API o None.
+		:param url: URL del servidor o None.
+		:return: El texto traducido.
+		"""
+		raise NotImplementedError
+
+	def traducir_lote(self, textos, origen, destino, clave, url):
+		"""
+		Traduce varios textos en una sola petición.
+
+		Los servicios sin campo nativo para varios textos reciben los textos unidos por saltos de
+		línea y la respuesta se vuelve a dividir.
+
+		:param textos: Lista de textos a traducir.
+		:param origen: Código del idioma de origen o "auto".
+		:param destino: Código del idioma de destino.
+		:param clave: Clave de la API o None.
+		:param url: URL del servidor o None.
+		:return: Lista de textos traducidos o None si no se ha podido traducir en lote.
+		"""
+		if any("\n" in t for t in textos):
+			return None
+		unido = "\n".join(textos)
+		if self.max_caracteres is not None and len(unido) > self.max_caracteres:
+			return None
+		translated = self.traducir(unido, origen, destino, clave, url)
+		if not translated:
+			return None
+		partes = translated.split("\n")
+		if len(partes) != len(textos):
+			return None
+		return partes
+
+	def traducir_alineado(self, textos, origen, destino):
+		"""
+		Traduce los fragmentos de una secuencia como un solo texto y reparte la traducción entre ellos.
+
+		Solo está disponible en los servicios que declaran la capacidad de contexto.
+
+		:param textos: Lista de fragmentos.
+		:param origen: Código del idioma de origen o "auto".
+		:param destino: Código del idioma de destino.
+		:return: Lista con la traducción de cada fragmento o None si no se puede repartir.
+		"""
+		return None
+
+def _decodificar(datos, texto):
+	"""
+	Convierte la respuesta de los servicios que pueden devolver bytes en texto.
+
+	:param datos: La respuesta del servicio.
+	:param texto: El texto original, que se devuelve si la respuesta no es válida.
+	:return: El texto traducido.
+	"""
+	if isinstance(datos, bytes):
+		return datos.decode('utf-8', 'surrogatepass')
+	elif isinstance(datos, str):
+		return datos
+	return texto
+
+@registrar_servicio
+class ServicioGoogle(ServicioTraduccion):
+	"""
+	Servicio Google 1: página móvil de Google Translate.
+	"""
+	id = 0
+	nombre = "Google 1"
+	max_caracteres = 5000
+
+	def crear(self):
+		from ..src_translations.src_google_original import TranslatorGoogle
+		return TranslatorGoogle()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_google(texto.encode('utf8'), to_language=destino)
+
+@registrar_servicio
+class ServicioGoogleAlternativo(ServicioTraduccion):
+	"""
+	Servicio Google 2: página alternativa de Google Translate.
+	"""
+	id = 1
+	nombre = "Google 2"
+	max_caracteres = 5000
+
+	def crear(self):
+		from ..src_translations.src_google_alternative import TranslatorGooglealternative
+		return TranslatorGooglealternative()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_google_alternative(texto.encode('utf8'), target=destino)
+
+@registrar_servicio
+class ServicioGoogleApiFree(ServicioTraduccion):
+	"""
+	Servicio Google 3: API gratuita de Google Translate.
+	"""
+	id = 2
+	nombre = "Google 3"
+
+	def crear(self):
+		from ..src_translations.src_google_api_free import TranslatorGoogleApiFree
+		return TranslatorGoogleApiFree()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_google_api_free(lang_from='auto', lang_to=destino, text=texto, chunksize=3000, mostrar_progreso=False)
+
+@registrar_servicio
+class ServicioGoogleApiFreeAlternativo(ServicioTraduccion):
+	"""
+	Servicio Google 4: API gratuita de Google Translate con token.
+	"""
+	id = 3
+	nombre = "Google 4"
+
+	def crear(self):
+		from ..src_translations.src_google_api_free_alternative import TranslatorGoogleApiFreeAlternative
+		return TranslatorGoogleApiFreeAlternative()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_google_api_free(lang_from='auto', lang_to=destino, text=texto, chunksize=3000, mostrar_progreso=False)
+
+@registrar_servicio
+class ServicioDeepL(ServicioTraduccion):
+	"""
+	Servicio DeepL con la API gratuita.
+	"""
+	id = 4
+	nombre = "DeepL API Free"
+	idiomas = "deepl"
+	ajuste_destino = "deepl"
+	lote = True
+	max_caracteres = 100000
+	api = "deepL_free"
+	ajuste_api = "api_deepl"
+	# API gratuita o profesional
+	gratuita = True
+
+	def crear(self):
+		from ..src_translations.src_deepl_original import TranslatorDeepL
+		return TranslatorDeepL()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		datos = self.traductor.translate_deepl(texto.encode('utf8', 'surrogatepass'), clave, use_free_api=self.gratuita, source_lang="auto", target_lang=destino)
+		return _decodificar(datos, texto)
+
+	def traducir_lote(self, textos, origen, destino, clave, url):
+		return self.traductor.translate_deepl_lote(textos, clave, use_free_api=self.gratuita, source_lang="auto", target_lang=destino)
+
+@registrar_servicio
+class ServicioDeepLPro(ServicioDeepL):
+	"""
+	Servicio DeepL con la API profesional.
+	"""
+	id = 5
+	nombre = "DeepL API Pro"
+	api = "deepL_pro"
+	ajuste_api = "api_deepl_pro"
+	gratuita = False
+
+@registrar_servicio
+class ServicioLibreTranslate(ServicioTraduccion):
+	"""
+	Servicio LibreTranslate en el servidor configurado.
+	"""
+	id = 6
+	nombre = "LibreTranslate"
+	idiomas = "libretranslate"
+	ajuste_destino = "libretranslate"
+	lote = True
+	max_caracteres = 5000
+	api = "libre_translate"
+	ajuste_api = "api_libretranslate"
+	necesita_url = True
+
+	def crear(self):
+		from ..src_translations.src_libretranslate_original import TranslatorLibreTranslate
+		return TranslatorLibreTranslate()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_libretranslate(texto, clave, source_lang="auto", target_lang=destino, api_url=url)
+
+	def traducir_lote(self, textos, origen, destino, clave, url):
+		return self.traductor.translate_libretranslate_lote(textos, clave, source_lang="auto", target_lang=destino, api_url=url)
+
+@registrar_servicio
+class ServicioMicrosoft(ServicioTraduccion):
+	"""
+	Servicio gratuito de Microsoft Translator.
+	"""
+	id = 7
+	nombre = "Microsoft"
+	idiomas = "microsoft"
+	ajuste_destino = "microsoft"
+	elige_origen = True
+	lote = True
+	contexto = True
+	max_caracteres = 50000
+
+	def crear(self):
+		from ..src_translations.src_microsoft_api_free import TranslatorMicrosoftApiFree
+		return TranslatorMicrosoftApiFree()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_microsoft_api_free(origen, destino, texto)
+
+	def traducir_lote(self, textos, origen, destino, clave, url):
+		return self.traductor.translate_microsoft_api_free_lote(origen, destino, textos)
+
+	def traducir_alineado(self, textos, origen, destino):
+		return self.traductor.translate_microsoft_api_free_alineado(origen, destino, textos)
+
+@registrar_servicio
+class ServicioDeepLFree(ServicioTraduccion):
+	"""
+	Servicio gratuito de DeepL sin clave.
+	"""
+	id = 8
+	nombre = "DeepL Free"
+	idiomas = "deepl"
+	ajuste_destino = "deepl"
+	lote = True
+	max_caracteres = 5000
+
+	def crear(self):
+		from ..src_translations.src_deepl_free import TranslatorDeepLFree
+		return TranslatorDeepLFree()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate(texto, source_lang='auto', target_lang=destino)
+
+	def traducir_lote(self, textos, origen, destino, clave, url):
+		return self.traductor.translate_lote(textos, source_lang='auto', target_lang=destino)
+
+@registrar_servicio
+class ServicioOpenAI(ServicioTraduccion):
+	"""
+	Servicio OpenAI.
+	"""
+	id = 9
+	nombre = "OpenAI"
+	ajuste_destino = "openai"
+	api = "openai"
+	ajuste_api = "api_openai"
+
+	def crear(self):
+		from ..src_translations.src_openai_4o_api import TranslatorOpenAI
+		return TranslatorOpenAI()
+
+	def traducir(self, texto, origen, destino, clave, url):
+		return self.traductor.translate_openai(clave, texto, target_language=destino)
@@ -9,17 +9,191 @@ import os
 import json
 import codecs
 import re
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # Carga traducción
 addonHandler.initTranslation()
 
+class AlmacenCache:
+	"""
+	Almacén en disco de la caché de traducciones basado en SQLite.
+
+	Todas las aplicaciones se guardan en un único archivo con un índice por aplicación, servicio,
+	par de idiomas y hash del texto. Las escrituras son inserciones incrementales dentro de una
+	transacción, por lo que un cierre inesperado de NVDA no deja el archivo a medias.
+	"""
+	def __init__(self, ruta):
+		"""
+		Inicializa el almacén sin abrirlo.
+
+		:param ruta: Ruta del archivo de la base de datos.
+		"""
+		self.ruta = ruta
+		self._conexion = None
+		self._lock = threading.Lock()
+
+	def abrir(self):
+		"""
+		Abre la base de datos y crea las tablas si no existen.
+		"""
+		with self._lock:
+			if self._conexion is not None:
+				return
+			conexion = sqlite3.connect(self.ruta, check_same_thread=False)
+			conexion.execute("PRAGMA journal_mode=WAL")
+			conexion.execute("PRAGMA synchronous=NORMAL")
+			with conexion:
+				conexion.execute("""CREATE TABLE IF NOT EXISTS traducciones (
+					app TEXT NOT NULL,
+					servicio INTEGER NOT NULL,
+					origen TEXT NOT NULL,
+					destino TEXT NOT NULL,
+					hash INTEGER NOT NULL,
+					texto TEXT NOT NULL,
+					traduccion TEXT NOT NULL,
+					usado REAL NOT NULL,
+					PRIMARY KEY (app, servicio, origen, destino, hash, texto)
+				)""")
+				conexion.execute("CREATE INDEX IF NOT EXISTS idx_traducciones_particion ON traducciones (app, servicio, origen, destino, usado)")
+			self._conexion = conexion
+
+	def abierto(self):
+		"""
+		Indica si la base de datos está abierta.
+
+		:return: True si está abierta, False en caso contrario.
+		"""
+		return self._conexion is not None
+
+	def cerrar(self):
+		"""
+		Cierra la base de datos.
+		"""
+		with self._lock:
+			if self._conexion is not None:
+				self._conexion.close()
+				self._conexion = None
+
+	@staticmethod
+	def hash_texto(texto):
+		"""
+		Calcula el hash estable de 64 bits de un texto.
+
+		:param texto: El texto original.
+		:return: El hash como entero con signo.
+		"""
+		return int.from_bytes(hashlib.blake2b(texto.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big", signed=True)
+
+	def buscar(self, particion, texto):
+		"""
+		Busca la traducción de un texto en el disco.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		:param texto: El texto original.
+		:return: Tupla (traducción, momento de uso) o None si no está guardada.
+		"""
+		with self._lock:
+			return self._conexion.execute(
+				"SELECT traduccion, usado FROM traducciones WHERE app=? AND servicio=? AND origen=? AND destino=? AND hash=? AND texto=?",
+				(*particion, self.hash_texto(texto), texto)
+			).fetchone()
+
+	def cargar(self, particion, limite):
+		"""
+		Obtiene las traducciones de una partición usadas más recientemente.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		:param limite: Número máximo de traducciones.
+		:return: Lista de tuplas (texto, traducción, momento de uso).
+		"""
+		with self._lock:
+			return self._conexion.execute(
+				"SELECT texto, traduccion, usado FROM traducciones WHERE app=? AND servicio=? AND origen=? AND destino=? ORDER BY usado DESC LIMIT ?",
+				(*particion, limite)
+			).fetchall()
+
+	def insertar(self, entradas):
+		"""
+		Inserta o actualiza traducciones en una sola transacción.
+
+		:param entradas: Iterable de tuplas (partición, texto, traducción).
+		:return: Número de traducciones escritas.
+		"""
+		ahora = time.time()
+		filas = [(*particion, self.hash_texto(texto), texto, traduccion, ahora) for particion, texto, traduccion in entradas]
+		if not filas:
+			return 0
+		with self._lock:
+			with self._conexion:
+				self._conexion.executemany("INSERT OR REPLACE INTO traducciones VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas)
+		return len(filas)
+
+	def marcar_usadas(self, claves):
+		"""
+		Anota como usadas ahora unas traducciones en una sola transacción.
+
+		Así cargar() trae a memoria las traducciones usadas más recientemente y no solo las insertadas.
+
+		:param claves: Iterable de tuplas (partición, texto).
+		:return: Número de traducciones anotadas.
+		"""
+		ahora = time.time()
+		filas = [(ahora, *particion, self.hash_texto(texto), texto) for particion, texto in claves]
+		if not filas:
+			return 0
+		with self._lock:
+			with self._conexion:
+				self._conexion.executemany("UPDATE traducciones SET usado=? WHERE app=? AND servicio=? AND origen=? AND destino=? AND hash=? AND texto=?", filas)
+		return len(filas)
+
+	def borrar(self, app=None, destino=None):
+		"""
+		Borra traducciones del disco.
+
+		:param app: Nombre de la aplicación o None para todas.
+		:param destino: Idioma destino o None para todos.
+		:return: Número de traducciones borradas.
+		"""
+		condiciones = []
+		valores = []
+		if app is not None:
+			condiciones.append("app=?")
+			valores.append(app)
+		if destino is not None:
+			condiciones.append("destino=?")
+			valores.append(destino)
+		consulta = "DELETE FROM traducciones"
+		if condiciones:
+			consulta += " WHERE " + " AND ".join(condiciones)
+		with self._lock:
+			with self._conexion:
+				return self._conexion.execute(consulta, valores).rowcount
+
 class LocalCacheHandler:
 	"""
 	Clase para manejar la carga y almacenamiento de la caché local de traducciones.
 
-	Esta clase proporciona métodos para cargar y guardar una caché de traducciones
-	almacenada localmente en formato JSON.
+	Esta clase proporciona métodos para cargar y guardar la caché de traducciones en un
+	almacén SQLite local (AlmacenCache). Los archivos JSON por aplicación de versiones
+	anteriores se importan la primera vez.
+
+	Un hilo escritor guarda en segundo plano las traducciones nuevas cada cierto tiempo o cuando
+	se acumulan suficientes, de modo que un cierre inesperado solo pierde los últimos segundos
+	y el hilo de la voz nunca espera al disco.
 	"""
+	# Segundos máximos entre escrituras
+	intervalo_escritura = 30
+	# Traducciones nuevas que provocan una escritura inmediata
+	umbral_escritura = 200
+	# Particiones que se mantienen cargadas en memoria a la vez
+	max_particiones = 8
+	# Segundos máximos que se espera a que termine la carga de una partición que ya se está cargando
+	espera_carga = 2.0
 
 	def __init__(self, settings, logHandler):
 		"""
@@ -31,12 +205,21 @@ class LocalCacheHandler:
 		"""
 		self.settings = settings
 		self.logHandler = logHandler
+		self.almacen = AlmacenCache(os.path.join(self.settings.dir_cache, "cache.sqlite3"))
+		self._evento_escritura = threading.Event()
+		self._parar_escritura = False
+		self._hilo_escritura = None
+		self._cargadas = OrderedDict()
+		self._lock_cargadas = threading.Lock()
+		# La apertura puede pedirse a la vez desde el arranque y desde los hilos de traducción
+		self._lock_almacen = threading.Lock()
+		self._cargador = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TranslateAdvancedCache")
 
-	def loadLocalCache(self):
+	def openStore(self):
 		"""
-		Carga la caché de traducciones desde archivos JSON en el directorio especificado.
+		Crea el directorio de la caché si no existe y abre el almacén.
 
-		Los errores durante la creación del directorio o la lectura de archivos se registran.
+		:return: True si el almacén está disponible, False en caso contrario.
 		"""
 		path = self.settings.dir_cache
 		if not os.path.exists(path):
@@ -44,31 +227,569 @@ class LocalCacheHandler:
 				os.mkdir(path)
 			except Exception as e:
 				self.logHandler.log.error(_("Fallo al crear la ruta de almacenamiento: {path} ({e})").format(path=path, e=e))
-				return
+				return False
+		if self.almacen.abierto():
+			return True
+		with self._lock_almacen:
+			if self.almacen.abierto():
+				return True
+			try:
+				self.almacen.abrir()
+			except Exception as e:
+				self.logHandler.log.error(_("No se puede abrir la caché de traducción {path}: {e}").format(path=self.almacen.ruta, e=e))
+				return False
+			self.importLegacyCache()
+		return True
+
+	def importLegacyCache(self):
+		"""
+		Importa al almacén los archivos JSON por aplicación de versiones anteriores.
 
+		Los archivos tienen el nombre aplicación_idioma.json y no guardan el servicio, por lo que se
+		asignan al servicio seleccionado. Una vez importados se renombran para no volver a leerlos.
+		"""
+		path = self.settings.dir_cache
 		for entry in os.listdir(path):
-			m = re.match("(.*)\.json$", entry)
-			if m:
-				appName = m.group(1)
-				try:
-					with codecs.open(os.path.join(path, entry), "r", "utf-8") as cacheFile:
-						values = json.load(cacheFile)
-						self.settings._translationCache[appName] = values
-				except Exception as e:
-					self.logHandler.log.error(_("No se puede leer o decodificar datos desde {path}: {e}").format(path=path, e=e))
-					continue
+			m = re.match(r"(.*)_([^_]*)\.json$", entry)
+			if not m:
+				continue
+			particion = (m.group(1), self.settings.choiceOnline, self.settings.choiceLangOrigen if self.settings.choiceOnline == 7 else "auto", m.group(2))
+			file = os.path.join(path, entry)
+			try:
+				with codecs.open(file, "r", "utf-8") as cacheFile:
+					values = json.load(cacheFile)
+				self.almacen.insertar((particion, texto, traduccion) for texto, traduccion in values.items())
+				os.replace(file, file + ".importado")
+			except Exception as e:
+				self.logHandler.log.error(_("No se puede leer o decodificar datos desde {path}: {e}").format(path=file, e=e))
+
+	def loadLocalCache(self):
+		"""
+		Prepara la caché local para su uso.
+
+		Solo abre el almacén; las traducciones de cada aplicación se cargan en memoria la primera vez
+		que se usan (loadPartition). Los errores durante la apertura se registran.
+		"""
+		if not self.openStore():
+			return
+		with self._lock_cargadas:
+			self._cargadas.clear()
+
+	def loadPartition(self, particion):
+		"""
+		Carga en memoria las traducciones guardadas de una partición si aún no se han cargado.
+
+		Si otro hilo la está cargando se espera a que termine, para no pedir al servicio textos que
+		están a punto de cargarse. Si hay demasiadas particiones cargadas se descarga de la memoria
+		la usada hace más tiempo.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		"""
+		with self._lock_cargadas:
+			cargada = self._cargadas.get(particion)
+			if cargada is not None:
+				self._cargadas.move_to_end(particion)
+			else:
+				# El evento se activa cuando las traducciones de la partición ya están en memoria
+				carga = self._cargadas[particion] = threading.Event()
+				descartadas = []
+				while len(self._cargadas) > self.max_particiones:
+					descartadas.append(self._cargadas.popitem(last=False)[0])
+		if cargada is not None:
+			cargada.wait(self.espera_carga)
+			return
+		try:
+			for descartada in descartadas:
+				self.settings._translationCache.descargar_particion(descartada)
+			if not self.openStore():
+				return
+			for texto, traduccion, usado in self.almacen.cargar(particion, self.settings._translationCache.max_entradas):
+				self.settings._translationCache.guardar(particion, texto, traduccion, pendiente=False, momento=usado)
+		except Exception as e:
+			with self._lock_cargadas:
+				self._cargadas.pop(particion, None)
+			self.logHandler.log.error(_("No se puede leer o decodificar datos desde {path}: {e}").format(path=self.almacen.ruta, e=e))
+		finally:
+			carga.set()
+
+	def findIdentity(self, particion, texto):
+		"""
+		Busca en el disco un texto que ya se sabe que no cambia al traducirlo.
+
+		Solo consulta el disco si el filtro de la caché en memoria indica que el texto puede estar
+		guardado como identidad, así los textos que nunca se han visto no cuestan una consulta.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		:param texto: El texto original.
+		:return: El propio texto si es una identidad vigente o None en caso contrario.
+		"""
+		cache = self.settings._translationCache
+		if not cache.posible_identidad(particion, texto) or not self.openStore():
+			return None
+		try:
+			fila = self.almacen.buscar(particion, texto)
+		except Exception as e:
+			self.logHandler.log.error(_("No se puede leer o decodificar datos desde {path}: {e}").format(path=self.almacen.ruta, e=e))
+			return None
+		if fila is None or fila[0] != texto:
+			return None
+		if not cache.guardar(particion, texto, texto, pendiente=False, momento=fila[1]):
+			return None
+		return cache.obtener(particion, texto)
+
+	def prefetchPartition(self, particion):
+		"""
+		Carga en segundo plano las traducciones de una partición si aún no se han cargado.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		"""
+		with self._lock_cargadas:
+			if particion in self._cargadas:
+				return
+		self._cargador.submit(self.loadPartition, particion)
 
 	def saveLocalCache(self):
 		"""
-		Guarda la caché de traducciones en archivos JSON en el directorio especificado.
+		Guarda en el almacén las traducciones nuevas desde el último guardado y anota el uso de las
+		que se han encontrado en la caché.
 
 		Se capturan y registran errores durante el guardado de los datos.
 		"""
-		path = self.settings.dir_cache
-		for appName, data in self.settings._translationCache.items():
-			file = os.path.join(path, f"{appName}.json")
-			try:
-				with codecs.open(file, "w", "utf-8") as cacheFile:
-					json.dump(data, cacheFile, ensure_ascii=False)
-			except Exception as e:
-				self.logHandler.log.error(_("Fallo al guardar la caché de traducción para {appName} en {file}: {e}").format(appName=appName, file=file, e=e))
+		if not self.openStore():
+			return
+		nuevas = self.settings._translationCache.extraer_pendientes()
+		usadas = self.settings._translationCache.extraer_usadas()
+		try:
+			self.almacen.insertar(nuevas)
+			self.almacen.marcar_usadas(usadas)
+		except Exception as e:
+			self.settings._translationCache.devolver_pendientes(nuevas)
+			self.logHandler.log.error(_("Fallo al guardar la caché de traducción en {file}: {e}").format(file=self.almacen.ruta, e=e))
+
+	def requestSave(self):
+		"""
+		Pide al hilo escritor que guarde las traducciones nuevas sin esperar a que termine.
+		"""
+		self._evento_escritura.set()
+
+	def startWriter(self):
+		"""
+		Arranca el hilo escritor en segundo plano.
+		"""
+		if self._hilo_escritura is not None:
+			return
+		self._parar_escritura = False
+		self.settings._translationCache.al_acumular = self.requestSave
+		self.settings._translationCache.umbral_pendientes = self.umbral_escritura
+		self._hilo_escritura = threading.Thread(target=self._escribir, daemon=True)
+		self._hilo_escritura.start()
+
+	def stopWriter(self):
+		"""
+		Detiene el hilo escritor esperando a que termine la escritura en curso.
+		"""
+		if self._hilo_escritura is None:
+			return
+		self._parar_escritura = True
+		self._evento_escritura.set()
+		self._hilo_escritura.join(timeout=5)
+		self._hilo_escritura = None
+		self.settings._translationCache.al_acumular = None
+
+	def _escribir(self):
+		"""
+		Bucle del hilo escritor. Guarda las traducciones nuevas por tiempo o por cantidad.
+		"""
+		while not self._parar_escritura:
+			self._evento_escritura.wait(self.intervalo_escritura)
+			self._evento_escritura.clear()
+			if self._parar_escritura:
+				break
+			if self.settings._translationCache.num_pendientes() or self.settings._translationCache.num_usadas():
+				self.saveLocalCache()
+
+	def clearLocalCache(self, app=None, destino=None):
+		"""
+		Borra traducciones de la memoria y del almacén.
+
+		:param app: Nombre de la aplicación o None para todas.
+		:param destino: Idioma destino o None para todos.
+		:return: Número de traducciones borradas del almacén o None si ha habido un error.
+		"""
+		if app is None and destino is None:
+			self.settings._translationCache.limpiar()
+		else:
+			self.settings._translationCache.borrar_particiones(lambda particion: (app is None or particion[0] == app) and (destino is None or particion[3] == destino))
+		if not self.openStore():
+			return None
+		try:
+			return self.almacen.borrar(app, destino)
+		except Exception as e:
+			self.logHandler.log.error(_("Fallo al borrar la caché de traducción en {file}: {e}").format(file=self.almacen.ruta, e=e))
+			return None
+
+	def closeStore(self):
+		"""
+		Cierra el almacén y detiene la carga de particiones.
+		"""
+		self._cargador.shutdown(wait=False)
+		self.almacen.cerrar()
+
+class _SketchFrecuencia:
+	"""
+	Estimador aproximado de frecuencias de acceso (Count-Min Sketch con contadores de 4 bits).
+
+	Los contadores se reducen a la mitad periódicamente para que la frecuencia refleje el uso reciente.
+	"""
+
+	_SEMILLAS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+
+	def __init__(self, capacidad):
+		"""
+		Inicializa el estimador.
+
+		:param capacidad: Número de entradas esperado en la caché.
+		"""
+		ancho = 64
+		while ancho < capacidad * 4:
+			ancho <<= 1
+		self._mascara = ancho - 1
+		self._filas = [bytearray(ancho) for semilla in self._SEMILLAS]
+		self._muestras = 0
+		self._limite = max(capacidad, 1) * 10
+
+	def _indices(self, clave):
+		"""
+		Obtiene la posición de la clave en cada fila.
+
+		:param clave: La clave a localizar.
+		:return: Generador de índices, uno por fila.
+		"""
+		h = hash(clave)
+		for semilla in self._SEMILLAS:
+			yield (((h ^ semilla) * 0x9E3779B1) >> 7) & self._mascara
+
+	def incrementar(self, clave):
+		"""
+		Registra un acceso a la clave.
+
+		:param clave: La clave accedida.
+		"""
+		for fila, indice in zip(self._filas, self._indices(clave)):
+			if fila[indice] < 15:
+				fila[indice] += 1
+		self._muestras += 1
+		if self._muestras >= self._limite:
+			self._filas = [bytearray(valor >> 1 for valor in fila) for fila in self._filas]
+			self._muestras //= 2
+
+	def estimar(self, clave):
+		"""
+		Estima cuántas veces se ha accedido a la clave recientemente.
+
+		:param clave: La clave a consultar.
+		:return: La frecuencia estimada.
+		"""
+		return min(fila[indice] for fila, indice in zip(self._filas, self._indices(clave)))
+
+class _FiltroBloom:
+	"""
+	Filtro de Bloom para saber rápidamente si una clave puede haberse añadido.
+
+	Puede dar falsos positivos pero nunca falsos negativos.
+	"""
+
+	_SEMILLAS = (0x5BD1E995, 0x1B873593, 0xCC9E2D51, 0xE6546B64)
+
+	def __init__(self, capacidad):
+		"""
+		Inicializa el filtro vacío.
+
+		:param capacidad: Número de claves esperado.
+		"""
+		bits = 1024
+		while bits < capacidad * 16:
+			bits <<= 1
+		self._mascara = bits - 1
+		self._bits = bytearray(bits >> 3)
+
+	def _indices(self, clave):
+		"""
+		Obtiene las posiciones de bit de la clave.
+
+		:param clave: La clave a localizar.
+		:return: Generador de posiciones de bit.
+		"""
+		h = hash(clave)
+		for semilla in self._SEMILLAS:
+			yield (((h ^ semilla) * 0x9E3779B1) >> 5) & self._mascara
+
+	def anadir(self, clave):
+		"""
+		Añade una clave al filtro.
+
+		:param clave: La clave a añadir.
+		"""
+		for indice in self._indices(clave):
+			self._bits[indice >> 3] |= 1 << (indice & 7)
+
+	def contiene(self, clave):
+		"""
+		Indica si la clave puede haberse añadido al filtro.
+
+		:param clave: La clave a consultar.
+		:return: False si seguro que no se ha añadido, True si puede haberse añadido.
+		"""
+		return all(self._bits[indice >> 3] & (1 << (indice & 7)) for indice in self._indices(clave))
+
+	def limpiar(self):
+		"""
+		Vacía el filtro.
+		"""
+		self._bits = bytearray(len(self._bits))
+
+class CacheTraducciones:
+	"""
+	Caché en memoria de traducciones con límite de entradas y de tamaño.
+
+	Las entradas se agrupan en particiones (aplicación, servicio y par de idiomas) pero el límite es global.
+	Cuando la caché está llena, una entrada nueva solo desplaza a la menos usada recientemente si se ha
+	accedido a ella con más frecuencia (política LRU con admisión tipo TinyLFU). Así los textos largos que
+	aparecen una sola vez no expulsan a los textos cortos de la interfaz que se repiten constantemente.
+	Las operaciones de lectura y escritura son O(1).
+
+	Los textos cuya traducción es el propio texto (ya están en el idioma destino, números, rutas...)
+	se guardan como entradas de identidad que caducan pasado un tiempo, y sus claves se anotan en un
+	filtro de Bloom para poder reconocerlas aunque hayan salido de la memoria.
+	"""
+	def __init__(self, max_entradas=20000, max_bytes=16 * 1024 * 1024, ttl_identidad=86400):
+		"""
+		Inicializa la caché vacía.
+
+		:param max_entradas: Número máximo de entradas.
+		:param max_bytes: Tamaño máximo aproximado en bytes de los textos guardados.
+		:param ttl_identidad: Segundos que se considera válida una entrada de identidad. 0 para no guardarlas.
+		"""
+		self.max_entradas = max_entradas
+		self.max_bytes = max_bytes
+		self.ttl_identidad = ttl_identidad
+		self._identidades = _FiltroBloom(max_entradas)
+		self._datos = OrderedDict()
+		self._particiones = {}
+		self._bytes = 0
+		self._pendientes = {}
+		# Traducciones encontradas desde el último guardado, para anotar su uso en disco
+		self._usadas = set()
+		self.umbral_pendientes = 0
+		self.al_acumular = None
+		self._sketch = _SketchFrecuencia(max_entradas)
+		self._lock = threading.RLock()
+
+	def _coste(self, texto, traduccion):
+		"""
+		Calcula el tamaño aproximado en bytes de una entrada.
+
+		:param texto: El texto original.
+		:param traduccion: El texto traducido.
+		:return: El tamaño aproximado en bytes.
+		"""
+		return (len(texto) + len(traduccion)) * 2 + 64
+
+	def obtener(self, particion, texto):
+		"""
+		Busca la traducción de un texto.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		:param texto: El texto original.
+		:return: La traducción o None si no está en la caché.
+		"""
+		clave = (particion, texto)
+		with self._lock:
+			self._sketch.incrementar(clave)
+			entrada = self._datos.get(clave)
+			if entrada is None:
+				return None
+			if entrada[2] is not None and entrada[2] < time.time():
+				# La entrada de identidad ha caducado; se volverá a consultar al servicio
+				self._eliminar(clave)
+				return None
+			self._datos.move_to_end(clave)
+			if entrada[2] is None:
+				# Las entradas de identidad conservan el momento en que se obtuvieron, que marca su caducidad
+				self._usadas.add(clave)
+			return entrada[0]
+
+	def posible_identidad(self, particion, texto):
+		"""
+		Indica si un texto puede haberse guardado como entrada de identidad.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		:param texto: El texto original.
+		:return: False si seguro que no, True si puede ser.
+		"""
+		return self._identidades.contiene((particion, texto))
+
+	def guardar(self, particion, texto, traduccion, pendiente=True, momento=None):
+		"""
+		Guarda la traducción de un texto si la política de admisión lo permite.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		:param texto: El texto original.
+		:param traduccion: El texto traducido.
+		:param pendiente: Si la traducción es nueva y debe escribirse en disco.
+		:param momento: Momento en que se obtuvo la traducción (opcional). Por defecto ahora.
+		:return: True si la entrada se ha guardado, False si se ha rechazado.
+		"""
+		clave = (particion, texto)
+		coste = self._coste(texto, traduccion)
+		caduca = None
+		if traduccion == texto:
+			if self.ttl_identidad <= 0:
+				return False
+			caduca = (time.time() if momento is None else momento) + self.ttl_identidad
+			if caduca < time.time():
+				return False
+		with self._lock:
+			if caduca is not None:
+				self._identidades.anadir(clave)
+			if pendiente:
+				self._pendientes[clave] = traduccion
+				if self.al_acumular is not None and len(self._pendientes) == self.umbral_pendientes:
+					self.al_acumular()
+			anterior = self._datos.get(clave)
+			if anterior is not None:
+				self._bytes += coste - anterior[1]
+				self._datos[clave] = (traduccion, coste, caduca)
+				self._datos.move_to_end(clave)
+				self._ajustar()
+				return True
+			if coste > self.max_bytes // 8:
+				# Un texto tan largo no se admite aunque la caché tenga sitio
+				return False
+			frecuencia = self._sketch.estimar(clave)
+			while self._datos and (len(self._datos) >= self.max_entradas or self._bytes + coste > self.max_bytes):
+				victima, (traduccion_victima, coste_victima, caduca_victima) = next(iter(self._datos.items()))
+				frecuencia_victima = self._sketch.estimar(victima)
+				if frecuencia < frecuencia_victima or (frecuencia == frecuencia_victima and coste >= coste_victima):
+					return False
+				self._eliminar(victima)
+			self._datos[clave] = (traduccion, coste, caduca)
+			self._bytes += coste
+			self._particiones.setdefault(particion, set()).add(texto)
+			return True
+
+	def _ajustar(self):
+		"""
+		Expulsa las entradas menos usadas recientemente hasta respetar los límites.
+		"""
+		while self._datos and (len(self._datos) > self.max_entradas or self._bytes > self.max_bytes):
+			self._eliminar(next(iter(self._datos)))
+
+	def _eliminar(self, clave):
+		"""
+		Elimina una entrada de la caché.
+
+		:param clave: Tupla (partición, texto).
+		"""
+		traduccion, coste, caduca = self._datos.pop(clave)
+		self._bytes -= coste
+		particion, texto = clave
+		textos = self._particiones.get(particion)
+		if textos is not None:
+			textos.discard(texto)
+			if not textos:
+				del self._particiones[particion]
+
+	def descargar_particion(self, particion):
+		"""
+		Libera de la memoria las entradas de una partición sin perder las que aún no se han escrito en disco.
+
+		Las entradas pendientes de escribir se quedan en memoria: si la partición se vuelve a cargar
+		antes de que el escritor las guarde, no están en el disco y no se recuperarían al cargarla.
+
+		:param particion: Tupla (aplicación, servicio, idioma origen, idioma destino).
+		"""
+		with self._lock:
+			for texto in list(self._particiones.get(particion, ())):
+				if (particion, texto) not in self._pendientes:
+					self._eliminar((particion, texto))
+
+	def extraer_pendientes(self):
+		"""
+		Obtiene y olvida las traducciones nuevas que aún no se han escrito en disco.
+
+		Incluye las que ya han sido expulsadas de la memoria.
+
+		:return: Lista de tuplas (partición, texto, traducción).
+		"""
+		with self._lock:
+			pendientes = [(particion, texto, traduccion) for (particion, texto), traduccion in self._pendientes.items()]
+			self._pendientes = {}
+		return pendientes
+
+	def extraer_usadas(self):
+		"""
+		Obtiene y olvida las traducciones encontradas en la caché desde el último guardado.
+
+		:return: Lista de tuplas (partición, texto).
+		"""
+		with self._lock:
+			usadas = list(self._usadas)
+			self._usadas = set()
+		return usadas
+
+	def num_usadas(self):
+		"""
+		Obtiene el número de traducciones encontradas en la caché desde el último guardado.
+
+		:return: El número de traducciones usadas.
+		"""
+		with self._lock:
+			return len(self._usadas)
+
+	def num_pendientes(self):
+		"""
+		Obtiene el número de traducciones nuevas que aún no se han escrito en disco.
+
+		:return: El número de traducciones pendientes.
+		"""
+		with self._lock:
+			return len(self._pendientes)
+
+	def devolver_pendientes(self, pendientes):
+		"""
+		Vuelve a marcar como pendientes unas traducciones que no se han podido escribir.
+
+		:param pendientes: Lista de tuplas (partición, texto, traducción).
+		"""
+		with self._lock:
+			for particion, texto, traduccion in pendientes:
+				self._pendientes.setdefault((particion, texto), traduccion)
+
+	def borrar_particiones(self, condicion):
+		"""
+		Elimina todas las entradas de las particiones que cumplen una condición.
+
+		:param condicion: Función que recibe la partición y devuelve True si debe borrarse.
+		"""
+		with self._lock:
+			for particion in [particion for particion in self._particiones if condicion(particion)]:
+				for texto in list(self._particiones[particion]):
+					self._eliminar((particion, texto))
+			self._pendientes = {clave: traduccion for clave, traduccion in self._pendientes.items() if not condicion(clave[0])}
+			self._usadas = {clave for clave in self._usadas if not condicion(clave[0])}
+
+	def limpiar(self):
+		"""
+		Elimina todas las entradas de la caché.
+		"""
+		with self._lock:
+			self._datos.clear()
+			self._particiones.clear()
+			self._pendientes = {}
+			self._usadas = set()
+			self._identidades.limpiar()
+			self._bytes = 0
+
+	def __len__(self):
+		return len(self._datos)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga NVDA
+import addonHandler
+import logHandler
+import queueHandler
+import braille
+# Carga Python
+import queue
+import threading
+
+# Carga traducción
+addonHandler.initTranslation()
+
+class GestorHistorial:
+	"""
+	Clase que registra el historial de traducciones en segundo plano.
+
+	El hilo de la voz solo deja las listas de textos en una cola y sigue. Un hilo consumidor une
+	los textos, descarta los repetidos con un conjunto (sin recorrer el historial) y añade los nuevos.
+	La línea braille se actualiza aparte, en el hilo principal de NVDA.
+	"""
+	def __init__(self, frame):
+		"""
+		Inicializa el gestor y arranca el hilo consumidor.
+
+		:param frame: El marco principal de la aplicación.
+		"""
+		self.frame = frame
+		self._cola = queue.SimpleQueue()
+		self._lock = threading.Lock()
+		# Textos originales presentes en el historial, para detectar repetidos en O(1)
+		self._presentes = set()
+		self._hilo = threading.Thread(target=self._procesar, daemon=True)
+		self._hilo.start()
+
+	def registrar(self, origen, destino, mostrar=True):
+		"""
+		Añade a la cola una secuencia traducida para registrarla en el historial.
+
+		:param origen: Lista de textos originales de la secuencia.
+		:param destino: Lista de textos traducidos de la secuencia.
+		:param mostrar: Si se muestra la traducción en la línea braille al añadirla (por defecto True).
+		"""
+		self._cola.put((origen, destino, mostrar))
+
+	def _procesar(self):
+		"""
+		Bucle del hilo consumidor.
+		"""
+		while True:
+			elemento = self._cola.get()
+			if elemento is None:
+				break
+			try:
+				self._anadir(*elemento)
+			except Exception as e:
+				logHandler.log.error(_("Error al registrar el historial: {}").format(str(e)))
+
+	def _anadir(self, origen, destino, mostrar=True):
+		"""
+		Añade una secuencia al historial si ha cambiado al traducirla y no está ya en él.
+
+		:param origen: Lista de textos originales de la secuencia.
+		:param destino: Lista de textos traducidos de la secuencia.
+		:param mostrar: Si se muestra la traducción en la línea braille.
+		"""
+		temp = self.frame.gestor_translate.procesar_listas(origen, destino)
+		if temp['origen'] == temp['destino']:
+			return
+		ajustes = self.frame.gestor_settings
+		with self._lock:
+			if temp['origen'] in self._presentes:
+				return
+			if len(ajustes.historialOrigen) == ajustes.historialOrigen.maxlen:
+				# El elemento más antiguo sale del historial al añadir el nuevo
+				self._presentes.discard(ajustes.historialOrigen[-1])
+			ajustes.historialOrigen.appendleft(temp['origen'])
+			ajustes.historialDestino.appendleft(temp['destino'])
+			self._presentes.add(temp['origen'])
+			ajustes._lastTranslatedText = temp['destino']
+		if mostrar:
+			queueHandler.queueFunction(queueHandler.eventQueue, self._braille, temp['destino'])
+
+	def _braille(self, texto):
+		"""
+		Muestra el último texto traducido en la línea braille.
+
+		:param texto: El texto traducido.
+		"""
+		if braille.handler._get_enabled():
+			braille.handler.message(texto)
+
+	def copia(self):
+		"""
+		Obtiene una copia del historial.
+
+		:return: Tupla con la lista de textos originales y la lista de textos traducidos.
+		"""
+		with self._lock:
+			return list(self.frame.gestor_settings.historialOrigen), list(self.frame.gestor_settings.historialDestino)
+
+	def limpiar(self):
+		"""
+		Borra el historial.
+		"""
+		with self._lock:
+			self.frame.gestor_settings.historialOrigen.clear()
+			self.frame.gestor_settings.historialDestino.clear()
+			self._presentes.clear()
+
+	def terminar(self):
+		"""
+		Detiene el hilo consumidor.
+		"""
+		self._cola.put(None)
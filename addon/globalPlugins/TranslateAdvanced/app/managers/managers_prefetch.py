@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga NVDA
+import addonHandler
+import logHandler
+import api
+import browseMode
+import config
+import controlTypes
+import core
+import textInfos
+from speech.sayAll import SayAllHandler
+try:
+	from speech.speech import getTextInfoSpeech, processText, getCurrentLanguage, CHUNK_SEPARATOR
+	from speech.speechWithoutPauses import SpeechWithoutPauses
+except ImportError:
+	getTextInfoSpeech = None
+# Carga Python
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+# Carga personal
+from ..utils.utils_threads import LimitadorTasa
+
+# Carga traducción
+addonHandler.initTranslation()
+
+# Roles de los elementos cuyos vecinos se traducen por adelantado
+_ROLES_ELEMENTO = frozenset((
+	controlTypes.Role.LISTITEM,
+	controlTypes.Role.TREEVIEWITEM,
+	controlTypes.Role.MENUITEM,
+	controlTypes.Role.CHECKMENUITEM,
+	controlTypes.Role.RADIOMENUITEM,
+	controlTypes.Role.TAB,
+	controlTypes.Role.BUTTON,
+	controlTypes.Role.CHECKBOX,
+	controlTypes.Role.RADIOBUTTON,
+))
+
+class GestorPrecarga:
+	"""
+	Clase que traduce por adelantado los textos que el usuario probablemente va a escuchar.
+
+	Cuando el foco llega a un elemento de una lista, árbol, menú o diálogo se leen los nombres de
+	sus vecinos y de su padre y se traducen en un solo lote en segundo plano. Las traducciones
+	quedan en la caché, de modo que al navegar por los elementos no hay que esperar al servicio.
+	Los vecinos se leen después de que NVDA haya anunciado el foco y con un número máximo de
+	objetos visitados, porque cada lectura es una llamada a otro proceso. Los lotes se envían con
+	un límite de frecuencia y se descartan si el foco cambia antes.
+
+	Durante la lectura continua (verbalizar todo) se traducen también las líneas siguientes del
+	documento mientras se habla la actual, para que la lectura traducida no se detenga entre líneas.
+
+	En las páginas web en modo exploración y en los campos de edición grandes se traduce el documento
+	desde el cursor hacia fuera, con un presupuesto de líneas, para que leerlo línea a línea no
+	tenga que esperar al servicio.
+	"""
+	# Lotes por segundo que se pueden enviar al servicio
+	tasa = 1.0
+	# Lotes que se pueden enviar seguidos antes de aplicar el límite
+	rafaga = 2
+	# Milisegundos que se espera tras un cambio de foco antes de leer los vecinos
+	pausa_enfoque = 150
+	# Objetos vecinos que se visitan como máximo por cada cambio de foco
+	max_visitas = 40
+	# Líneas del documento que se leen en cada paso
+	bloque_documento = 30
+	# Milisegundos entre pasos de lectura del documento
+	pausa_documento = 250
+	# Milisegundos que puede ocupar en el hilo principal cada lectura de fragmentos de la lectura continua
+	tiempo_lectura = 30
+
+	def __init__(self, frame):
+		"""
+		Inicializa el gestor.
+
+		:param frame: El marco principal de la aplicación.
+		"""
+		self.frame = frame
+		self._turno = 0
+		self._parada = threading.Event()
+		self._limitador = LimitadorTasa(self.tasa, self.rafaga)
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TranslateAdvancedPrecarga")
+		# Estado de la lectura continua: lector activo, posición hasta la que se ha adelantado y líneas sin leer
+		self._lector = None
+		self._fin_lectura = None
+		self._restantes = 0
+		self._turno_lectura = 0
+		self._lectura_programada = False
+		# Estado de la traducción del documento enfocado
+		self._documento = None
+		self._turno_documento = 0
+
+	def vigente(self, turno):
+		"""
+		Indica si una precarga sigue correspondiendo al foco actual.
+
+		:param turno: El turno de la precarga.
+		:return: True si el foco no ha cambiado desde entonces.
+		"""
+		return turno == self._turno and not self._parada.is_set()
+
+	def enfoque(self, obj):
+		"""
+		Programa la traducción de los vecinos del objeto que recibe el foco.
+
+		La lectura de los vecinos se aplaza para no retrasar el anuncio del foco y se descarta si el
+		foco cambia antes, como al recorrer una lista con las flechas.
+
+		:param obj: El objeto que recibe el foco.
+		"""
+		self._turno += 1
+		ajustes = self.frame.gestor_settings
+		if not (ajustes.chkPrecarga and ajustes.chkCache and ajustes._enableTranslation):
+			return
+		core.callLater(self.pausa_enfoque, self._leer_vecinos, self._turno, obj)
+
+	def _leer_vecinos(self, turno, obj):
+		"""
+		Lee los vecinos del objeto enfocado y los envía a traducir si el foco no ha cambiado.
+
+		Se ejecuta en el hilo principal de NVDA, porque lee las propiedades de los objetos.
+
+		:param turno: El turno de la precarga.
+		:param obj: El objeto enfocado.
+		"""
+		if not self.vigente(turno):
+			return
+		try:
+			if obj.role not in _ROLES_ELEMENTO:
+				return
+		except Exception:
+			return
+		textos = self.vecinos(obj, self.frame.gestor_settings.precargaMaxElementos)
+		if textos and self.vigente(turno):
+			self._executor.submit(self._traducir, turno, self.frame.gestor_translate.get_particion(obj), textos)
+
+	def vecinos(self, obj, limite):
+		"""
+		Obtiene los nombres del padre y de los elementos anteriores y siguientes de un objeto.
+
+		Los vecinos se recorren alternando hacia delante y hacia atrás, empezando por los más cercanos.
+		Solo se toman los vecinos con rol de elemento y se visitan como mucho max_visitas objetos.
+
+		:param obj: El objeto enfocado.
+		:param limite: Número máximo de nombres.
+		:return: Lista de nombres sin repetir.
+		"""
+		nombres = []
+		def anadir(objeto, filtrar=True):
+			try:
+				if filtrar and objeto.role not in _ROLES_ELEMENTO:
+					return
+				nombre = objeto.name
+			except Exception:
+				return
+			if nombre and nombre.strip() and nombre not in nombres:
+				nombres.append(nombre)
+		try:
+			if obj.parent is not None:
+				anadir(obj.parent, filtrar=False)
+			siguiente = obj.next
+			anterior = obj.previous
+			visitas = 0
+			while len(nombres) < limite and visitas < self.max_visitas and (siguiente is not None or anterior is not None):
+				if siguiente is not None:
+					anadir(siguiente)
+					siguiente = siguiente.next
+					visitas += 1
+				if anterior is not None and len(nombres) < limite:
+					anadir(anterior)
+					anterior = anterior.previous
+					visitas += 1
+		except Exception as e:
+			logHandler.log.debug(_("Error al leer los elementos vecinos: {}").format(str(e)))
+		return nombres[:limite]
+
+	def lectura(self):
+		"""
+		Adelanta la traducción de los siguientes fragmentos si NVDA está leyendo de forma continua.
+
+		Se llama desde el método speak en el hilo principal de NVDA por cada secuencia verbalizada, así
+		que aquí solo se lleva la cuenta. Cuando quedan pocos fragmentos traducidos por delante se
+		programa la lectura del siguiente bloque para después de verbalizar la secuencia.
+		"""
+		ajustes = self.frame.gestor_settings
+		if not (ajustes.chkPrecargaLectura and ajustes.chkCache):
+			return
+		# _getActiveSayAll es interno de NVDA; si no existe no se adelanta la lectura
+		obtener = getattr(SayAllHandler, "_getActiveSayAll", None)
+		try:
+			lector = obtener() if obtener is not None else None
+		except Exception:
+			lector = None
+		textInfo = getattr(lector, "reader", None)
+		if textInfo is None:
+			if self._lector is not None:
+				self._lector = None
+				self._fin_lectura = None
+				self._turno_lectura += 1
+			return
+		if lector is not self._lector:
+			# Ha empezado una lectura nueva; se adelanta desde la posición del lector
+			self._lector = lector
+			self._fin_lectura = textInfo.copy()
+			self._restantes = 0
+			self._turno_lectura += 1
+		self._restantes -= 1
+		if self._restantes > ajustes.precargaLineas // 2 or self._lectura_programada:
+			return
+		self._lectura_programada = True
+		core.callLater(0, self._leer_lectura, self._turno_lectura)
+
+	def _leer_lectura(self, turno):
+		"""
+		Lee el siguiente bloque de la lectura continua y lo envía a traducir si la lectura sigue activa.
+
+		Se ejecuta en el hilo principal de NVDA, fuera del método speak, y dedica a recorrer el
+		documento como mucho tiempo_lectura milisegundos; lo que no dé tiempo a leer se lee en la
+		siguiente llamada.
+
+		:param turno: El turno de la lectura continua.
+		"""
+		self._lectura_programada = False
+		if turno != self._turno_lectura or self._parada.is_set() or self._fin_lectura is None:
+			return
+		fragmentos = self.fragmentos(self._fin_lectura, self.frame.gestor_settings.precargaLineas, unidad=textInfos.UNIT_READINGCHUNK, tiempo=self.tiempo_lectura)
+		self._restantes += len(fragmentos)
+		textos = self.textos_habla(fragmentos, textInfos.UNIT_READINGCHUNK, lectura=True)
+		if textos:
+			self._executor.submit(self._traducir_lectura, turno, self.frame.gestor_translate.get_particion(), textos)
+
+	def fragmentos(self, posicion, limite, direccion=1, unidad=textInfos.UNIT_LINE, tiempo=None):
+		"""
+		Obtiene los fragmentos de texto contiguos a una posición y mueve la posición tras ellos.
+
+		:param posicion: TextInfo con la posición de inicio. Hacia delante se lee desde el fragmento de la posición
+			y queda al inicio del primer fragmento no leído; hacia atrás se lee desde el fragmento anterior y queda
+			al inicio del último fragmento leído.
+		:param limite: Número máximo de fragmentos.
+		:param direccion: 1 para leer hacia delante, -1 para leer hacia atrás.
+		:param unidad: Unidad de texto de los fragmentos (por defecto líneas).
+		:param tiempo: Milisegundos máximos de lectura (opcional). Por defecto sin límite.
+		:return: Lista de TextInfo de los fragmentos no vacíos.
+		"""
+		fragmentos = []
+		final = None if tiempo is None else time.monotonic() + tiempo / 1000
+		try:
+			posicion.collapse()
+			for i in range(limite):
+				if final is not None and time.monotonic() > final:
+					break
+				if direccion < 0 and not posicion.move(unidad, -1):
+					break
+				fragmento = posicion.copy()
+				fragmento.expand(unidad)
+				if fragmento.text.strip():
+					fragmentos.append(fragmento)
+				if direccion > 0 and not posicion.move(unidad, 1):
+					break
+		except Exception as e:
+			logHandler.log.debug(_("Error al leer las líneas del documento: {}").format(str(e)))
+		return fragmentos
+
+	def textos_habla(self, fragmentos, unidad, lectura=False):
+		"""
+		Obtiene las cadenas que recibirá la voz al leer unos fragmentos de texto.
+
+		Las claves de la caché son las cadenas que llegan al método speak, así que se genera la secuencia
+		de habla de cada fragmento como al leerlo y se procesa como hace speech.speak (diccionarios,
+		símbolos y separador de fragmentos). En la lectura continua NVDA además junta y parte el texto por
+		frases, así que se pasa por el mismo proceso. Si la versión de NVDA no ofrece estas funciones se
+		usa el texto de cada fragmento.
+
+		:param fragmentos: Lista de TextInfo de los fragmentos.
+		:param unidad: Unidad de texto de los fragmentos.
+		:param lectura: True si los fragmentos se van a leer en la lectura continua.
+		:return: Lista de cadenas tal como las recibirá el método speak.
+		"""
+		limpiar = self.frame.gestor_translate.remove_surrogates
+		if getTextInfoSpeech is not None:
+			textos = []
+			try:
+				idioma = getCurrentLanguage()
+				nivel = config.conf["speech"]["symbolLevel"]
+				def recoger(secuencia, *args, **kwargs):
+					for item in secuencia:
+						if isinstance(item, str):
+							textos.append(limpiar(processText(idioma, item, nivel) + CHUNK_SEPARATOR))
+				razon = controlTypes.OutputReason.SAYALL if lectura else controlTypes.OutputReason.CARET
+				sin_pausas = SpeechWithoutPauses(speakFunc=recoger) if lectura else None
+				for fragmento in fragmentos:
+					secuencia = [item for parte in getTextInfoSpeech(fragmento, useCache=False, unit=unidad, reason=razon) for item in parte]
+					if sin_pausas is not None:
+						sin_pausas.speakWithoutPauses(secuencia)
+					else:
+						recoger(secuencia)
+				if sin_pausas is not None:
+					sin_pausas.speakWithoutPauses(None)
+				return [texto for texto in textos if texto.strip()]
+			except Exception as e:
+				logHandler.log.debug(_("Error al preparar el texto del documento: {}").format(str(e)))
+		return [limpiar(fragmento.text) for fragmento in fragmentos]
+
+	def documento(self, obj):
+		"""
+		Empieza a traducir en segundo plano el documento del objeto enfocado, desde el cursor hacia fuera.
+
+		Sirve para los documentos en modo exploración y los campos de edición de varias líneas. Si el foco
+		se mueve dentro del mismo documento la traducción continúa; si cambia de documento vuelve a empezar.
+		Debe llamarse desde el hilo principal de NVDA.
+
+		:param obj: El objeto que recibe el foco.
+		"""
+		ajustes = self.frame.gestor_settings
+		if not (ajustes.chkPrecargaDocumento and ajustes.chkCache and ajustes._enableTranslation):
+			self._documento = None
+			self._turno_documento += 1
+			return
+		fuente = getattr(obj, "treeInterceptor", None)
+		if not isinstance(fuente, browseMode.BrowseModeDocumentTreeInterceptor) or fuente.passThrough:
+			estados = getattr(obj, "states", ())
+			fuente = obj if controlTypes.State.EDITABLE in estados and controlTypes.State.MULTILINE in estados else None
+		if fuente is self._documento:
+			return
+		self._documento = fuente
+		self._turno_documento += 1
+		if fuente is None:
+			return
+		try:
+			posicion = fuente.makeTextInfo(textInfos.POSITION_CARET)
+		except Exception:
+			try:
+				posicion = fuente.makeTextInfo(textInfos.POSITION_FIRST)
+			except Exception as e:
+				logHandler.log.debug(_("Error al leer las líneas del documento: {}").format(str(e)))
+				return
+		posicion.expand(textInfos.UNIT_LINE)
+		posicion.collapse()
+		estado = {
+			"adelante": posicion,
+			"atras": posicion.copy(),
+			"restantes": ajustes.precargaDocumentoLineas,
+			"particion": self.frame.gestor_translate.get_particion(obj),
+		}
+		core.callLater(0, self._paso_documento, self._turno_documento, estado)
+
+	def reiniciar_documento(self):
+		"""
+		Vuelve a empezar la traducción del documento enfocado, por ejemplo cuando termina de cargarse.
+
+		Se espera un momento para que NVDA prepare el modo exploración del documento nuevo.
+		"""
+		def reiniciar():
+			self._documento = None
+			self.documento(api.getFocusObject())
+		core.callLater(self.pausa_documento, reiniciar)
+
+	def _paso_documento(self, turno, estado):
+		"""
+		Lee un bloque de líneas alrededor del cursor y lo envía a traducir.
+
+		Se ejecuta en el hilo principal en pasos pequeños para no bloquear NVDA. Se leen dos líneas por
+		delante del cursor por cada una por detrás, hasta agotar el presupuesto de líneas.
+
+		:param turno: El turno del documento.
+		:param estado: Diccionario con las posiciones, el presupuesto restante y la partición.
+		"""
+		if turno != self._turno_documento or self._parada.is_set():
+			return
+		bloque = min(self.bloque_documento, estado["restantes"])
+		delante = (bloque * 2 + 2) // 3
+		fragmentos = self.fragmentos(estado["adelante"], delante)
+		fragmentos += self.fragmentos(estado["atras"], bloque - delante, -1)
+		textos = self.textos_habla(fragmentos, textInfos.UNIT_LINE)
+		estado["restantes"] -= bloque
+		if textos:
+			self._executor.submit(self._traducir_documento, turno, estado["particion"], textos)
+		if fragmentos and estado["restantes"] > 0:
+			core.callLater(self.pausa_documento, self._paso_documento, turno, estado)
+
+	def _traducir_documento(self, turno, particion, textos):
+		"""
+		Traduce a la caché un bloque de líneas si el documento sigue enfocado.
+
+		:param turno: El turno del documento.
+		:param particion: La partición de la caché de la aplicación enfocada.
+		:param textos: Las líneas a traducir.
+		"""
+		if turno != self._turno_documento or not self._limitador.adquirir(self._parada) or turno != self._turno_documento:
+			return
+		try:
+			self.frame.gestor_translate.translate_lote(textos, particion)
+		except Exception as e:
+			logHandler.log.error(_("Error en la traducción anticipada: {}").format(str(e)))
+
+	def _traducir_lectura(self, turno, particion, textos):
+		"""
+		Traduce a la caché un bloque de líneas si la lectura continua sigue activa.
+
+		:param turno: El turno de la lectura continua.
+		:param particion: La partición de la caché de la aplicación enfocada.
+		:param textos: Las líneas a traducir.
+		"""
+		if turno != self._turno_lectura or self._parada.is_set():
+			return
+		try:
+			self.frame.gestor_translate.translate_lote(textos, particion)
+		except Exception as e:
+			logHandler.log.error(_("Error en la traducción anticipada: {}").format(str(e)))
+
+	def _traducir(self, turno, particion, textos):
+		"""
+		Traduce un lote de textos a la caché si el foco no ha cambiado.
+
+		:param turno: El turno de la precarga.
+		:param particion: La partición de la caché de la aplicación enfocada.
+		:param textos: Los textos a traducir.
+		"""
+		if not self.vigente(turno) or not self._limitador.adquirir(self._parada) or not self.vigente(turno):
+			return
+		try:
+			self.frame.gestor_translate.translate_lote(textos, particion)
+		except Exception as e:
+			logHandler.log.error(_("Error en la traducción anticipada: {}").format(str(e)))
+
+	def terminar(self):
+		"""
+		Detiene las precargas pendientes.
+		"""
+		self._parada.set()
+		self._executor.shutdown(wait=False, cancel_futures=True)
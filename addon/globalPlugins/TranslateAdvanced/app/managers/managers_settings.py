@@ -13,6 +13,8 @@ import os
 import shutil
 import json
 from collections import deque
+# Carga personal
+from .managers_cache import CacheTraducciones
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -43,13 +45,14 @@ class GestorSettings:
 
 		self.historialOrigen = deque(maxlen=500)
 		self.historialDestino = deque(maxlen=500)
-		self._translationCache = {}
+		self._translationCache = None
 
 		self.IS_WinON = False
 		self.is_active_translate = False
 		self._enableTranslation = False
 		self._nvdaSpeak = None
 		self._nvdaGetPropertiesSpeech = None
+		self._nvdaCancel = None
 		self._lastTranslatedText = None
 		self.ultimo_texto = None
 		# Configuración a guardar
@@ -73,6 +76,24 @@ class GestorSettings:
 		self.api_libretranslate_url = None
 		self.api_openai = None
 		self.chkSound = True
+		self.chkAsync = None
+		self.asyncLatencia = None
+		self.rafagaVentana = None
+		self.rafagaMaxLatencia = None
+		self.chkPrecarga = None
+		self.precargaMaxElementos = None
+		self.chkPrecargaLectura = None
+		self.precargaLineas = None
+		self.chkPrecargaDocumento = None
+		self.precargaDocumentoLineas = None
+		self.chkTerminal = None
+		self.chkContexto = None
+		self.chkRespaldo = None
+		self.serviciosRespaldo = None
+		self.filtroVoz = None
+		self.cacheMaxEntradas = None
+		self.cacheMaxMB = None
+		self.cacheTTLIdentidad = None
 		self.snd_vol = None
 		self.snd_vel = None
 		self.snd_rw = None
@@ -147,6 +168,7 @@ class GestorSettings:
 		}
 		self.initConfiguration()
 		self.setup()
+		self._translationCache = CacheTraducciones(self.cacheMaxEntradas, self.cacheMaxMB * 1024 * 1024, self.cacheTTLIdentidad * 3600)
 
 	def initConfiguration(self):
 		"""
@@ -176,6 +198,24 @@ class GestorSettings:
 			"snd_vel": "integer(default=2, min=0, max=6)",
 			"snd_rw": "integer(default=1, min=0, max=5)",
 			"snd_ff": "integer(default=2, min=0, max=5)",
+			"chkAsync": "boolean(default=False)",
+			"asyncLatencia": "integer(default=1500, min=100, max=10000)",
+			"rafagaVentana": "integer(default=150, min=0, max=2000)",
+			"rafagaMaxLatencia": "integer(default=500, min=0, max=5000)",
+			"chkPrecarga": "boolean(default=False)",
+			"precargaMaxElementos": "integer(default=20, min=1, max=200)",
+			"chkPrecargaLectura": "boolean(default=False)",
+			"precargaLineas": "integer(default=10, min=2, max=100)",
+			"chkPrecargaDocumento": "boolean(default=False)",
+			"precargaDocumentoLineas": "integer(default=300, min=10, max=5000)",
+			"chkTerminal": "boolean(default=True)",
+			"chkContexto": "boolean(default=False)",
+			"chkRespaldo": "boolean(default=False)",
+			"serviciosRespaldo": "int_list(default=list(2, 7, 8, 6))",
+			"filtroVoz": "string_list(default=list('caracteres', 'puntuacion', 'numeros', 'urls', 'rutas'))",
+			"cacheMaxEntradas": "integer(default=20000, min=100, max=1000000)",
+			"cacheMaxMB": "integer(default=16, min=1, max=512)",
+			"cacheTTLIdentidad": "integer(default=24, min=0, max=720)",
 		}
 		config.conf.spec['TranslateAdvanced'] = confspec
 
@@ -227,6 +267,24 @@ class GestorSettings:
 		self.snd_vel = self.getConfig("snd_vel")
 		self.snd_rw = self.getConfig("snd_rw")
 		self.snd_ff = self.getConfig("snd_ff")
+		self.chkAsync = self.getConfig("chkAsync")
+		self.asyncLatencia = self.getConfig("asyncLatencia")
+		self.rafagaVentana = self.getConfig("rafagaVentana")
+		self.rafagaMaxLatencia = self.getConfig("rafagaMaxLatencia")
+		self.chkPrecarga = self.getConfig("chkPrecarga")
+		self.precargaMaxElementos = self.getConfig("precargaMaxElementos")
+		self.chkPrecargaLectura = self.getConfig("chkPrecargaLectura")
+		self.precargaLineas = self.getConfig("precargaLineas")
+		self.chkPrecargaDocumento = self.getConfig("chkPrecargaDocumento")
+		self.precargaDocumentoLineas = self.getConfig("precargaDocumentoLineas")
+		self.chkTerminal = self.getConfig("chkTerminal")
+		self.chkContexto = self.getConfig("chkContexto")
+		self.chkRespaldo = self.getConfig("chkRespaldo")
+		self.serviciosRespaldo = self.getConfig("serviciosRespaldo")
+		self.filtroVoz = self.getConfig("filtroVoz")
+		self.cacheMaxEntradas = self.getConfig("cacheMaxEntradas")
+		self.cacheMaxMB = self.getConfig("cacheMaxMB")
+		self.cacheTTLIdentidad = self.getConfig("cacheTTLIdentidad")
 
 	def guardaConfiguracion(self):
 		"""
@@ -255,6 +313,24 @@ class GestorSettings:
 		self.setConfig("snd_vel", self.snd_vel)
 		self.setConfig("snd_rw", self.snd_rw)
 		self.setConfig("snd_ff", self.snd_ff)
+		self.setConfig("chkAsync", self.chkAsync)
+		self.setConfig("asyncLatencia", self.asyncLatencia)
+		self.setConfig("rafagaVentana", self.rafagaVentana)
+		self.setConfig("rafagaMaxLatencia", self.rafagaMaxLatencia)
+		self.setConfig("chkPrecarga", self.chkPrecarga)
+		self.setConfig("precargaMaxElementos", self.precargaMaxElementos)
+		self.setConfig("chkPrecargaLectura", self.chkPrecargaLectura)
+		self.setConfig("precargaLineas", self.precargaLineas)
+		self.setConfig("chkPrecargaDocumento", self.chkPrecargaDocumento)
+		self.setConfig("precargaDocumentoLineas", self.precargaDocumentoLineas)
+		self.setConfig("chkTerminal", self.chkTerminal)
+		self.setConfig("chkContexto", self.chkContexto)
+		self.setConfig("chkRespaldo", self.chkRespaldo)
+		self.setConfig("serviciosRespaldo", self.serviciosRespaldo)
+		self.setConfig("filtroVoz", self.filtroVoz)
+		self.setConfig("cacheMaxEntradas", self.cacheMaxEntradas)
+		self.setConfig("cacheMaxMB", self.cacheMaxMB)
+		self.setConfig("cacheTTLIdentidad", self.cacheTTLIdentidad)
 
 	def obtenerLenguaje(self):
 		"""
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga NVDA
+import addonHandler
+import logHandler
+import queueHandler
+# Carga Python
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+# Carga personal
+from ..utils.utils_plantillas import enmascarar
+from ..utils.utils_http import PeticionAbandonada
+
+# Carga traducción
+addonHandler.initTranslation()
+
+class GestorVozAsincrona:
+	"""
+	Clase que traduce las secuencias de habla en segundo plano para no bloquear el gestor de voz de NVDA.
+
+	El método speak de GestorTranslate entrega aquí la secuencia y vuelve inmediatamente.
+	Un hilo trabajador traduce la secuencia y la verbaliza cuando está lista. Si la traducción
+	supera el presupuesto de latencia configurado se verbaliza el texto original y la traducción
+	continúa en segundo plano para quedar guardada en la caché.
+
+	Cada secuencia lleva el número de generación de la voz. Cuando NVDA cancela la voz (por ejemplo
+	al pulsar una tecla) la generación avanza: las secuencias anteriores que esperan en la cola se
+	descartan y las que se están traduciendo ya no se verbalizan. Sus peticiones que ya están en
+	curso terminan y llenan la caché, pero las que aún no han empezado se abandonan antes de ocupar
+	una conexión o una ficha del limitador, para que no hagan esperar a la voz actual.
+
+	Las ráfagas de anuncios repetidos (barras de progreso, regiones vivas, terminales) se agrupan:
+	si llega una secuencia con la misma prioridad y la misma estructura (el mismo texto salvo los
+	números) que otra reciente, se espera un momento a las siguientes y solo se traduce la última.
+	"""
+	def __init__(self, frame):
+		"""
+		Inicializa el gestor y arranca el hilo trabajador.
+
+		:param frame: El marco principal de la aplicación.
+		"""
+		self.frame = frame
+		self._cola = queue.Queue()
+		self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="TranslateAdvancedVoz")
+		self._lock = threading.Lock()
+		self.generacion = 0
+		self._aviso_cancelacion = Future()
+		# Momento de llegada de la última secuencia de cada estructura, para detectar ráfagas
+		self._vistos = {}
+		self._hilo = threading.Thread(target=self._procesar, daemon=True)
+		self._hilo.start()
+
+	def encolar(self, speechSequence, priority):
+		"""
+		Añade una secuencia de habla a la cola de traducción.
+
+		:param speechSequence: La secuencia de habla a traducir.
+		:param priority: La prioridad de la secuencia de habla.
+		"""
+		secuencia = list(speechSequence)
+		clave = (priority, enmascarar("\n".join(item for item in secuencia if isinstance(item, str)))[0])
+		ahora = time.monotonic()
+		anterior = self._vistos.get(clave)
+		rafaga = anterior is not None and ahora - anterior < self.frame.gestor_settings.rafagaVentana / 1000
+		if len(self._vistos) > 256:
+			self._vistos.clear()
+		self._vistos[clave] = ahora
+		self._cola.put((secuencia, priority, self.generacion, clave, rafaga))
+
+	def cancelar(self):
+		"""
+		Sustituye a la cancelación de la voz de NVDA.
+
+		Avanza la generación para que no se verbalice nada de lo pedido antes, vacía la cola de
+		secuencias pendientes y llama a la cancelación original de NVDA.
+		"""
+		with self._lock:
+			self.generacion += 1
+			aviso, self._aviso_cancelacion = self._aviso_cancelacion, Future()
+		aviso.set_result(None)
+		try:
+			while True:
+				elemento = self._cola.get_nowait()
+				if elemento is None:
+					# La orden de terminar no se puede descartar
+					self._cola.put(None)
+					break
+		except queue.Empty:
+			pass
+		self.frame.gestor_settings._nvdaCancel()
+
+	def vigente(self, generacion):
+		"""
+		Indica si una secuencia pertenece a la generación actual de la voz.
+
+		:param generacion: La generación de la secuencia.
+		:return: True si no se ha cancelado la voz desde entonces.
+		"""
+		return generacion == self.generacion
+
+	def _procesar(self):
+		"""
+		Bucle del hilo trabajador. Atiende las secuencias en el orden en que llegan.
+		"""
+		while True:
+			elemento = self._cola.get()
+			if elemento is None:
+				break
+			lote, terminar = self._agrupar(elemento)
+			elementos = [elemento for elemento in lote if self.vigente(elemento[2])]
+			if elementos:
+				try:
+					self._atender(elementos)
+				except PeticionAbandonada:
+					# La voz se ha cancelado mientras se recogía la traducción; no hay nada que verbalizar
+					pass
+				except Exception as e:
+					logHandler.log.error(_("Error en la traducción asíncrona: {}").format(str(e)))
+					for secuencia, prioridad, generacion, clave, rafaga in elementos:
+						self._entregar(secuencia, prioridad, generacion)
+			if terminar:
+				break
+
+	def _agrupar(self, elemento):
+		"""
+		Reúne las secuencias que llegan seguidas y de las ráfagas deja solo la última de cada estructura.
+
+		Las secuencias que ya están en la cola se recogen siempre. Si alguna forma parte de una ráfaga
+		se esperan más durante la ventana configurada, sin superar la latencia máxima desde la primera.
+		Solo se descartan secuencias anteriores cuando la nueva forma parte de una ráfaga; las demás se
+		conservan todas y en orden, aunque solo se diferencien en los números.
+
+		:param elemento: La primera secuencia recibida.
+		:return: Tupla con la lista ordenada de secuencias y si hay que terminar.
+		"""
+		ajustes = self.frame.gestor_settings
+		lote = [elemento]
+		rafaga = elemento[4]
+		limite = time.monotonic() + ajustes.rafagaMaxLatencia / 1000
+		while True:
+			espera = min(ajustes.rafagaVentana / 1000, limite - time.monotonic()) if rafaga else 0
+			try:
+				elemento = self._cola.get(timeout=espera) if espera > 0 else self._cola.get_nowait()
+			except queue.Empty:
+				return lote, False
+			if elemento is None:
+				return lote, True
+			if elemento[4]:
+				# En una ráfaga la secuencia más reciente sustituye a las anteriores de la misma estructura
+				lote = [anterior for anterior in lote if anterior[3] != elemento[3]]
+			lote.append(elemento)
+			rafaga = rafaga or elemento[4]
+
+	def _atender(self, elementos):
+		"""
+		Traduce en una sola petición las secuencias reunidas respetando el presupuesto de latencia.
+
+		:param elementos: Lista de tuplas (secuencia, prioridad, generación, estructura, ráfaga).
+		"""
+		aviso = self._aviso_cancelacion
+		# Todas las secuencias del lote son de la generación actual al empezar
+		generacion = elementos[-1][2]
+		futuro = self._executor.submit(
+			self.frame.gestor_translate.traducir_secuencias,
+			[elemento[0] for elemento in elementos],
+			lambda: self.vigente(generacion)
+		)
+		presupuesto = self.frame.gestor_settings.asyncLatencia / 1000
+		wait([futuro, aviso], timeout=presupuesto, return_when=FIRST_COMPLETED)
+		if not any(self.vigente(elemento[2]) for elemento in elementos):
+			# La voz se ha cancelado; si la traducción ya ha empezado abandona las peticiones que le quedan
+			futuro.cancel()
+			return
+		if not futuro.done():
+			# Se verbalizan los originales; la traducción sigue en curso y llenará la caché
+			for secuencia, prioridad, generacion, clave, rafaga in elementos:
+				self._entregar(secuencia, prioridad, generacion)
+			return
+		for (secuencia, prioridad, generacion, clave, rafaga), (nueva, origen, destino) in zip(elementos, futuro.result()):
+			self._entregar(nueva, prioridad, generacion, origen, destino)
+
+	def _entregar(self, secuencia, prioridad, generacion, origen=None, destino=None):
+		"""
+		Verbaliza la secuencia y registra el historial en el hilo principal de NVDA.
+
+		No se verbaliza nada si la voz se ha cancelado después de pedir la secuencia.
+
+		:param secuencia: La secuencia de habla a verbalizar.
+		:param prioridad: La prioridad de la secuencia de habla.
+		:param generacion: La generación de la voz de la secuencia.
+		:param origen: Lista de textos originales (opcional).
+		:param destino: Lista de textos traducidos (opcional).
+		"""
+		def entregar():
+			if not self.vigente(generacion):
+				return
+			self.frame.gestor_settings._nvdaSpeak(speechSequence=secuencia, priority=prioridad)
+			if origen is not None:
+				self.frame.gestor_translate.registrar_historial(origen, destino)
+		queueHandler.queueFunction(queueHandler.eventQueue, entregar)
+
+	def terminar(self):
+		"""
+		Detiene el hilo trabajador y libera los hilos de traducción.
+		"""
+		self._cola.put(None)
+		self._executor.shutdown(wait=False)
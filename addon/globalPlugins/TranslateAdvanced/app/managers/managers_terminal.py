@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga NVDA
+import addonHandler
+import controlTypes
+from NVDAObjects.behaviors import Terminal
+# Carga Python
+import threading
+from collections import OrderedDict
+
+# Carga traducción
+addonHandler.initTranslation()
+
+class GestorTerminal:
+	"""
+	Clase que mantiene, para cada ventana de terminal, un índice de las líneas ya traducidas.
+
+	Las terminales vuelven a verbalizar líneas que ya se han oído cuando redibujan la salida. El
+	índice guarda las últimas líneas de cada ventana con su traducción sin pasar por la política
+	de admisión de la caché, así solo se envían al servicio las líneas nuevas.
+	"""
+	# Líneas que se recuerdan por ventana
+	max_lineas = 2000
+	# Ventanas de terminal que se recuerdan a la vez
+	max_ventanas = 8
+
+	def __init__(self, frame):
+		"""
+		Inicializa el gestor.
+
+		:param frame: El marco principal de la aplicación.
+		"""
+		self.frame = frame
+		self.ventana = None
+		self._ventanas = OrderedDict()
+		self._lock = threading.Lock()
+
+	def es_terminal(self, obj):
+		"""
+		Indica si un objeto es una terminal o consola.
+
+		:param obj: El objeto a comprobar.
+		:return: True si es una terminal, False en caso contrario.
+		"""
+		try:
+			return isinstance(obj, Terminal) or obj.role == controlTypes.Role.TERMINAL
+		except Exception:
+			return False
+
+	def enfoque(self, obj):
+		"""
+		Actualiza la ventana de terminal activa cuando cambia el foco.
+
+		Debe llamarse desde el hilo principal de NVDA, porque lee las propiedades del objeto.
+
+		:param obj: El objeto que recibe el foco.
+		"""
+		if self.frame.gestor_settings.chkTerminal and self.es_terminal(obj):
+			self.ventana = obj.windowHandle
+		else:
+			self.ventana = None
+
+	def buscar(self, ventana, texto):
+		"""
+		Busca la traducción de una línea ya vista en una ventana.
+
+		:param ventana: Identificador de la ventana de terminal.
+		:param texto: La línea original.
+		:return: La traducción o None si la línea es nueva.
+		"""
+		with self._lock:
+			lineas = self._ventanas.get(ventana)
+			if lineas is None:
+				return None
+			traduccion = lineas.get(texto)
+			if traduccion is not None:
+				lineas.move_to_end(texto)
+			return traduccion
+
+	def guardar(self, ventana, texto, traduccion):
+		"""
+		Añade una línea traducida al índice de una ventana.
+
+		:param ventana: Identificador de la ventana de terminal.
+		:param texto: La línea original.
+		:param traduccion: La línea traducida.
+		"""
+		with self._lock:
+			lineas = self._ventanas.get(ventana)
+			if lineas is None:
+				lineas = self._ventanas[ventana] = OrderedDict()
+				while len(self._ventanas) > self.max_ventanas:
+					self._ventanas.popitem(last=False)
+			self._ventanas.move_to_end(ventana)
+			lineas[texto] = traduccion
+			lineas.move_to_end(texto)
+			while len(lineas) > self.max_lineas:
+				lineas.popitem(last=False)
+
+	def limpiar(self):
+		"""
+		Vacía los índices de todas las ventanas.
+		"""
+		with self._lock:
+			self._ventanas.clear()
@@ -14,31 +14,25 @@ from speech import *
 # Carga estándar
 import re
 # Carga personal
-from ..src_translations.src_google_original import TranslatorGoogle
-from ..src_translations.src_google_alternative import TranslatorGooglealternative
-from ..src_translations.src_google_api_free import TranslatorGoogleApiFree
-from ..src_translations.src_google_api_free_alternative import TranslatorGoogleApiFreeAlternative
-from ..src_translations.src_deepl_original import TranslatorDeepL
-from ..src_translations.src_libretranslate_original import TranslatorLibreTranslate
-from ..src_translations.src_microsoft_api_free import TranslatorMicrosoftApiFree
-from ..src_translations.src_deepl_free import TranslatorDeepLFree
-from ..src_translations.src_openai_4o_api import TranslatorOpenAI
-from ..src_translations.src_detect import DetectorDeIdioma
 from ..managers.managers_dict import LanguageDictionary
+from ..managers.managers_backends import obtener_servicio, convertir_idioma
+from ..utils.utils_http import PeticionAbandonada, usar_vigencia
+from ..utils.utils_threads import SingleFlight
+from ..utils.utils_filtro import FiltroVoz
+from ..utils.utils_plantillas import enmascarar, derivar_plantilla, rellenar
 
 # Carga traducción
 addonHandler.initTranslation()
 
-class GestorTranslate(
-	TranslatorGoogle, 
-	TranslatorGooglealternative, 
-	TranslatorDeepL,
-	TranslatorLibreTranslate,
-	TranslatorMicrosoftApiFree,
-	TranslatorOpenAI,
-):
+# Separador de los fragmentos de una secuencia traducida con contexto; carácter de uso privado que no aparece en textos reales
+SEPARADOR_CONTEXTO = "\ue002"
+
+class GestorTranslate:
 	"""
 	Clase que gestiona la traducción de texto y el manejo del historial de traducción.
+
+	Los servicios de traducción se obtienen del registro de servicios (managers_backends) por el
+	valor de choiceOnline; cada uno mantiene su propio traductor durante toda la sesión.
 	"""
 	def __init__(self, frame):
 		"""
@@ -46,10 +40,13 @@ class GestorTranslate(
 
 		:param frame: El marco principal de la aplicación.
 		"""
-		super().__init__()
-		TranslatorOpenAI.__init__(self)  # Llama explícitamente al constructor de TranslatorOpenAI
 		self.frame = frame
 		self.data_google = LanguageDictionary(self.frame.gestor_lang.obtener_idiomas("google"))
+		# Registro de peticiones en curso para no repetir traducciones idénticas simultáneas
+		# Si se abandona la llamada de una voz cancelada, las que esperan a su resultado la repiten
+		self._vuelos = SingleFlight(reintentar=(PeticionAbandonada,))
+		# Clasificador de los textos que se devuelven sin traducir
+		self.filtro = FiltroVoz(self.frame.gestor_settings.filtroVoz)
 
 	def remove_surrogates(self, text):
 		"""
@@ -61,67 +58,69 @@ class GestorTranslate(
 		# Eliminar caracteres sustitutos de la cadena
 		return re.sub(r'[\ud800-\udfff]', '', text)
 
-	def get_choice_lang_destino(self):
+	def get_servicio(self):
+		"""
+		Obtiene el servicio de traducción seleccionado.
+
+		:return: La instancia registrada del servicio o None si choiceOnline no es válido.
 		"""
-		Devuelve el contenido de la variable choiceLangDestino correspondiente según el valor de choiceOnline.
+		return obtener_servicio(self.frame.gestor_settings.choiceOnline)
 
+	def get_choice_lang_destino(self, servicio=None):
+		"""
+		Devuelve el contenido de la variable choiceLangDestino correspondiente al servicio.
+
+		:param servicio: El servicio (opcional). Por defecto el seleccionado.
 		Returns:
 			El contenido de la variable choiceLangDestino correspondiente o None si choiceOnline no es válido.
 		"""
-		value = self.frame.gestor_settings.choiceOnline
-		if value in [0, 1, 2, 3]:
-			return self.frame.gestor_settings.choiceLangDestino_google
-		elif value in [4, 5, 8]:
-			return self.frame.gestor_settings.choiceLangDestino_deepl
-		elif value == 6:
-			return self.frame.gestor_settings.choiceLangDestino_libretranslate
-		elif value == 7:
-			return self.frame.gestor_settings.choiceLangDestino_microsoft
+		servicio = servicio or self.get_servicio()
+		if servicio is None:
+			return None
+		return getattr(self.frame.gestor_settings, "choiceLangDestino_" + servicio.ajuste_destino)
+
+	def get_choice_lang_origen(self, servicio=None):
+		"""
+		Devuelve el idioma de origen que se envía al servicio.
+
+		:param servicio: El servicio (opcional). Por defecto el seleccionado.
+		:return: El idioma de origen elegido si el servicio lo usa o "auto" en caso contrario.
+		"""
+		servicio = servicio or self.get_servicio()
+		if servicio is not None and servicio.elige_origen:
+			return self.frame.gestor_settings.choiceLangOrigen
+		return "auto"
+
+	def get_clave_vuelo(self, text):
+		"""
+		Obtiene la clave que identifica una petición de traducción en curso.
+
+		:param text: El texto o la tupla de textos a traducir.
+		:return: Una tupla con el servicio, el idioma de origen, el idioma de destino y el texto.
+		"""
+		return (self.frame.gestor_settings.choiceOnline, self.get_choice_lang_origen(), self.get_choice_lang_destino(), text)
 
-	def get_api(self):
+	def get_api(self, servicio=None):
 		"""
-		Obtiene la clave y, en algunos casos, la URL de la API según la configuración seleccionada.
+		Obtiene la clave y, en algunos casos, la URL de la API del servicio.
 
-		Dependiendo del valor de `choiceOnline` en `gestor_settings`, esta función retorna la clave de 
-		acceso a la API correspondiente y, si aplica, la URL de la API.
+		El servicio declara el tipo de API del gestor de APIs y el ajuste con la clave elegida.
 
+		:param servicio: El servicio (opcional). Por defecto el seleccionado.
 		Returns:
-			tuple: Una tupla que contiene la clave de la API y la URL (si aplica). Si no se encuentra 
-			la configuración de la API correspondiente, retorna (None, None).
-
-		Condiciones:
-			- Si `choiceOnline` es 4, se usa la API gratuita de DeepL.
-				- Si `api_deepl` es None, retorna (None, None).
-				- En caso contrario, retorna la clave de la API y None.
-			- Si `choiceOnline` es 5, se usa la API profesional de DeepL.
-				- Si `api_deepl_pro` es None, retorna (None, None).
-				- En caso contrario, retorna la clave de la API y None.
-			- Si `choiceOnline` es 6, se usa la API de LibreTranslate.
-				- Si `api_libretranslate` es None, retorna (None, None).
-				- En caso contrario, retorna la clave de la API y la URL de la API.
-
-		"""
-		value = self.frame.gestor_settings.choiceOnline
-		if value == 4:
-			if self.frame.gestor_settings.api_deepl is None:
-				return None, None
-			else:
-				return self.frame.gestor_apis.get_api("deepL_free", self.frame.gestor_settings.api_deepl)["key"], None
-		elif value == 5:
-			if self.frame.gestor_settings.api_deepl_pro is None:
-				return None, None
-			else:
-				return self.frame.gestor_apis.get_api("deepL_pro", self.frame.gestor_settings.api_deepl_pro)["key"], None
-		elif value == 6:
-			if self.frame.gestor_settings.api_libretranslate is None:
-				return None, None
-			else:
-				return self.frame.gestor_apis.get_api("libre_translate", self.frame.gestor_settings.api_libretranslate)["key"],  self.frame.gestor_apis.get_api("libre_translate", self.frame.gestor_settings.api_libretranslate)["url"]
-		elif value == 9: # OpenAI
-			if self.frame.gestor_settings.api_openai is None:
-				return None, None
-			else:
-				return self.frame.gestor_apis.get_api("openai", self.frame.gestor_settings.api_openai)["key"], None
+			tuple: Una tupla que contiene la clave de la API y la URL (si el servicio la necesita). Si el
+			servicio no usa clave o no se encuentra la configuración de la API, retorna (None, None).
+		"""
+		servicio = servicio or self.get_servicio()
+		if servicio is None or servicio.api is None:
+			return None, None
+		seleccion = getattr(self.frame.gestor_settings, servicio.ajuste_api)
+		if seleccion is None:
+			return None, None
+		datos = self.frame.gestor_apis.get_api(servicio.api, seleccion)
+		if datos is None:
+			return None, None
+		return datos["key"], datos["url"] if servicio.necesita_url else None
 
 	def procesar_listas(self, origen, destino):
 		"""
@@ -185,6 +184,7 @@ class GestorTranslate(
 		Resultado:
 			Muestra un mensaje con el nombre o descripción del idioma detectado, o un mensaje de error si la detección falla.
 		"""
+		from ..src_translations.src_detect import DetectorDeIdioma
 		result = DetectorDeIdioma().detectar_idioma(text)
 		if result["success"]:
 			idiomas_name = self.data_google.get_values()
@@ -218,6 +218,7 @@ class GestorTranslate(
 				- Si el soporte de braille está habilitado, muestra el mensaje del último texto traducido.
 		"""
 		if self.frame.gestor_settings.chkAltLang:
+			from ..src_translations.src_detect import DetectorDeIdioma
 			detector = DetectorDeIdioma()
 			resultado = detector.detectar_idioma(text)
 			if resultado['success']:
@@ -233,25 +234,16 @@ class GestorTranslate(
 			lang_to = self.frame.gestor_settings.choiceLangDestino_google
 
 		prepared = text
-		translated = TranslatorGoogleApiFree().translate_google_api_free(lang_from='auto', lang_to=lang_to, text=prepared)
+		translated = obtener_servicio(2).traductor.translate_google_api_free(lang_from='auto', lang_to=lang_to, text=prepared)
 		if prepared.rstrip() == translated.rstrip():
-			self.frame.gestor_settings._lastTranslatedText = prepared
-			if braille.handler._get_enabled():
-				braille.handler.message(self.frame.gestor_settings._lastTranslatedText)
-			return prepared
+			translated = prepared
 		else:
-			if prepared not in self.frame.gestor_settings.historialOrigen:
-				self.frame.gestor_settings.historialOrigen.appendleft(prepared)
-				self.frame.gestor_settings.historialDestino.appendleft(translated)
-				self.frame.gestor_settings._lastTranslatedText = translated
-				if braille.handler._get_enabled():
-					braille.handler.message(self.frame.gestor_settings._lastTranslatedText)
-				return translated
-			else:
-				self.frame.gestor_settings._lastTranslatedText = translated
-				if braille.handler._get_enabled():
-					braille.handler.message(self.frame.gestor_settings._lastTranslatedText)
-				return translated
+			# El gestor del historial descarta los repetidos y mantiene las dos listas a la par
+			self.frame.gestor_historial.registrar([prepared], [translated], mostrar=False)
+		self.frame.gestor_settings._lastTranslatedText = translated
+		if braille.handler._get_enabled():
+			braille.handler.message(self.frame.gestor_settings._lastTranslatedText)
+		return translated
 
 	def translate_file(self, text, func_progress):
 		"""
@@ -262,100 +254,247 @@ class GestorTranslate(
 		:return: El texto traducido.
 		"""
 		prepared = text
-		translated = TranslatorGoogleApiFree().translate_google_api_free(lang_from='auto', lang_to=self.frame.gestor_settings.choiceLangDestino_google, text=prepared, chunksize=3000, mostrar_progreso=True, widget=func_progress)
+		translated = obtener_servicio(2).traductor.translate_google_api_free(lang_from='auto', lang_to=self.frame.gestor_settings.choiceLangDestino_google, text=prepared, chunksize=3000, mostrar_progreso=True, widget=func_progress)
 		return translated
 
-	def translate(self, text):
+	def get_particion(self, obj=None):
 		"""
-		Traduce un texto dado según la configuración actual.
+		Obtiene la partición de la caché para la aplicación enfocada y el servicio y par de idiomas actuales.
 
-		:param text: El texto a traducir.
-		:return: El texto traducido.
+		:param obj: Objeto de la aplicación (opcional). Por defecto el objeto enfocado.
+		:return: Una tupla con la aplicación, el servicio, el idioma de origen y el idioma de destino.
 		"""
 		try:
-			appName = "{}_{}".format(globalVars.focusObject.appModule.appName, self.get_choice_lang_destino())
+			appName = (obj or globalVars.focusObject).appModule.appName
 		except:
 			appName = "__global__"
+		servicio, origen, destino, text = self.get_clave_vuelo(None)
+		return (appName, servicio, origen, destino)
+
+	def get_cadena(self):
+		"""
+		Obtiene los servicios que se intentan en orden para cada traducción.
 
+		:return: Lista con el servicio seleccionado y, si está activado el respaldo, los servicios de respaldo.
+		"""
+		principal = self.get_servicio()
+		cadena = [principal]
+		if self.frame.gestor_settings.chkRespaldo:
+			for id in self.frame.gestor_settings.serviciosRespaldo:
+				servicio = obtener_servicio(id)
+				if servicio is not None and servicio not in cadena:
+					cadena.append(servicio)
+		return cadena
+
+	def get_idiomas_servicio(self, servicio, principal):
+		"""
+		Obtiene los idiomas que se envían a un servicio de la cadena.
+
+		El servicio seleccionado usa los idiomas configurados. Los de respaldo detectan el idioma de
+		origen y reciben el idioma de destino del seleccionado convertido a sus propios códigos.
+
+		:param servicio: El servicio al que se va a llamar.
+		:param principal: El servicio seleccionado.
+		:return: Tupla (origen, destino) o None si el servicio no admite el idioma de destino.
+		"""
+		if servicio is principal:
+			return self.get_choice_lang_origen(servicio), self.get_choice_lang_destino(servicio)
+		destino = convertir_idioma(self.get_choice_lang_destino(principal), self.frame.gestor_lang.obtener_idiomas(servicio.idiomas))
+		if destino is None:
+			return None
+		# Los servicios que usan un idioma de origen elegido lo detectan si no se indica
+		return (None if servicio.elige_origen else "auto"), destino
+
+	def llamar_cadena(self, metodo, textos, reserva):
+		"""
+		Llama a un método de los servicios de la cadena hasta que uno responda sin errores.
+
+		Se saltan los servicios sin clave configurada, los que no admiten el idioma de destino y los
+		que su interruptor de circuito da por caídos, de modo que un servicio que falla no hace esperar
+		a cada traducción.
+
+		:param metodo: Nombre del método del servicio ("traducir" o "traducir_lote").
+		:param textos: El texto o la lista de textos a traducir.
+		:param reserva: Lo que se devuelve si ningún servicio responde.
+		:return: Tupla con el resultado del primer servicio que responde sin errores y su clave (servicio, origen, destino)
+			para la partición de la caché, o con la reserva y None.
+		:raises PeticionAbandonada: Si el resultado ya no se necesita porque la voz se ha cancelado.
+		"""
+		cadena = self.get_cadena()
+		principal = cadena[0]
+		for servicio in cadena:
+			idiomas = self.get_idiomas_servicio(servicio, principal)
+			if idiomas is None:
+				continue
+			api_key, url = self.get_api(servicio)
+			if servicio.api is not None and (api_key is None or (servicio.necesita_url and url is None)):
+				if servicio is principal and metodo == "traducir":
+					logHandler.log.error(_("No tiene ninguna API configurada para el servicio que tiene seleccionado."))
+				continue
+			if not servicio.circuito.permitir():
+				continue
+			try:
+				resultado, correcto = servicio.llamar(getattr(servicio, metodo), textos, idiomas[0], idiomas[1], api_key, url)
+			except Exception as e:
+				# PeticionAbandonada no se captura aquí: si la voz se ha cancelado no se prueban los de respaldo
+				logHandler.log.error(_("Error en la traducción con {}: {}").format(servicio.nombre, str(e)))
+				continue
+			if correcto:
+				return resultado, servicio.clave_particion(*idiomas)
+		return reserva, None
+
+	def traducir_servicio(self, text):
+		"""
+		Envía un texto al servicio de traducción seleccionado, o a los de respaldo si falla, sin pasar por la caché.
+
+		Los traductores devuelven el texto original cuando fallan, así que el resultado va acompañado
+		de la clave del servicio que ha respondido, o None si ha fallado, para no guardar en la caché un
+		fallo como si fuera una traducción ni mezclar las traducciones de un servicio de respaldo con las
+		del seleccionado.
+
+		:param text: El texto a traducir.
+		:return: Tupla con el texto traducido, o el original si ningún servicio ha respondido, y la clave
+			(servicio, origen, destino) del servicio que lo ha traducido o None.
+		"""
+		return self.llamar_cadena("traducir", text, text)
+
+	def translate_lote_servicio(self, texts):
+		"""
+		Envía varios textos al servicio de traducción seleccionado, o a los de respaldo si falla, en una sola petición.
+
+		Los servicios que admiten varios textos por petición usan su campo nativo. El resto recibe
+		los textos unidos por saltos de línea y la respuesta se vuelve a dividir.
+
+		:param texts: Lista de textos a traducir.
+		:return: Tupla con la lista de textos traducidos, o None si no se ha podido traducir en lote, y la clave
+			(servicio, origen, destino) del servicio que los ha traducido o None.
+		"""
+		return self.llamar_cadena("traducir_lote", texts, None)
+
+	def buscar_cache(self, particion, text):
+		"""
+		Busca la traducción de un texto en la caché.
+
+		Si el texto no está, se busca su plantilla (el texto con los números sustituidos por marcadores)
+		y se rellena con los números del texto.
+
+		:param particion: La partición de la caché.
+		:param text: El texto original.
+		:return: El texto traducido o None si no está en la caché.
+		"""
+		cache = self.frame.gestor_settings._translationCache
+		translated = cache.obtener(particion, text)
+		if translated is None:
+			translated = self.frame._cache.findIdentity(particion, text)
+		if translated is not None:
+			return translated
+		plantilla, valores = enmascarar(text)
+		if not valores:
+			return None
+		translated = cache.obtener(particion, plantilla)
+		if translated is None:
+			translated = self.frame._cache.findIdentity(particion, plantilla)
+		if translated is None:
+			return None
+		return rellenar(translated, valores)
+
+	def guardar_cache(self, particion, text, translated):
+		"""
+		Guarda la traducción de un texto en la caché.
+
+		Si el texto contiene números y la traducción contiene los mismos, se guarda la plantilla en
+		lugar del texto, de modo que "3 de 17" sirve también para "4 de 17" o "12 de 30".
+
+		:param particion: La partición de la caché.
+		:param text: El texto original.
+		:param translated: El texto traducido.
+		"""
+		cache = self.frame.gestor_settings._translationCache
+		plantilla, valores = enmascarar(text)
+		if valores:
+			plantilla_traducida = derivar_plantilla(translated, valores)
+			if plantilla_traducida is not None:
+				cache.guardar(particion, plantilla, plantilla_traducida)
+				return
+		cache.guardar(particion, text, translated)
+
+	def translate_lote(self, texts, particion=None):
+		"""
+		Traduce varios textos usando la caché y una sola petición al servicio para los que no estén en ella.
+
+		:param texts: Lista de textos a traducir.
+		:param particion: Partición de la caché (opcional). Por defecto la de la aplicación enfocada.
+		:return: Lista de textos traducidos en las mismas posiciones que los originales.
+		"""
+		resultados = list(texts)
+		if not self.frame.gestor_settings._enableTranslation:
+			return resultados
+
+		particion = particion or self.get_particion()
+		if self.frame.gestor_settings.chkCache:
+			self.frame._cache.loadPartition(particion)
+		pendientes = []
+		for indice, text in enumerate(texts):
+			if not text.strip() or self.filtro.omitir(text):
+				continue
+			if self.frame.gestor_settings.chkCache:
+				translated = self.buscar_cache(particion, text)
+				if translated is not None:
+					resultados[indice] = translated
+					continue
+			pendientes.append(indice)
+
+		if not pendientes:
+			return resultados
+		if len(pendientes) == 1:
+			resultados[pendientes[0]] = self.translate(texts[pendientes[0]], particion)
+			return resultados
+
+		unicos = list(dict.fromkeys(texts[indice] for indice in pendientes))
+		try:
+			traducidos, clave = self._vuelos.ejecutar(self.get_clave_vuelo(tuple(unicos)), self.translate_lote_servicio, unicos)
+		except Exception as e:
+			logHandler.log.error(_("Error en la traducción en lote: {}").format(str(e)))
+			traducidos, clave = None, None
+
+		if traducidos is None or len(traducidos) != len(unicos):
+			# Si el lote falla se traduce cada texto por separado
+			traducidos = [self.translate(text, particion) for text in unicos]
+		elif clave is not None and self.frame.gestor_settings.chkCache:
+			# Se guarda en la partición del servicio que ha respondido, que puede ser uno de respaldo
+			particion_servicio = particion[:1] + clave
+			for text, translated in zip(unicos, traducidos):
+				if translated:
+					self.guardar_cache(particion_servicio, text, translated)
+
+		mapa = dict(zip(unicos, traducidos))
+		for indice in pendientes:
+			resultados[indice] = mapa[texts[indice]] or texts[indice]
+		return resultados
+
+	def translate(self, text, particion=None):
+		"""
+		Traduce un texto dado según la configuración actual.
+
+		:param text: El texto a traducir.
+		:param particion: Partición de la caché (opcional). Por defecto la de la aplicación enfocada.
+		:return: El texto traducido.
+		"""
 		if not self.frame.gestor_settings._enableTranslation:
 			return text
 
+		if self.filtro.omitir(text):
+			return text
+
+		particion = particion or self.get_particion()
 		if self.frame.gestor_settings.chkCache:
-			appTable = self.frame.gestor_settings._translationCache.get(appName, None)
-			if appTable is None:
-				self.frame.gestor_settings._translationCache[appName] = {}
-			translated = self.frame.gestor_settings._translationCache[appName].get(text, None)
-			if translated and translated != text:
+			self.frame._cache.loadPartition(particion)
+			translated = self.buscar_cache(particion, text)
+			if translated is not None:
 				return translated
 
 		try:
-			if self.frame.gestor_settings._enableTranslation:
-				id = self.frame.gestor_settings.choiceOnline
-				if id == 0: # Google 1
-					prepared = text.encode('utf8')
-					translated = self.translate_google(prepared, to_language=self.frame.gestor_settings.choiceLangDestino_google)
-				elif id == 1: # Google 2
-					prepared = text.encode('utf8')
-					translated = self.translate_google_alternative(prepared, target=self.frame.gestor_settings.choiceLangDestino_google)
-				elif id == 2: # Google 3
-					prepared = text
-					translated = TranslatorGoogleApiFree().translate_google_api_free(lang_from='auto', lang_to=self.frame.gestor_settings.choiceLangDestino_google, text=prepared, chunksize=3000, mostrar_progreso=False)
-				elif id == 3: # Google 4 API con Toquen
-					prepared = text
-					translated = TranslatorGoogleApiFreeAlternative().translate_google_api_free(lang_from='auto', lang_to=self.frame.gestor_settings.choiceLangDestino_google, text=prepared, chunksize=3000, mostrar_progreso=False)
-				elif id == 4: # DeepL Free
-					api_key, url = self.get_api()
-					if api_key is None:
-						logHandler.log.error(_("No tiene ninguna API configurada para el servicio que tiene seleccionado."))
-
-						return text
-					prepared = text.encode('utf8', 'surrogatepass')
-					datos = self.translate_deepl(prepared, api_key, use_free_api=True,  source_lang="auto", target_lang=self.frame.gestor_settings.choiceLangDestino_deepl)
-					if isinstance(datos, bytes):
-						translated =  datos.decode('utf-8', 'surrogatepass')
-					elif isinstance(datos, str):
-						translated = datos
-					else:
-						translated = text
-				elif id == 5: # DeepL Pro
-					api_key, url = self.get_api()
-					if api_key is None:
-						logHandler.log.error(_("No tiene ninguna API configurada para el servicio que tiene seleccionado."))
-						return text
-					prepared = text.encode('utf8', 'surrogatepass')
-					datos = self.translate_deepl(prepared, api_key, use_free_api=False,  source_lang="auto", target_lang=self.frame.gestor_settings.choiceLangDestino_deepl)
-					if isinstance(datos, bytes):
-						translated =  datos.decode('utf-8', 'surrogatepass')
-					elif isinstance(datos, str):
-						translated = datos
-					else:
-						translated = text
-				elif id == 6: # LibreTranslate
-					api_key, url = self.get_api()
-					if api_key is None:
-						logHandler.log.error(_("No tiene ninguna API configurada para el servicio que tiene seleccionado."))
-						return text
-					if url is None:
-						logHandler.log.error(_("No tiene ninguna API configurada para el servicio que tiene seleccionado."))
-						return text
-					prepared = text
-					translated = self.translate_libretranslate(prepared, api_key, source_lang="auto", target_lang=self.frame.gestor_settings.choiceLangDestino_libretranslate, api_url=url)
-				elif id == 7: # Microsoft
-					prepared = text
-					translated = self.translate_microsoft_api_free(self.frame.gestor_settings.choiceLangOrigen, self.frame.gestor_settings.choiceLangDestino_microsoft, prepared)
-				elif id == 8: # DeepL Gratis
-					translator = TranslatorDeepLFree()
-					translator.source_lang = 'auto'
-					translator.target_lang = self.frame.gestor_settings.choiceLangDestino_deepl
-					prepared = text
-					translated = translator.translate(prepared)
-				elif id == 9: # OpenAI
-					api_key, url = self.get_api()
-					if api_key is None:
-						logHandler.log.error(_("No tiene ninguna API configurada para el servicio que tiene seleccionado."))
-						return text
-					prepared = text
-					translated = self.translate_openai(api_key, prepared, target_language=self.frame.gestor_settings.choiceLangDestino_openai)
+			translated, clave = self._vuelos.ejecutar(self.get_clave_vuelo(text), self.traducir_servicio, text)
 		except Exception as e:
 			msg = \
 _("""Error en la traducción.
@@ -368,16 +507,153 @@ Error:
 
 		if not translated:
 			translated = text
-		else:
-			if self.frame.gestor_settings.chkCache:
-				self.frame.gestor_settings._translationCache[appName][text] = translated
+		elif clave is not None and self.frame.gestor_settings.chkCache:
+			# Solo se guarda lo que un servicio ha traducido, en la partición de ese servicio; un fallo no
+			# se guarda como entrada de identidad
+			self.guardar_cache(particion[:1] + clave, text, translated)
 
 		return translated
 
+	def traducir_textos(self, textos):
+		"""
+		Traduce una lista de textos de la voz.
+
+		Si el foco está en una terminal se consulta antes el índice de líneas ya traducidas de su ventana,
+		de modo que al redibujar la salida solo se traducen las líneas nuevas.
+
+		:param textos: Lista de textos a traducir.
+		:return: Lista de textos traducidos en las mismas posiciones que los originales.
+		"""
+		terminal = self.frame.gestor_terminal
+		if terminal is None or terminal.ventana is None or not self.frame.gestor_settings._enableTranslation:
+			return self.translate_lote(textos)
+		# El índice se separa también por servicio e idiomas para no mezclar traducciones
+		ventana = (terminal.ventana, self.get_clave_vuelo(None)[:3])
+
+		resultados = list(textos)
+		pendientes = []
+		for indice, text in enumerate(textos):
+			translated = terminal.buscar(ventana, text)
+			if translated is None:
+				pendientes.append(indice)
+			else:
+				resultados[indice] = translated
+		if pendientes:
+			traducidos = self.translate_lote([textos[indice] for indice in pendientes])
+			for indice, translated in zip(pendientes, traducidos):
+				resultados[indice] = translated
+				if translated and translated != textos[indice]:
+					terminal.guardar(ventana, textos[indice], translated)
+		return resultados
+
+	def traducir_contexto(self, textos):
+		"""
+		Traduce los fragmentos de una secuencia como un solo texto para conservar el contexto.
+
+		Solo los servicios con la capacidad de contexto (Microsoft, que devuelve la longitud de las
+		frases) permiten repartir la traducción entre los fragmentos. El resultado se guarda en la
+		caché como una sola entrada.
+
+		:param textos: Lista de fragmentos de la secuencia.
+		:return: Lista con la traducción de cada fragmento o None si no se puede traducir con contexto.
+		"""
+		servicio = self.get_servicio()
+		if servicio is None or not servicio.contexto:
+			return None
+		particion = self.get_particion()
+		clave = SEPARADOR_CONTEXTO.join(textos)
+		if self.frame.gestor_settings.chkCache:
+			self.frame._cache.loadPartition(particion)
+			translated = self.buscar_cache(particion, clave)
+			if translated is not None and translated.count(SEPARADOR_CONTEXTO) == len(textos) - 1:
+				return translated.split(SEPARADOR_CONTEXTO)
+
+		def llamar_servicio():
+			# Se pide permiso al interruptor justo antes de la llamada, que siempre lo registra o lo libera
+			if not servicio.circuito.permitir():
+				return None, False
+			return servicio.llamar(servicio.traducir_alineado, textos, self.get_choice_lang_origen(servicio), self.get_choice_lang_destino(servicio))
+
+		try:
+			traducidos = self._vuelos.ejecutar(self.get_clave_vuelo(("contexto",) + tuple(textos)), llamar_servicio)
+		except Exception as e:
+			logHandler.log.error(_("Error en la traducción con contexto: {}").format(str(e)))
+			return None
+		traducidos, correcto = traducidos
+		if traducidos is None or not correcto:
+			return None
+		if self.frame.gestor_settings.chkCache:
+			self.guardar_cache(particion, clave, SEPARADOR_CONTEXTO.join(traducidos))
+		return traducidos
+
+	def traducir_secuencias(self, secuencias, vigente=None):
+		"""
+		Traduce las cadenas de varias secuencias de habla en un solo lote manteniendo los comandos en su sitio.
+
+		Con la traducción con contexto activada, las secuencias de varios fragmentos se traducen como
+		un solo texto y el resto va en el lote.
+
+		:param secuencias: Lista de secuencias de habla a traducir.
+		:param vigente: Función opcional que devuelve False cuando la voz se ha cancelado; las peticiones
+			pendientes se abandonan entonces antes de ocupar una conexión o una ficha del limitador.
+		:return: Lista de tuplas con la nueva secuencia, la lista de textos originales y la lista de textos traducidos.
+		:raises PeticionAbandonada: Si la traducción se abandona porque la voz se ha cancelado.
+		"""
+		textos = [[self.remove_surrogates(val) for val in speechSequence if isinstance(val, str)] for speechSequence in secuencias]
+		traducidos = [None] * len(secuencias)
+		with usar_vigencia(vigente):
+			if self.frame.gestor_settings.chkContexto and self.frame.gestor_settings._enableTranslation:
+				for indice, fragmentos in enumerate(textos):
+					utiles = [text for text in fragmentos if text.strip() and not self.filtro.clasificar(text)]
+					if len(utiles) > 1:
+						traducidos[indice] = self.traducir_contexto(fragmentos)
+			pendientes = [indice for indice, valor in enumerate(traducidos) if valor is None]
+			lote = iter(self.traducir_textos([text for indice in pendientes for text in textos[indice]]))
+			for indice in pendientes:
+				traducidos[indice] = [next(lote) for text in textos[indice]]
+
+		resultados = []
+		for speechSequence, traduccion in zip(secuencias, traducidos):
+			traduccion = iter(traduccion)
+			newSpeechSequence = []
+			newSpeechSequenceOrigen = []
+			newSpeechSequenceDestino = []
+			for val in speechSequence:
+				if isinstance(val, str):
+					v = next(traduccion)
+					newSpeechSequence.append(v if v is not None else val)
+					newSpeechSequenceOrigen.append(val)
+					newSpeechSequenceDestino.append(v)
+				else:
+					newSpeechSequence.append(val)
+			resultados.append((newSpeechSequence, newSpeechSequenceOrigen, newSpeechSequenceDestino))
+		return resultados
+
+	def traducir_secuencia(self, speechSequence):
+		"""
+		Traduce las cadenas de una secuencia de habla manteniendo los comandos en su sitio.
+
+		:param speechSequence: La secuencia de habla a traducir.
+		:return: Una tupla con la nueva secuencia, la lista de textos originales y la lista de textos traducidos.
+		"""
+		return self.traducir_secuencias([speechSequence])[0]
+
+	def registrar_historial(self, newSpeechSequenceOrigen, newSpeechSequenceDestino):
+		"""
+		Envía una secuencia traducida al gestor del historial, que la registra en segundo plano.
+
+		:param newSpeechSequenceOrigen: Lista de textos originales de la secuencia.
+		:param newSpeechSequenceDestino: Lista de textos traducidos de la secuencia.
+		"""
+		self.frame.gestor_historial.registrar(newSpeechSequenceOrigen, newSpeechSequenceDestino)
+
 	def speak(self, speechSequence: SpeechSequence, priority: Spri = None):
 		"""
 		Genera una secuencia de habla y la traduce si es necesario.
 
+		Si el modo asíncrono está activado la secuencia se entrega al gestor de voz asíncrona
+		y el método vuelve inmediatamente.
+
 		:param speechSequence: La secuencia de texto a hablar.
 		:param priority: La prioridad de la secuencia de habla (opcional).
 		:return: None
@@ -385,33 +661,16 @@ Error:
 		if not self.frame.gestor_settings._enableTranslation:
 			return self.frame.gestor_settings._nvdaSpeak(speechSequence=speechSequence, priority=priority)
 
-		newSpeechSequence = []
-		newSpeechSequenceOrigen = []
-		newSpeechSequenceDestino = []
-
-		for val in speechSequence:
-			if isinstance(val, str):
-				v = self.translate(self.remove_surrogates(val))
-				newSpeechSequence.append(v if v is not None else val)
-				newSpeechSequenceOrigen.append(val)
-				newSpeechSequenceDestino.append(v)
-			else:
-				newSpeechSequence.append(val)
-
-		self.frame.gestor_settings._nvdaSpeak(speechSequence=newSpeechSequence, priority=priority)
+		if self.frame.gestor_precarga is not None:
+			self.frame.gestor_precarga.lectura()
 
-		listaorigen = [elemento.rstrip() for elemento in newSpeechSequenceOrigen]
-		listadestino = [elemento.rstrip() for elemento in newSpeechSequenceDestino]
-		if listaorigen == listadestino:
+		if self.frame.gestor_settings.chkAsync and self.frame.gestor_voz is not None:
+			self.frame.gestor_voz.encolar(speechSequence, priority)
 			return
 
-		temp = self.procesar_listas(newSpeechSequenceOrigen, newSpeechSequenceDestino)
-		if temp['origen'] not in self.frame.gestor_settings.historialOrigen:
-			self.frame.gestor_settings.historialOrigen.appendleft(temp['origen'])
-			self.frame.gestor_settings.historialDestino.appendleft(temp['destino'])
-			self.frame.gestor_settings._lastTranslatedText = temp['destino']
-			if braille.handler._get_enabled():
-				braille.handler.message(self.frame.gestor_settings._lastTranslatedText)
+		newSpeechSequence, newSpeechSequenceOrigen, newSpeechSequenceDestino = self.traducir_secuencia(speechSequence)
+		self.frame.gestor_settings._nvdaSpeak(speechSequence=newSpeechSequence, priority=priority)
+		self.registrar_historial(newSpeechSequenceOrigen, newSpeechSequenceDestino)
 
 	def mySpeak(self, sequence, *args, **kwargs):
 		self.frame.oldSpeak(sequence, *args, **kwargs)
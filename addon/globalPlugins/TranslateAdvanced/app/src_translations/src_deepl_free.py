@@ -13,6 +13,8 @@ import time
 import random
 import gzip
 from io import BytesIO
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -64,15 +66,20 @@ class TranslatorDeepLFree:
 			'Referer': 'https://www.deepl.com/',
 		}
 
-	def get_body(self, text):
+	def get_body(self, text, source_lang=None, target_lang=None):
 		"""
 		Genera el cuerpo de la solicitud.
 
-		:param text: Texto a traducir.
+		:param text: Texto a traducir o lista de textos.
+		:param source_lang: Código del idioma de origen (opcional). Por defecto el de la instancia.
+		:param target_lang: Código del idioma de destino (opcional). Por defecto el de la instancia.
 		:return: Cuerpo de la solicitud en formato JSON.
 		"""
+		texts = list(text) if isinstance(text, (list, tuple)) else [text]
+		text = "".join(texts)
 		regional_variant = {}
-		target_lang = self._get_target_code()
+		source_lang = source_lang or self._get_source_code()
+		target_lang = target_lang or self._get_target_code()
 		if '-' in target_lang:
 			portions = target_lang.split('-')
 			variant = '-'.join([portions[0].lower(), portions[1]])
@@ -85,10 +92,10 @@ class TranslatorDeepLFree:
 			'method': 'LMT_handle_texts',
 			'params': {
 				'commonJobParams': regional_variant,
-				'texts': [{'text': text}],
+				'texts': [{'text': t} for t in texts],
 				'splitting': 'newlines',
 				'lang': {
-					'source_lang_user_selected': self._get_source_code(),
+					'source_lang_user_selected': source_lang,
 					'target_lang': target_lang,
 				},
 				'timestamp': ts
@@ -109,6 +116,15 @@ class TranslatorDeepLFree:
 		"""
 		return json.loads(response)['result']['texts'][0]['text']
 
+	def get_results(self, response):
+		"""
+		Extrae todos los resultados de la traducción de la respuesta.
+
+		:param response: Respuesta de la solicitud HTTP.
+		:return: Lista de textos traducidos.
+		"""
+		return [item['text'] for item in json.loads(response)['result']['texts']]
+
 	def _get_source_code(self):
 		"""
 		Obtiene el código del idioma de origen.
@@ -125,18 +141,22 @@ class TranslatorDeepLFree:
 		"""
 		return self.target_lang
 
-	def translate(self, text):
+	def translate(self, text, source_lang=None, target_lang=None):
 		"""
 		Traduce un texto utilizando la API gratuita de DeepL.
 
+		Los idiomas pueden pasarse en la llamada para usar una misma instancia desde varios hilos.
+
 		:param text: Texto a traducir.
+		:param source_lang: Código del idioma de origen (opcional). Por defecto el de la instancia.
+		:param target_lang: Código del idioma de destino (opcional). Por defecto el de la instancia.
 		:return: Texto traducido.
 		"""
 		headers = self.get_headers()
-		body = self.get_body(text).encode('utf-8')
+		body = self.get_body(text, source_lang, target_lang).encode('utf-8')
 		request = urllib.request.Request(self.endpoint, data=body, headers=headers, method='POST')
 		try:
-			with urllib.request.urlopen(request, timeout=10) as response:
+			with urlopen(request, timeout=10) as response:
 				# Comprueba si la respuesta está comprimida y descomprímela si es necesario
 				if response.info().get('Content-Encoding') == 'gzip':
 					buf = BytesIO(response.read())
@@ -148,10 +168,39 @@ class TranslatorDeepLFree:
 		except urllib.error.HTTPError as e:
 			error_message = e.read().decode('utf-8')
 			logHandler.log.error(_("Error HTTP: {0} - {1}").format(e.code, error_message))
+			anotar_fallo()
 			return text
 		except urllib.error.URLError as e:
 			logHandler.log.error(_("Error de red: {0}").format(e.reason))
+			anotar_fallo()
 			return text
 		except Exception as e:
 			logHandler.log.error(_("Error inesperado: {0}").format(str(e)))
+			anotar_fallo()
 			return text
+
+	def translate_lote(self, texts, source_lang=None, target_lang=None):
+		"""
+		Traduce varios textos en una sola petición utilizando la API gratuita de DeepL.
+
+		:param texts: Lista de textos a traducir.
+		:param source_lang: Código del idioma de origen (opcional). Por defecto el de la instancia.
+		:param target_lang: Código del idioma de destino (opcional). Por defecto el de la instancia.
+		:return: Lista de textos traducidos o None en caso de error.
+		"""
+		headers = self.get_headers()
+		body = self.get_body(texts, source_lang, target_lang).encode('utf-8')
+		request = urllib.request.Request(self.endpoint, data=body, headers=headers, method='POST')
+		try:
+			with urlopen(request, timeout=10) as response:
+				if response.info().get('Content-Encoding') == 'gzip':
+					buf = BytesIO(response.read())
+					with gzip.GzipFile(fileobj=buf) as f:
+						result = f.read().decode('utf-8')
+				else:
+					result = response.read().decode('utf-8')
+				return self.get_results(result)
+		except Exception as e:
+			logHandler.log.error(_("Error inesperado: {0}").format(str(e)))
+			anotar_fallo()
+			return None
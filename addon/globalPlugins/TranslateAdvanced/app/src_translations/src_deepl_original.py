@@ -9,6 +9,8 @@ import logHandler
 import urllib.parse
 import urllib.request
 import json
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -60,17 +62,64 @@ class TranslatorDeepL:
 		
 		# Realiza la solicitud y maneja la respuesta
 		try:
-			with urllib.request.urlopen(req) as response:
+			with urlopen(req) as response:
 				response_data = response.read().decode()
 				response_json = json.loads(response_data)
 				return response_json['translations'][0]['text']
 		except urllib.request.HTTPError as e:
 			logHandler.log.error(_("Error en la traducción: {0} {1}").format(e.code, e.reason))
+			anotar_fallo()
 			return text
 		except Exception as e:
 			logHandler.log.error(_("Error en la traducción: {0}").format(str(e)))
+			anotar_fallo()
 			return text
 	
+	def translate_deepl_lote(self, texts, api_key, use_free_api=True, source_lang="auto", target_lang="es"):
+		"""
+		Traduce varios textos en una sola petición utilizando la API de DeepL.
+
+		:param texts: Lista de textos a traducir.
+		:param api_key: Clave de API de DeepL.
+		:param use_free_api: Indica si se debe usar la API gratuita (por defecto) o la de pago.
+		:param source_lang: Código del idioma de origen (por defecto 'auto').
+		:param target_lang: Código del idioma de destino (por defecto 'es').
+		:return: Lista de textos traducidos o None en caso de error.
+		"""
+		if not api_key:
+			raise ValueError(_("Se requiere una clave de API para DeepL."))
+
+		self.api_key = api_key
+		self.base_url = "https://api-free.deepl.com/v2" if use_free_api else "https://api.deepl.com/v2"
+
+		url = f"{self.base_url}/translate"
+		params = {
+			"auth_key": self.api_key,
+			"text": list(texts),
+			"target_lang": target_lang
+		}
+		if source_lang.lower() != "auto":
+			params["source_lang"] = source_lang
+
+		data = urllib.parse.urlencode(params, doseq=True).encode("utf-8")
+		headers = {
+			"Content-Type": "application/x-www-form-urlencoded"
+		}
+		req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+
+		try:
+			with urlopen(req) as response:
+				response_json = json.loads(response.read().decode())
+				return [item['text'] for item in response_json['translations']]
+		except urllib.request.HTTPError as e:
+			logHandler.log.error(_("Error en la traducción: {0} {1}").format(e.code, e.reason))
+			anotar_fallo()
+			return None
+		except Exception as e:
+			logHandler.log.error(_("Error en la traducción: {0}").format(str(e)))
+			anotar_fallo()
+			return None
+
 	def get_usage(self, api_key):
 		"""
 		Obtiene el uso actual de la API de DeepL.
@@ -92,7 +141,7 @@ class TranslatorDeepL:
 		
 		# Realiza la solicitud y maneja la respuesta
 		try:
-			with urllib.request.urlopen(req) as response:
+			with urlopen(req) as response:
 				response_data = response.read().decode()
 				response_json = json.loads(response_data)
 				usage_info = _("DeepL - uso: {0} / {1}").format(response_json['character_count'], response_json['character_limit'])
@@ -9,6 +9,8 @@ import logHandler
 import urllib.parse
 import urllib.request
 import json
+# Carga personal
+from ..utils.utils_http import urlopen
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -50,7 +52,7 @@ class DetectorDeIdioma:
 			url_completa = f"{self.url_base}?{url_parametros}"
 			
 			# Realizar la solicitud GET a Google Translate
-			with urllib.request.urlopen(url_completa) as response:
+			with urlopen(url_completa) as response:
 				response_data = response.read().decode('utf-8', 'surrogatepass')
 			
 			# Parsear la respuesta JSON
@@ -10,6 +10,8 @@ import urllib.parse
 import urllib.request
 import re
 import html
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -47,15 +49,17 @@ class TranslatorGooglealternative:
 
 		req = urllib.request.Request(url, headers=headers)
 		try:
-			with urllib.request.urlopen(req) as response:
+			with urlopen(req) as response:
 				response_data = response.read().decode()
 				translated_text = self._extract_translation(response_data)
 				return translated_text
 		except urllib.error.HTTPError as e:
 			logHandler.log.error(_("Error en la traducción: {0} {1}").format(e.code, e.reason))
+			anotar_fallo()
 			return _("Error en la traducción: {0} {1}").format(e.code, e.reason)
 		except Exception as e:
 			logHandler.log.error(_("Error en la traducción: {0}").format(str(e)))
+			anotar_fallo()
 			return _("Error en la traducción: {0}").format(str(e))
 
 	def _extract_translation(self, response_data):
@@ -72,7 +76,9 @@ class TranslatorGooglealternative:
 				return html.unescape(match.group(1))
 			else:
 				logHandler.log.error(_("Error al extraer la traducción: no se encontró el texto traducido."))
+				anotar_fallo()
 				return _("Error al extraer la traducción: no se encontró el texto traducido.")
 		except Exception as e:
 			logHandler.log.error(_("Error al analizar la respuesta de la traducción: {0}").format(str(e)))
+			anotar_fallo()
 			return _("Error al analizar la respuesta de la traducción: {0}").format(str(e))
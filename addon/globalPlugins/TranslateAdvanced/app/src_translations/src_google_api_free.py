@@ -11,24 +11,49 @@ import logHandler
 # Carga Python
 import os
 import re
-import ssl
 import threading
-from time import sleep
-from random import randint, choice
+from random import choice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 import json
 import urllib.request as urllibRequest
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo, registro_actual, usar_registro, comprobar_vigencia, PeticionAbandonada
+from ..utils.utils_threads import LimitadorTasa
 
 # Carga traducción
 addonHandler.initTranslation()
 
-# Configuración para ignorar la verificación SSL
-ssl._create_default_https_context = ssl._create_unverified_context
-
 class TranslatorGoogleApiFree:
 	"""
 	Clase para manejar la traducción de texto utilizando la API de Google Translate.
 	"""
 
+	# Fragmentos que se traducen a la vez como máximo
+	max_paralelo = 4
+	# Peticiones por segundo y ráfaga máxima permitidas por cada servidor
+	tasa_por_servidor = 2
+	rafaga_por_servidor = 4
+	# Limitadores compartidos por servidor
+	_limitadores = {}
+	_limitadores_lock = threading.Lock()
+
+	@classmethod
+	def get_limitador(cls, url):
+		"""
+		Obtiene el limitador de peticiones compartido del servidor de una URL.
+
+		:param url: URL o plantilla de URL del servidor.
+		:return: El limitador del servidor.
+		"""
+		servidor = urlsplit(url).hostname
+		with cls._limitadores_lock:
+			limitador = cls._limitadores.get(servidor)
+			if limitador is None:
+				limitador = LimitadorTasa(cls.tasa_por_servidor, cls.rafaga_por_servidor)
+				cls._limitadores[servidor] = limitador
+			return limitador
+
 	def __init__(self):
 		"""
 		Inicializa una instancia del traductor de Google Translate.
@@ -75,20 +100,25 @@ class TranslatorGoogleApiFree:
 		:param IS_DIALOGO: Si es llamado desde un dialogo.
 		:return: Traducción del texto.
 		"""
-		self.traductor_hilo = self.TraductorHilo(lang_from, lang_to, text, lang_swap, chunksize, self.split_reg, self.lang_conversion_dic, mostrar_progreso, widget)
-		self.traductor_hilo.start()
-		self.traductor_hilo.join()  # Esperar a que el hilo termine
-		self.error = self.traductor_hilo.error  # Actualizar el estado de error
-		if self.error["success"]:
+		# El resultado se lee del hilo local; la instancia puede estar traduciendo a la vez desde otro hilo
+		hilo = self.TraductorHilo(lang_from, lang_to, text, lang_swap, chunksize, self.split_reg, self.lang_conversion_dic, mostrar_progreso, widget)
+		self.traductor_hilo = hilo
+		hilo.start()
+		hilo.join()  # Esperar a que el hilo termine
+		if hilo.abandonada:
+			raise PeticionAbandonada()
+		self.error = hilo.error  # Actualizar el estado de error
+		if hilo.error["success"]:
 			msg = _("""Error en la traducción.
 
 Error:
 
-{}""").format(self.error["data"])
+{}""").format(hilo.error["data"])
 			if not IS_DIALOGO:
 				logHandler.log.error(msg)
+			anotar_fallo()
 			return text
-		return self.traductor_hilo.translation
+		return hilo.translation
 
 	def get_error(self):
 		"""
@@ -135,14 +165,18 @@ Error:
 			self.translation = ''
 			self.lang_detected = ''
 			self.error = {"success": False, "data": None}
-			self.opener = urllibRequest.build_opener()
-			self.opener.addheaders = [('User-agent', 'Mozilla/5.0')]
+			# Si la voz se cancela, el abandono se relanza en el hilo que espera la traducción
+			self.abandonada = False
+			self.cabeceras = {'User-agent': 'Mozilla/5.0'}
 			self.first_chunk = True
 			self._stop_event = threading.Event()
+			self._abortar = threading.Event()
 			self.mostrar_progreso = mostrar_progreso
 			self.widget = widget
 			self.total_chunks = sum(1 for _ in self.split_reg.finditer(text))
 			self.processed_chunks = 0
+			# Las peticiones de los fragmentos se anotan en la llamada que ha creado el hilo
+			self.registro = registro_actual()
 			self.url_templates = [
 				"https://translate.googleapis.com/translate_a/single?client=gtx&sl={lang_from}&tl={lang_to}&dt=t&q={text}&dj=1",
 				"https://translate.googleapis.mirror.nvdadr.com/translate_a/single?client=gtx&sl={lang_from}&tl={lang_to}&dt=t&q={text}&dj=1",
@@ -169,38 +203,107 @@ Error:
 		def run(self):
 			"""
 			Ejecuta el proceso de traducción en el hilo.
+
+			El primer fragmento se traduce solo para detectar el idioma y aplicar el intercambio de idioma.
+			El resto se traduce en paralelo, con un límite de peticiones por servidor, y se une en orden.
 			"""
 			url_template = choice(self.url_templates)
+			self.limitador = TranslatorGoogleApiFree.get_limitador(url_template)
 			chunks = list(TranslatorGoogleApiFree.dividir_chunks(self, self.text, self.chunksize))
 			self.total_chunks = len(chunks)
-			for chunk in chunks:
-				# Simular un comportamiento humano al hacer las solicitudes
-				if not self.first_chunk:
-					sleep(randint(1, 10))
+			resultados = [""] * len(chunks)
+			self._lock = threading.Lock()
+			executor = None
+			try:
+				resultados[0] = self.traducir_primer_chunk(url_template, chunks[0])
+				self.chunk_completado()
+				if len(chunks) > 1:
+					executor = ThreadPoolExecutor(max_workers=min(TranslatorGoogleApiFree.max_paralelo, len(chunks) - 1))
+					futuros = {executor.submit(self.traducir_chunk, url_template, chunk): indice for indice, chunk in enumerate(chunks[1:], 1)}
+					for futuro in as_completed(futuros):
+						resultados[futuros[futuro]] = futuro.result()
+						self.chunk_completado()
+			except PeticionAbandonada:
+				self.abandonada = True
+				return
+			except Exception as e:
 				if self._stop_event.is_set():
 					self.error = {"success": True, "data": _("Proceso cancelado por el usuario")}
-					return
-				url = url_template.format(lang_from=self.lang_from, lang_to=self.lang_to, text=urllibRequest.quote(chunk.encode('utf-8', 'surrogatepass')))
-				try:
-					response = json.load(self.opener.open(url))
-					self.lang_detected = response['src']
-					self.lang_detected = self.lang_conversion_dic.get(self.lang_detected, self.lang_detected)
-					if self.first_chunk and self.lang_from == "auto" and self.lang_detected == self.lang_to and self.lang_swap is not None:
-						self.lang_to = self.lang_swap
-						self.first_chunk = False
-						url = url_template.format(lang_from=self.lang_from, lang_to=self.lang_to, text=urllibRequest.quote(chunk.encode('utf-8', 'surrogatepass')))
-						response = json.load(self.opener.open(url))
-				except Exception as e:
+				else:
 					# Si ocurre un error, detener el proceso de traducción
 					self.error = {"success": True, "data": str(e)}
-					return
-				# Verificar si la clave 'sentences' existe en la respuesta antes de intentar acceder a ella
-				if "sentences" in response:
-					self.translation += "".join(sentence["trans"] for sentence in response["sentences"])
+					self._abortar.set()
+				return
+			finally:
+				if executor is not None:
+					executor.shutdown(wait=False, cancel_futures=True)
+			self.translation = "".join(resultados)
+
+		def solicitar(self, url_template, chunk):
+			"""
+			Realiza la petición de un fragmento respetando el limitador del servidor.
+
+			:param url_template: Plantilla de la URL del servidor.
+			:param chunk: Fragmento de texto a traducir.
+			:return: La respuesta JSON del servidor.
+			"""
+			if self._stop_event.is_set() or self._abortar.is_set():
+				raise Exception(_("Proceso cancelado por el usuario"))
+			with usar_registro(self.registro):
+				# Un fragmento que ya no se necesita no gasta una ficha del limitador
+				comprobar_vigencia()
+				if not self.limitador.adquirir(self._stop_event):
+					raise Exception(_("Proceso cancelado por el usuario"))
+				url = url_template.format(lang_from=self.lang_from, lang_to=self.lang_to, text=urllibRequest.quote(chunk.encode('utf-8', 'surrogatepass')))
+				return json.load(urlopen(urllibRequest.Request(url, headers=self.cabeceras)))
+
+		def traducir_primer_chunk(self, url_template, chunk):
+			"""
+			Traduce el primer fragmento y cambia el idioma de destino si el detectado coincide con él.
+
+			:param url_template: Plantilla de la URL del servidor.
+			:param chunk: Fragmento de texto a traducir.
+			:return: El fragmento traducido.
+			"""
+			response = self.solicitar(url_template, chunk)
+			self.lang_detected = response['src']
+			self.lang_detected = self.lang_conversion_dic.get(self.lang_detected, self.lang_detected)
+			if self.lang_from == "auto" and self.lang_detected == self.lang_to and self.lang_swap is not None:
+				self.lang_to = self.lang_swap
+				response = self.solicitar(url_template, chunk)
+			self.first_chunk = False
+			return self.extraer_traduccion(response)
+
+		def traducir_chunk(self, url_template, chunk):
+			"""
+			Traduce un fragmento. Se ejecuta en los hilos del grupo de traducción paralela.
+
+			:param url_template: Plantilla de la URL del servidor.
+			:param chunk: Fragmento de texto a traducir.
+			:return: El fragmento traducido.
+			"""
+			return self.extraer_traduccion(self.solicitar(url_template, chunk))
+
+		def extraer_traduccion(self, response):
+			"""
+			Extrae el texto traducido de la respuesta del servidor.
+
+			:param response: La respuesta JSON del servidor.
+			:return: El texto traducido.
+			"""
+			# Verificar si la clave 'sentences' existe en la respuesta antes de intentar acceder a ella
+			if "sentences" in response:
+				return "".join(sentence["trans"] for sentence in response["sentences"])
+			return ""
+
+		def chunk_completado(self):
+			"""
+			Cuenta un fragmento terminado y notifica el progreso.
+			"""
+			with self._lock:
 				self.processed_chunks += 1
-				self.first_chunk = False
-				if self.mostrar_progreso:
-					self.widget(self.get_progreso())
+			if self.mostrar_progreso:
+				self.widget(self.get_progreso())
 
 		def get_progreso(self):
 			"""
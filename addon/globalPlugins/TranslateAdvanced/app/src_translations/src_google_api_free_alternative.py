@@ -8,20 +8,18 @@ import logHandler
 # Carga Python
 import os
 import re
-import ssl
 import threading
 from time import sleep
 from random import randint, choice
 import json
 import urllib.request as urllibRequest
 import urllib.parse
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo, registro_actual, usar_registro, PeticionAbandonada
 
 # Carga traducción
 addonHandler.initTranslation()
 
-# Configuración para ignorar la verificación SSL
-ssl._create_default_https_context = ssl._create_unverified_context
-
 class TranslatorGoogleApiFreeAlternative:
 	"""
 	Clase para manejar la traducción de texto utilizando la API de Google Translate.
@@ -39,8 +37,7 @@ class TranslatorGoogleApiFreeAlternative:
 		self.headers = {
 			'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/75.0.3770.142 Safari/537.36'}
 		self.url = 'https://translate.googleapis.com/translate_a/single'
-		self.opener = urllibRequest.build_opener()
-		self.opener.addheaders = [('User-agent', 'Mozilla/5.0')]
+		self.cabeceras = {'User-agent': 'Mozilla/5.0'}
 
 	@staticmethod
 	def rshift(val, n):
@@ -162,7 +159,7 @@ class TranslatorGoogleApiFreeAlternative:
 		:return: Respuesta en formato JSON.
 		"""
 		try:
-			response = self.opener.open(url)
+			response = urlopen(urllibRequest.Request(url, headers=self.cabeceras))
 			return json.load(response)
 		except Exception as e:
 			msg = \
@@ -172,6 +169,7 @@ Error:
 
 {}""").format(str(e))
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return None
 
 	def dividir_chunks(self, text, chunksize):
@@ -222,6 +220,8 @@ Error:
 		)
 		traductor.start()
 		traductor.join()  # Esperar a que el hilo termine
+		if traductor.abandonada:
+			raise PeticionAbandonada()
 		if traductor.error["success"]:
 			msg = \
 _("""Error en la traducción.
@@ -230,6 +230,7 @@ Error:
 
 {}""").format(traductor.error["data"])
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return text
 
 		return traductor.translation
@@ -277,6 +278,8 @@ Error:
 			self.translation = ''
 			self.lang_detected = ''
 			self.error = {"success": False, "data": None}
+			# Si la voz se cancela, el abandono se relanza en el hilo que espera la traducción
+			self.abandonada = False
 			self.first_chunk = True
 			self._stop_event = threading.Event()
 			self.mostrar_progreso = mostrar_progreso
@@ -286,6 +289,8 @@ Error:
 			self.buildUrl = buildUrl
 			self.getHtml = getHtml
 			self.dividir_chunks = dividir_chunks
+			# Las peticiones se anotan en la llamada que ha creado el hilo
+			self.registro = registro_actual()
 
 		def stop(self):
 			"""
@@ -306,7 +311,8 @@ Error:
 				tk = self.getTk(chunk)
 				url = self.buildUrl(chunk, tk, self.lang_from, self.lang_to)
 				try:
-					response = self.getHtml(url)
+					with usar_registro(self.registro):
+						response = self.getHtml(url)
 					if response is None:
 						raise Exception(_("Respuesta vacía o inválida"))
 					# Verifica la estructura de la respuesta y accede correctamente
@@ -323,13 +329,17 @@ Error:
 						self.first_chunk = False
 						tk = self.getTk(chunk)
 						url = self.buildUrl(chunk, tk, self.lang_from, self.lang_to)
-						response = self.getHtml(url)
+						with usar_registro(self.registro):
+							response = self.getHtml(url)
 						if response is None:
 							raise Exception(_("Respuesta vacía o inválida después de cambiar el idioma de destino"))
 						if isinstance(response, list) and len(response) > 0 and isinstance(response[0], list):
 							translated_chunk = ''.join([item[0] for item in response[0] if item[0]])
 						else:
 							raise Exception(_("Estructura de respuesta inesperada después de cambiar el idioma de destino"))
+				except PeticionAbandonada:
+					self.abandonada = True
+					return
 				except Exception as e:
 					# Si ocurre un error, detener el proceso de traducción
 					self.error = {"success": True, "data": str(e)}
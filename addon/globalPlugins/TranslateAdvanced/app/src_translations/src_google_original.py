@@ -10,6 +10,8 @@ import urllib.parse
 import urllib.request
 import re
 import html
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -39,7 +41,7 @@ class TranslatorGoogle:
 		link = base_link % (from_language, to_language, to_translate_encoded)
 		request = urllib.request.Request(link, headers=self.agent)
 		try:
-			with urllib.request.urlopen(request) as response:
+			with urlopen(request) as response:
 				raw_data = response.read()
 		except Exception as e:
 			msg = _("""Error en la traducción.
@@ -48,6 +50,7 @@ Error:
 
 {}""").format(str(e))
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return to_translate  # Devolver el texto original en caso de error
 		
 		data = raw_data.decode("utf-8")
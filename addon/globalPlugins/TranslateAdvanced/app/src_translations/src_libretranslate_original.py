@@ -9,6 +9,8 @@ import logHandler
 import urllib.parse
 import urllib.request
 import json
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -44,6 +46,7 @@ Error:
 
 Se requiere una clave de API para LibreTranslate.""")
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return text
 		
 		# Endpoint y parámetros de la solicitud
@@ -65,7 +68,7 @@ Se requiere una clave de API para LibreTranslate.""")
 		
 		# Realiza la solicitud y maneja la respuesta
 		try:
-			with urllib.request.urlopen(req) as response:
+			with urlopen(req) as response:
 				response_data = response.read().decode()
 				response_json = json.loads(response_data)
 				return response_json.get('translatedText', text)
@@ -79,6 +82,7 @@ Error:
 
 {}""").format(e.code, e.reason)
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return text
 		except Exception as e:
 			msg = \
@@ -88,4 +92,50 @@ Error:
 
 {}""").format(str(e))
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return text
+
+	def translate_libretranslate_lote(self, texts, api_key, source_lang="auto", target_lang="es", api_url="https://translate.nvda.es/translate"):
+		"""
+		Traduce varios textos en una sola petición utilizando la API de LibreTranslate.
+
+		:param texts: Lista de textos a traducir.
+		:param api_key: Clave de API de LibreTranslate.
+		:param source_lang: Código del idioma de origen (por defecto 'auto').
+		:param target_lang: Código del idioma de destino (por defecto 'es').
+		:param api_url: URL de la API de LibreTranslate (por defecto "https://translate.nvda.es/translate").
+		:return: Lista de textos traducidos o None en caso de error.
+		"""
+		if not api_key:
+			return None
+
+		params = {
+			"q": list(texts),
+			"source": source_lang,
+			"target": target_lang,
+			"format": "text",
+			"api_key": api_key
+		}
+
+		data = json.dumps(params).encode("utf-8")
+		headers = {
+			"Content-Type": "application/json",
+			"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+		}
+		req = urllib.request.Request(api_url, data=data, headers=headers, method="POST")
+
+		try:
+			with urlopen(req) as response:
+				response_json = json.loads(response.read().decode())
+				translated = response_json.get('translatedText')
+				return translated if isinstance(translated, list) else None
+		except Exception as e:
+			msg = \
+_("""Error en la traducción.
+
+Error:
+
+{}""").format(str(e))
+			logHandler.log.error(msg)
+			anotar_fallo()
+			return None
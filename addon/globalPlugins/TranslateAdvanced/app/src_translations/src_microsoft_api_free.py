@@ -10,7 +10,9 @@ import json
 import base64
 from datetime import datetime
 from urllib.parse import urlencode
-from urllib.request import urlopen, Request
+from urllib.request import Request
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -99,9 +101,11 @@ class TranslatorMicrosoftApiFree:
 		"""
 		Genera el cuerpo de la solicitud.
 
-		:param text: El texto a traducir.
+		:param text: El texto a traducir o una lista de textos.
 		:return: El cuerpo de la solicitud en formato JSON.
 		"""
+		if isinstance(text, (list, tuple)):
+			return json.dumps([{'text': t} for t in text])
 		return json.dumps([{'text': text}])
 
 	def translate_microsoft_api_free(self, lang_from, lang_to, text):
@@ -132,6 +136,101 @@ Error:
 
 {str(e)}"""
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return text  # Devuelve el texto original en caso de error
 
 		return translate_data
+
+	def translate_microsoft_api_free_lote(self, lang_from, lang_to, texts):
+		"""
+		Traduce varios textos en una sola petición utilizando la API gratuita de Microsoft Translator.
+
+		:param lang_from: Idioma de origen.
+		:param lang_to: Idioma de destino.
+		:param texts: Lista de textos a traducir.
+		:return: Lista de textos traducidos o None en caso de error.
+		"""
+		try:
+			endpoint = self.get_endpoint(lang_to, lang_from)
+			headers = self.get_headers()
+			body = self.get_body(texts)
+			request = Request(endpoint, data=body.encode('utf-8'), headers=headers)
+			response = urlopen(request)
+
+			if response.status != 200:
+				raise Exception(f'Error en la traducción: {response.read().decode("utf-8")}')
+
+			return [item['translations'][0]['text'] for item in json.loads(response.read().decode('utf-8'))]
+
+		except Exception as e:
+			msg = f"""Error en la traducción.
+
+Error:
+
+{str(e)}"""
+			logHandler.log.error(msg)
+			anotar_fallo()
+			return None
+
+	def translate_microsoft_api_free_alineado(self, lang_from, lang_to, texts):
+		"""
+		Traduce varios fragmentos como un solo texto y reparte la traducción entre los fragmentos.
+
+		Los fragmentos se unen con espacios para que el servicio vea las frases completas. Las longitudes
+		de las frases que devuelve el servicio (includeSentenceLength) permiten asignar cada frase traducida
+		al fragmento en el que empieza la frase original. Los fragmentos en los que no empieza ninguna
+		frase quedan vacíos porque su texto ya va en la frase del fragmento anterior.
+
+		:param lang_from: Idioma de origen.
+		:param lang_to: Idioma de destino.
+		:param texts: Lista de fragmentos a traducir.
+		:return: Lista con la traducción de cada fragmento o None si no se puede alinear.
+		"""
+		inicios = []
+		posicion = 0
+		for text in texts:
+			inicios.append(posicion)
+			posicion += len(text) + 1
+		joined = " ".join(texts)
+		try:
+			endpoint = self.get_endpoint(lang_to, lang_from)
+			headers = self.get_headers()
+			body = self.get_body(joined)
+			request = Request(endpoint, data=body.encode('utf-8'), headers=headers)
+			response = urlopen(request)
+
+			if response.status != 200:
+				raise Exception(f'Error en la traducción: {response.read().decode("utf-8")}')
+
+			translation = json.loads(response.read().decode('utf-8'))[0]['translations'][0]
+			translated = translation['text']
+			src_lens = translation['sentLen']['srcSentLen']
+			trans_lens = translation['sentLen']['transSentLen']
+
+		except Exception as e:
+			msg = f"""Error en la traducción.
+
+Error:
+
+{str(e)}"""
+			logHandler.log.error(msg)
+			anotar_fallo()
+			return None
+
+		if len(src_lens) != len(trans_lens) or sum(src_lens) != len(joined) or sum(trans_lens) != len(translated):
+			return None
+
+		resultados = [[] for text in texts]
+		fragmento = 0
+		src_pos = 0
+		trans_pos = 0
+		for src_len, trans_len in zip(src_lens, trans_lens):
+			# La frase se asigna al último fragmento que empieza antes que su primer carácter visible
+			frase = joined[src_pos:src_pos + src_len]
+			inicio = src_pos + len(frase) - len(frase.lstrip())
+			while fragmento + 1 < len(inicios) and inicios[fragmento + 1] <= inicio:
+				fragmento += 1
+			resultados[fragmento].append(translated[trans_pos:trans_pos + trans_len])
+			src_pos += src_len
+			trans_pos += trans_len
+		return ["".join(partes).strip() for partes in resultados]
@@ -11,6 +11,8 @@ import urllib.request
 import urllib.error
 import threading
 from urllib.parse import quote
+# Carga personal
+from ..utils.utils_http import urlopen, anotar_fallo, registro_actual, usar_registro, PeticionAbandonada
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -88,20 +90,25 @@ class TranslatorOpenAI:
 			}
 		}
 
-		self.traductor_hilo = self.TraductorHilo(text, target_language, self.models, api_key, mostrar_progreso, widget)
-		self.traductor_hilo.start()
-		self.traductor_hilo.join()  # Esperar a que el hilo termine
-		self.error = self.traductor_hilo.error  # Actualizar el estado de error
-		if self.error["success"]:
+		# El resultado se lee del hilo local; la instancia puede estar traduciendo a la vez desde otro hilo
+		hilo = self.TraductorHilo(text, target_language, self.models, api_key, mostrar_progreso, widget)
+		self.traductor_hilo = hilo
+		hilo.start()
+		hilo.join()  # Esperar a que el hilo termine
+		if hilo.abandonada:
+			raise PeticionAbandonada()
+		self.error = hilo.error  # Actualizar el estado de error
+		if hilo.error["success"]:
 			msg = \
 _("""Error en la traducción.
 
 Error:
 
-{}""").format(self.error["data"])
+{}""").format(hilo.error["data"])
 			logHandler.log.error(msg)
+			anotar_fallo()
 			return text  # Devuelve el texto original si hay un error
-		return self.traductor_hilo.translation
+		return hilo.translation
 
 	def get_error(self):
 		"""
@@ -141,13 +148,15 @@ Error:
 			self.api_key = api_key
 			self.translation = ''
 			self.error = {"success": False, "data": None}
-			self.opener = urllib.request.build_opener()
-			self.opener.addheaders = [('User-agent', 'Mozilla/5.0')]
+			# Si la voz se cancela, el abandono se relanza en el hilo que espera la traducción
+			self.abandonada = False
 			self._stop_event = threading.Event()
 			self.mostrar_progreso = mostrar_progreso
 			self.widget = widget
 			self.total_chunks = 0
 			self.processed_chunks = 0
+			# Las peticiones se anotan en la llamada que ha creado el hilo
+			self.registro = registro_actual()
 
 		def stop(self):
 			"""
@@ -197,10 +206,13 @@ Error:
 				req = urllib.request.Request(endpoint, data=request_data, headers=headers)
 
 				try:
-					with urllib.request.urlopen(req) as response:
+					with usar_registro(self.registro), urlopen(req) as response:
 						response_data = response.read().decode('utf-8')
 						response_json = json.loads(response_data)
 						self.translation += response_json['choices'][0]['message']['content'].strip() + " "
+				except PeticionAbandonada:
+					self.abandonada = True
+					return
 				except urllib.error.HTTPError as e:
 					error_message = e.read().decode('utf-8')
 					error_json = json.loads(error_message)
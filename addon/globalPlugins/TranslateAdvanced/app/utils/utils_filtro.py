@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import re
+import threading
+
+# Expresiones precompiladas de cada categoría de texto que no se traduce
+_PATRONES = {
+	# Solo signos de puntuación, símbolos o espacios
+	"puntuacion": re.compile(r"^[\W_]+$"),
+	# Números, porcentajes, precios, horas y fechas
+	"numeros": re.compile(r"^[\W_]*\d[\d\W_]*(?:[ap]\.?\s?m\.?)?$", re.IGNORECASE),
+	# Direcciones web y de correo electrónico
+	"urls": re.compile(r"^\s*(?:(?:[a-z][a-z0-9+.\-]*://|www\.)\S+|[\w.+\-]+@[\w\-]+(?:\.[\w\-]+)+)\s*$", re.IGNORECASE),
+	# Rutas de Windows, de red o Unix y nombres de archivo con extensión
+	"rutas": re.compile(r"^\s*(?:[a-z]:\\|\\\\|~?/)\S.*$|^\s*[\w\-]+(?:\.[\w\-]+)*\.[a-z0-9]{2,5}\s*$", re.IGNORECASE),
+}
+
+# Todas las categorías en el orden en que se comprueban
+CATEGORIAS = ("caracteres", "puntuacion", "numeros", "urls", "rutas")
+
+class FiltroVoz:
+	"""
+	Clasificador local de los textos de la voz que no merece la pena enviar al servicio de traducción.
+
+	Reconoce los caracteres sueltos (eco de teclado), la puntuación, los números, las direcciones
+	web y las rutas. Cada categoría se puede activar por separado y se cuenta cuántos textos
+	ha evitado traducir cada una.
+	"""
+	def __init__(self, categorias=CATEGORIAS):
+		"""
+		Inicializa el filtro.
+
+		:param categorias: Categorías activas.
+		"""
+		self._lock = threading.Lock()
+		self.contadores = dict.fromkeys(CATEGORIAS, 0)
+		self.set_categorias(categorias)
+
+	def set_categorias(self, categorias):
+		"""
+		Cambia las categorías activas.
+
+		:param categorias: Categorías activas.
+		"""
+		self._caracteres = "caracteres" in categorias
+		self._patrones = [(nombre, _PATRONES[nombre]) for nombre in CATEGORIAS[1:] if nombre in categorias]
+
+	def clasificar(self, texto):
+		"""
+		Obtiene la categoría de un texto que no se debe traducir.
+
+		:param texto: El texto a clasificar.
+		:return: El nombre de la categoría o None si el texto se debe traducir.
+		"""
+		limpio = texto.strip()
+		if self._caracteres and len(limpio) <= 1:
+			return "caracteres"
+		for nombre, patron in self._patrones:
+			if patron.match(limpio):
+				return nombre
+		return None
+
+	def omitir(self, texto):
+		"""
+		Indica si un texto se debe devolver sin traducir y lo cuenta en su categoría.
+
+		:param texto: El texto a comprobar.
+		:return: True si el texto no se debe traducir, False en caso contrario.
+		"""
+		categoria = self.clasificar(texto)
+		if categoria is None:
+			return False
+		with self._lock:
+			self.contadores[categoria] += 1
+		return True
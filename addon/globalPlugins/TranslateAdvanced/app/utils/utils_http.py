@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import io
+import ssl
+import sys
+import time
+import socket
+import threading
+import http.client
+import urllib.error
+import urllib.parse
+import urllib.request
+from contextlib import contextmanager
+
+class _ConexionHTTPS(http.client.HTTPSConnection):
+	"""
+	Conexión HTTPS que reutiliza la sesión TLS de conexiones anteriores al mismo servidor.
+	"""
+	def __init__(self, host, port, timeout, context, sesiones):
+		"""
+		Inicializa la conexión.
+
+		:param host: Nombre del servidor.
+		:param port: Puerto del servidor.
+		:param timeout: Tiempo máximo de espera en segundos.
+		:param context: Contexto SSL compartido.
+		:param sesiones: Diccionario compartido de sesiones TLS por servidor.
+		"""
+		super().__init__(host, port, timeout=timeout, context=context)
+		self._sesiones = sesiones
+
+	def connect(self):
+		"""
+		Abre el socket y negocia TLS intentando reanudar la última sesión del servidor.
+		"""
+		sock = socket.create_connection((self.host, self.port), self.timeout, self.source_address)
+		sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		sesion = self._sesiones.get((self.host, self.port))
+		try:
+			self.sock = self._context.wrap_socket(sock, server_hostname=self.host, session=sesion)
+		except ValueError:
+			# La sesión guardada no es válida para este contexto; se negocia una nueva
+			self._sesiones.pop((self.host, self.port), None)
+			self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+class RespuestaHTTP:
+	"""
+	Respuesta ya leída de una petición hecha a través del pool de conexiones.
+
+	Ofrece la parte de la interfaz de las respuestas de urllib que usan los módulos de traducción.
+	"""
+	def __init__(self, url, status, reason, headers, datos):
+		"""
+		Inicializa la respuesta.
+
+		:param url: URL de la petición.
+		:param status: Código de estado HTTP.
+		:param reason: Texto del estado HTTP.
+		:param headers: Cabeceras de la respuesta.
+		:param datos: Cuerpo de la respuesta en bytes.
+		"""
+		self.url = url
+		self.status = status
+		self.code = status
+		self.reason = reason
+		self.headers = headers
+		self._cuerpo = io.BytesIO(datos)
+
+	def read(self, *args):
+		"""
+		Lee el cuerpo de la respuesta.
+
+		:return: El cuerpo de la respuesta en bytes.
+		"""
+		return self._cuerpo.read(*args)
+
+	def info(self):
+		"""
+		Obtiene las cabeceras de la respuesta.
+
+		:return: Las cabeceras de la respuesta.
+		"""
+		return self.headers
+
+	def getheader(self, name, default=None):
+		"""
+		Obtiene el valor de una cabecera.
+
+		:param name: Nombre de la cabecera.
+		:param default: Valor por defecto si no existe.
+		:return: El valor de la cabecera.
+		"""
+		return self.headers.get(name, default)
+
+	def close(self):
+		"""
+		Cierra la respuesta.
+		"""
+		self._cuerpo.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+class PoolConexiones:
+	"""
+	Pool de conexiones HTTP/HTTPS persistentes compartido por todos los módulos de traducción.
+
+	Mantiene abiertas las conexiones (keep-alive) para no repetir en cada petición la resolución DNS,
+	la conexión TCP y la negociación TLS. Limita las conexiones simultáneas por servidor y reanuda
+	las sesiones TLS cuando hay que abrir una conexión nueva.
+	"""
+	def __init__(self, max_por_host=4, timeout=15, max_inactividad=60):
+		"""
+		Inicializa el pool.
+
+		:param max_por_host: Número máximo de conexiones simultáneas por servidor.
+		:param timeout: Tiempo máximo de espera por defecto en segundos.
+		:param max_inactividad: Segundos tras los que una conexión libre se descarta.
+		"""
+		self.max_por_host = max_por_host
+		self.timeout = timeout
+		self.max_inactividad = max_inactividad
+		self._lock = threading.Lock()
+		self._libres = {}
+		self._semaforos = {}
+		self._sesiones = {}
+		self._contexto = None
+		# Función opcional que recibe True o False según la red haya respondido o no a cada petición
+		self.al_resultado = None
+		# Proxies del sistema y momento en que se leyeron
+		self._proxies = None
+		self._momento_proxies = 0.0
+
+	def _contexto_ssl(self):
+		"""
+		Obtiene el contexto SSL compartido, creándolo la primera vez.
+
+		El contexto verifica los certificados de los servidores, ya que muchas peticiones llevan las
+		claves de API del usuario.
+
+		:return: El contexto SSL.
+		"""
+		with self._lock:
+			if self._contexto is None:
+				self._contexto = ssl.create_default_context()
+			return self._contexto
+
+	def proxy(self, url):
+		"""
+		Indica si una URL debe pedirse a través de un proxy configurado en el sistema.
+
+		Los proxies se leen de las variables de entorno y del registro de Windows, como hace urllib,
+		y se vuelven a leer cada minuto para notar los cambios sin consultar el registro en cada petición.
+
+		:param url: URL de la petición.
+		:return: True si hay un proxy para la URL, False en caso contrario.
+		"""
+		ahora = time.monotonic()
+		with self._lock:
+			if self._proxies is None or ahora - self._momento_proxies > 60:
+				self._proxies = urllib.request.getproxies()
+				self._momento_proxies = ahora
+			proxies = self._proxies
+		partes = urllib.parse.urlsplit(url)
+		if partes.scheme.lower() not in proxies:
+			return False
+		try:
+			return not urllib.request.proxy_bypass(partes.hostname)
+		except Exception:
+			return True
+
+	def solicitar_proxy(self, metodo, url, cuerpo=None, cabeceras=None, timeout=None):
+		"""
+		Realiza una petición con urllib, que sabe usar los proxies del sistema.
+
+		Las conexiones a través de un proxy no se guardan en el pool; urllib sigue las redirecciones
+		y lanza urllib.error.HTTPError para los códigos de error.
+
+		:param metodo: Método HTTP.
+		:param url: URL completa.
+		:param cuerpo: Cuerpo de la petición en bytes (opcional).
+		:param cabeceras: Diccionario de cabeceras (opcional).
+		:param timeout: Tiempo máximo de espera en segundos (opcional).
+		:return: Un objeto RespuestaHTTP.
+		:raises urllib.error.URLError: Si no se puede completar la petición.
+		"""
+		comprobar_vigencia()
+		solicitud = urllib.request.Request(url, data=cuerpo, headers=cabeceras or {}, method=metodo)
+		timeout = self.timeout if timeout is None else timeout
+		inicio = time.monotonic()
+		try:
+			with urllib.request.urlopen(solicitud, timeout=timeout, context=self._contexto_ssl()) as respuesta:
+				datos = respuesta.read()
+				self._notificar(True)
+				_anotar_peticion(time.monotonic() - inicio)
+				return RespuestaHTTP(respuesta.url, respuesta.status, respuesta.reason, respuesta.headers, datos)
+		except urllib.error.HTTPError:
+			self._notificar(True)
+			_anotar_peticion(time.monotonic() - inicio)
+			raise
+		except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+			self._notificar(False)
+			_anotar_peticion(time.monotonic() - inicio)
+			anotar_fallo()
+			if isinstance(e, urllib.error.URLError):
+				raise
+			raise urllib.error.URLError(e)
+
+	def _semaforo(self, clave):
+		"""
+		Obtiene el semáforo que limita las conexiones simultáneas a un servidor.
+
+		:param clave: Tupla (esquema, servidor, puerto).
+		:return: El semáforo del servidor.
+		"""
+		with self._lock:
+			semaforo = self._semaforos.get(clave)
+			if semaforo is None:
+				semaforo = threading.BoundedSemaphore(self.max_por_host)
+				self._semaforos[clave] = semaforo
+			return semaforo
+
+	def _obtener(self, clave, timeout):
+		"""
+		Obtiene una conexión libre al servidor o crea una nueva.
+
+		:param clave: Tupla (esquema, servidor, puerto).
+		:param timeout: Tiempo máximo de espera en segundos.
+		:return: Tupla con la conexión y si es reutilizada.
+		"""
+		ahora = time.monotonic()
+		with self._lock:
+			libres = self._libres.get(clave, [])
+			while libres:
+				conexion, momento = libres.pop()
+				if ahora - momento < self.max_inactividad:
+					conexion.timeout = timeout
+					if conexion.sock is not None:
+						conexion.sock.settimeout(timeout)
+					return conexion, True
+				conexion.close()
+		esquema, host, puerto = clave
+		if esquema == "https":
+			return _ConexionHTTPS(host, puerto, timeout, self._contexto_ssl(), self._sesiones), False
+		return http.client.HTTPConnection(host, puerto, timeout=timeout), False
+
+	def _devolver(self, clave, conexion, respuesta):
+		"""
+		Devuelve una conexión al pool si el servidor permite mantenerla abierta.
+
+		:param clave: Tupla (esquema, servidor, puerto).
+		:param conexion: La conexión usada.
+		:param respuesta: La respuesta ya leída.
+		"""
+		sesion = getattr(conexion.sock, "session", None)
+		if sesion is not None:
+			self._sesiones[(conexion.host, conexion.port)] = sesion
+		if respuesta.will_close:
+			conexion.close()
+			return
+		with self._lock:
+			libres = self._libres.setdefault(clave, [])
+			if len(libres) < self.max_por_host:
+				libres.append((conexion, time.monotonic()))
+				return
+		conexion.close()
+
+	def solicitar(self, metodo, url, cuerpo=None, cabeceras=None, timeout=None):
+		"""
+		Realiza una petición HTTP usando una conexión del pool.
+
+		:param metodo: Método HTTP.
+		:param url: URL completa.
+		:param cuerpo: Cuerpo de la petición en bytes (opcional).
+		:param cabeceras: Diccionario de cabeceras (opcional).
+		:param timeout: Tiempo máximo de espera en segundos (opcional).
+		:return: Un objeto RespuestaHTTP.
+		:raises urllib.error.URLError: Si no se puede completar la petición.
+		:raises PeticionAbandonada: Si la llamada en curso ya no es necesaria.
+		"""
+		partes = urllib.parse.urlsplit(url)
+		esquema = partes.scheme.lower()
+		puerto = partes.port or (443 if esquema == "https" else 80)
+		clave = (esquema, partes.hostname, puerto)
+		ruta = (partes.path or "/") + ("?" + partes.query if partes.query else "")
+		timeout = self.timeout if timeout is None else timeout
+
+		semaforo = self._semaforo(clave)
+		# Una petición que ya no hace falta no ocupa una conexión que espera la voz actual
+		comprobar_vigencia()
+		semaforo.acquire()
+		try:
+			for intento in range(2):
+				conexion, reutilizada = self._obtener(clave, timeout)
+				inicio = time.monotonic()
+				try:
+					conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras or {})
+					respuesta = conexion.getresponse()
+					datos = respuesta.read()
+				except (http.client.HTTPException, OSError) as e:
+					conexion.close()
+					if reutilizada and intento == 0:
+						# El servidor pudo cerrar la conexión reutilizada; se reintenta con una nueva
+						continue
+					self._notificar(False)
+					_anotar_peticion(time.monotonic() - inicio)
+					anotar_fallo()
+					raise urllib.error.URLError(e)
+				self._notificar(True)
+				_anotar_peticion(time.monotonic() - inicio)
+				self._devolver(clave, conexion, respuesta)
+				return RespuestaHTTP(url, respuesta.status, respuesta.reason, respuesta.headers, datos)
+		finally:
+			semaforo.release()
+
+	def _notificar(self, correcto):
+		"""
+		Comunica el resultado de una petición a la función registrada en al_resultado.
+
+		Cualquier respuesta del servidor, aunque sea un error HTTP, indica que hay red.
+
+		:param correcto: True si el servidor respondió, False si falló la conexión.
+		"""
+		if self.al_resultado is not None:
+			try:
+				self.al_resultado(correcto)
+			except Exception:
+				pass
+
+	def cerrar(self):
+		"""
+		Cierra todas las conexiones libres del pool.
+		"""
+		with self._lock:
+			for libres in self._libres.values():
+				for conexion, momento in libres:
+					conexion.close()
+			self._libres.clear()
+
+# Pool compartido por todo el complemento
+pool = PoolConexiones()
+
+class RegistroPeticiones:
+	"""
+	Resultado de las peticiones hechas durante una llamada a un servicio de traducción.
+
+	Los módulos de traducción suelen capturar sus errores y devolver el texto original, así que el
+	fallo de una llamada se conoce por las peticiones que han fallado mientras se hacía. Cada llamada
+	tiene su propio registro y las peticiones que otros hilos hacen a la vez no se mezclan con él.
+
+	La latencia es el tiempo de red de la petición más lenta, sin contar la espera por una conexión
+	libre del pool ni por el limitador de peticiones, y sin sumar los fragmentos de un texto largo.
+
+	Si el registro tiene una función de vigencia, las peticiones se abandonan antes de ocupar una
+	conexión o una ficha del limitador cuando el resultado ya no se necesita (la voz se ha cancelado).
+	"""
+	def __init__(self, vigente=None):
+		"""
+		Inicializa el registro vacío.
+
+		:param vigente: Función opcional sin argumentos que devuelve False cuando la llamada ya no es necesaria.
+		"""
+		self._lock = threading.Lock()
+		self.vigente = vigente
+		self.peticiones = 0
+		self.fallos = 0
+		self.latencia = 0.0
+		self.abandonada = False
+
+	def peticion(self, duracion):
+		"""
+		Anota una petición terminada.
+
+		:param duracion: Segundos desde que se envió la petición hasta que se leyó la respuesta.
+		"""
+		with self._lock:
+			self.peticiones += 1
+			self.latencia = max(self.latencia, duracion)
+
+	def fallo(self):
+		"""
+		Anota una petición fallida.
+		"""
+		with self._lock:
+			self.fallos += 1
+
+# Registro de la llamada en curso en cada hilo
+_local = threading.local()
+
+def registro_actual():
+	"""
+	Obtiene el registro de peticiones de la llamada que se está haciendo en este hilo.
+
+	:return: El registro o None si no hay ninguno.
+	"""
+	return getattr(_local, "registro", None)
+
+@contextmanager
+def usar_registro(registro):
+	"""
+	Anota en un registro las peticiones hechas por este hilo dentro del bloque.
+
+	Los traductores que piden los fragmentos desde sus propios hilos lo usan con el registro que
+	obtienen con registro_actual() en el hilo que los crea.
+
+	:param registro: El registro de peticiones o None.
+	"""
+	anterior = registro_actual()
+	_local.registro = registro
+	try:
+		yield registro
+	finally:
+		_local.registro = anterior
+
+def registrar_peticiones():
+	"""
+	Crea un registro nuevo para las peticiones hechas por este hilo dentro del bloque.
+
+	El registro nuevo conserva la función de vigencia del registro que hubiera en el hilo.
+
+	:return: Gestor de contexto que devuelve el registro.
+	"""
+	anterior = registro_actual()
+	return usar_registro(RegistroPeticiones(anterior.vigente if anterior is not None else None))
+
+def usar_vigencia(vigente):
+	"""
+	Abandona las peticiones hechas por este hilo dentro del bloque cuando dejan de ser necesarias.
+
+	:param vigente: Función sin argumentos que devuelve False cuando el resultado ya no se necesita.
+	:return: Gestor de contexto que devuelve el registro.
+	"""
+	return usar_registro(RegistroPeticiones(vigente))
+
+class PeticionAbandonada(BaseException):
+	"""
+	Error que se lanza en lugar de hacer una petición cuyo resultado ya no se necesita.
+
+	Como asyncio.CancelledError, deriva de BaseException para que los traductores no lo capturen
+	con sus "except Exception", ni lo registren como un error ni como un fallo del servicio.
+	"""
+	def __init__(self):
+		"""
+		Inicializa el error.
+		"""
+		super().__init__("Petición abandonada")
+
+def comprobar_vigencia():
+	"""
+	Comprueba que la llamada en curso en este hilo sigue siendo necesaria.
+
+	:raises PeticionAbandonada: Si la función de vigencia del registro indica que ya no lo es.
+	"""
+	registro = registro_actual()
+	if registro is not None and registro.vigente is not None and not registro.vigente():
+		registro.abandonada = True
+		raise PeticionAbandonada()
+
+def _anotar_peticion(duracion):
+	"""
+	Anota una petición terminada en el registro de la llamada en curso, si lo hay.
+
+	:param duracion: Segundos de red de la petición.
+	"""
+	registro = registro_actual()
+	if registro is not None:
+		registro.peticion(duracion)
+
+def anotar_fallo():
+	"""
+	Anota una petición fallida en el registro de la llamada en curso, si lo hay.
+
+	Los módulos de traducción lo llaman cuando capturan un error y devuelven el texto original,
+	por ejemplo si la respuesta no tiene el formato esperado, para que la llamada no se tome por buena.
+	"""
+	registro = registro_actual()
+	if registro is not None:
+		registro.fallo()
+
+_USER_AGENT = "Python-urllib/{}.{}".format(*sys.version_info[:2])
+# Códigos HTTP que indican que el servicio rechaza las peticiones (además de los 5xx)
+_ESTADOS_FALLO = (401, 403, 408, 429)
+# Redirecciones que se siguen antes de dar la petición por fallida
+_MAX_REDIRECCIONES = 5
+
+def urlopen(solicitud, data=None, timeout=None):
+	"""
+	Sustituto de urllib.request.urlopen que realiza la petición a través del pool compartido.
+
+	Acepta una URL o un objeto urllib.request.Request, sigue las redirecciones y lanza
+	urllib.error.HTTPError para los códigos de error, igual que urllib. Si el sistema tiene un proxy
+	configurado para la URL la petición se hace con urllib.
+
+	:param solicitud: URL o objeto urllib.request.Request.
+	:param data: Cuerpo de la petición si solicitud es una URL (opcional).
+	:param timeout: Tiempo máximo de espera en segundos (opcional).
+	:return: Un objeto RespuestaHTTP.
+	"""
+	if isinstance(solicitud, urllib.request.Request):
+		url = solicitud.full_url
+		cuerpo = solicitud.data
+		metodo = solicitud.get_method()
+		cabeceras = dict(solicitud.header_items())
+	else:
+		url = solicitud
+		cuerpo = data
+		metodo = "POST" if data is not None else "GET"
+		cabeceras = {}
+	nombres = {nombre.lower() for nombre in cabeceras}
+	if "user-agent" not in nombres:
+		cabeceras["User-Agent"] = _USER_AGENT
+	if cuerpo is not None and "content-type" not in nombres:
+		cabeceras["Content-Type"] = "application/x-www-form-urlencoded"
+
+	if pool.proxy(url):
+		try:
+			return pool.solicitar_proxy(metodo, url, cuerpo, cabeceras, timeout)
+		except urllib.error.HTTPError as e:
+			if e.code >= 500 or e.code in _ESTADOS_FALLO:
+				anotar_fallo()
+			raise
+
+	for redireccion in range(_MAX_REDIRECCIONES + 1):
+		respuesta = pool.solicitar(metodo, url, cuerpo, cabeceras, timeout)
+		if respuesta.status in (301, 302, 303, 307, 308) and respuesta.getheader("Location"):
+			if redireccion == _MAX_REDIRECCIONES:
+				raise urllib.error.HTTPError(url, respuesta.status, "Demasiadas redirecciones", respuesta.headers, io.BytesIO(respuesta.read()))
+			url = urllib.parse.urljoin(url, respuesta.getheader("Location"))
+			if respuesta.status == 303 or (respuesta.status in (301, 302) and metodo == "POST"):
+				metodo = "GET"
+				cuerpo = None
+			continue
+		break
+	if respuesta.status >= 400:
+		if respuesta.status >= 500 or respuesta.status in _ESTADOS_FALLO:
+			anotar_fallo()
+		raise urllib.error.HTTPError(url, respuesta.status, respuesta.reason, respuesta.headers, io.BytesIO(respuesta.read()))
+	return respuesta
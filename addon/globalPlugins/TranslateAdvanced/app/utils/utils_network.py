@@ -4,7 +4,6 @@
 #
 # Carga NVDA
 import addonHandler
-import logHandler
 # Carga Python
 import ctypes
 import ctypes.wintypes
@@ -12,6 +11,10 @@ import ssl
 import urllib.request
 import urllib.error
 import socket
+import threading
+import time
+# Carga personal
+from .utils_http import pool
 
 # Carga traducción
 addonHandler.initTranslation()
@@ -129,17 +132,130 @@ def descripcion_error(e):
 
 ### Fin certificados
 
+class MonitorConexion:
+	"""
+	Clase que mantiene en memoria el estado de la conexión a Internet.
+
+	Un hilo en segundo plano comprueba la conexión abriendo un socket a un servidor externo. Mientras
+	no hay conexión repite la comprobación con esperas crecientes y, con conexión, solo la repite si
+	hace tiempo que no se ha hecho ninguna petición. El pool HTTP comunica además el resultado de cada
+	petición real: una respuesta confirma la conexión y un fallo adelanta la siguiente comprobación.
+	Así consultar el estado no bloquea nunca.
+	"""
+	# Servidor al que se conecta la comprobación (servidor DNS público de Google)
+	servidor = ("8.8.8.8", 53)
+	# Segundos de espera de cada comprobación
+	timeout = 3
+	# Segundos sin actividad tras los que se vuelve a comprobar una conexión que funciona
+	intervalo = 60
+	# Esperas mínima y máxima en segundos entre comprobaciones mientras no hay conexión
+	espera_minima = 2
+	espera_maxima = 300
+
+	def __init__(self):
+		"""
+		Inicializa el monitor. Hasta la primera comprobación se supone que hay conexión.
+		"""
+		self._conectado = True
+		self._espera = self.espera_minima
+		self._actividad = 0.0
+		self._ultima_comprobacion = 0.0
+		self._dudoso = False
+		self._despertar = threading.Event()
+		self._parada = threading.Event()
+		self._hilo = None
+
+	def iniciar(self):
+		"""
+		Arranca el hilo de comprobación y empieza a recibir los resultados del pool HTTP.
+		"""
+		if self._hilo is not None:
+			return
+		self._parada.clear()
+		pool.al_resultado = self.notificar
+		self._hilo = threading.Thread(target=self._bucle, daemon=True)
+		self._hilo.start()
+
+	def terminar(self):
+		"""
+		Detiene el hilo de comprobación.
+		"""
+		pool.al_resultado = None
+		self._parada.set()
+		self._despertar.set()
+		self._hilo = None
+
+	def en_linea(self):
+		"""
+		Indica si hay conexión a Internet según el último estado conocido.
+
+		Si no hay conexión se adelanta la siguiente comprobación, para notar pronto que ha vuelto.
+
+		:return: True si hay conexión a Internet, False si no.
+		"""
+		if not self._conectado and time.monotonic() - self._ultima_comprobacion >= self.espera_minima:
+			self._despertar.set()
+		return self._conectado
+
+	def notificar(self, correcto):
+		"""
+		Recibe el resultado de una petición real.
+
+		:param correcto: True si el servidor respondió, False si falló la conexión.
+		"""
+		self._actividad = time.monotonic()
+		if correcto:
+			self._conectado = True
+			self._espera = self.espera_minima
+		elif self._conectado:
+			# Puede fallar solo ese servidor; se confirma con una comprobación
+			self._dudoso = True
+			self._despertar.set()
+
+	def comprobar(self):
+		"""
+		Comprueba la conexión abriendo un socket al servidor externo.
+
+		:return: True si hay conexión a Internet, False si no.
+		"""
+		try:
+			with socket.create_connection(self.servidor, timeout=self.timeout):
+				return True
+		except OSError:
+			return False
+
+	def _bucle(self):
+		"""
+		Bucle del hilo de comprobación.
+		"""
+		while not self._parada.is_set():
+			if self._conectado and not self._dudoso and time.monotonic() - self._actividad < self.intervalo:
+				# Las peticiones recientes ya confirman la conexión
+				espera = self.intervalo - (time.monotonic() - self._actividad)
+			else:
+				self._dudoso = False
+				self._ultima_comprobacion = time.monotonic()
+				self._conectado = self.comprobar()
+				if self._conectado:
+					self._actividad = time.monotonic()
+					self._espera = self.espera_minima
+					espera = self.intervalo
+				else:
+					espera = self._espera
+					self._espera = min(self._espera * 2, self.espera_maxima)
+			self._despertar.wait(espera)
+			self._despertar.clear()
+
+# Monitor compartido por todo el complemento
+monitor = MonitorConexion()
+
 def check_internet_connection():
 	"""
-	Comprueba si hay conexión a Internet intentando conectar a un host externo.
+	Comprueba si hay conexión a Internet.
+
+	Devuelve el estado que mantiene el monitor de conexión, sin esperar a la red.
 	
 	Returns:
 		bool: True si hay conexión a Internet, False si no.
 	"""
-	try:
-		# Intentar conectar a un host externo (8.8.8.8 es un servidor DNS público de Google)
-		socket.create_connection(("8.8.8.8", 53), timeout=5)
-		return True
-	except OSError:
-		pass
-	return False
+	return monitor.en_linea()
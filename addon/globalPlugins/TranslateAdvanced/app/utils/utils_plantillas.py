@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import re
+
+# Números enteros o con separadores de miles, decimales u horas
+_NUMERO = re.compile(r"\d+(?:[.,:]\d+)*")
+# Marcadores de posición; usan caracteres de uso privado que no aparecen en textos reales
+_MARCADOR = re.compile("\ue000(\\d+)\ue001")
+
+def _marcador(indice):
+	"""
+	Obtiene el marcador de posición de un valor.
+
+	:param indice: Posición del valor en el texto original.
+	:return: El marcador de posición.
+	"""
+	return "\ue000{}\ue001".format(indice)
+
+def enmascarar(texto):
+	"""
+	Sustituye los números de un texto por marcadores de posición.
+
+	:param texto: El texto original, por ejemplo "3 de 17".
+	:return: Tupla con la plantilla y la lista de valores sustituidos, por ejemplo ("\\ue0000\\ue001 de \\ue0001\\ue001", ["3", "17"]).
+	"""
+	valores = []
+	def sustituir(m):
+		valores.append(m.group(0))
+		return _marcador(len(valores) - 1)
+	return _NUMERO.sub(sustituir, texto), valores
+
+def derivar_plantilla(traduccion, valores):
+	"""
+	Obtiene la plantilla de una traducción a partir de los valores del texto original.
+
+	Cada número de la traducción se asocia al mismo valor del texto original, aunque el orden cambie.
+	Si la traducción no contiene exactamente los mismos números no se puede obtener la plantilla.
+
+	:param traduccion: El texto traducido.
+	:param valores: Los valores obtenidos al enmascarar el texto original.
+	:return: La traducción con marcadores de posición o None si no coinciden los números.
+	"""
+	libres = list(enumerate(valores))
+	partes = []
+	ultimo = 0
+	for m in _NUMERO.finditer(traduccion):
+		for posicion, (indice, valor) in enumerate(libres):
+			if valor == m.group(0):
+				break
+		else:
+			return None
+		del libres[posicion]
+		partes.append(traduccion[ultimo:m.start()])
+		partes.append(_marcador(indice))
+		ultimo = m.end()
+	if libres:
+		return None
+	partes.append(traduccion[ultimo:])
+	return "".join(partes)
+
+def rellenar(plantilla, valores):
+	"""
+	Sustituye los marcadores de posición de una plantilla por sus valores.
+
+	:param plantilla: La plantilla con marcadores de posición.
+	:param valores: Los valores en el orden del texto original.
+	:return: El texto con los valores o None si la plantilla no corresponde a los valores.
+	"""
+	try:
+		return _MARCADOR.sub(lambda m: valores[int(m.group(1))], plantilla)
+	except IndexError:
+		return None
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import time
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+class SingleFlight:
+	"""
+	Registro de peticiones en curso que agrupa las llamadas idénticas simultáneas.
+
+	La primera llamada con una clave ejecuta la función. Las llamadas que llegan con la misma
+	clave mientras la primera sigue en curso esperan a su resultado en lugar de repetir el trabajo.
+	"""
+	def __init__(self, reintentar=()):
+		"""
+		Inicializa el registro vacío.
+
+		:param reintentar: Tupla de excepciones de la primera llamada tras las que las que esperan
+			vuelven a intentarlo en lugar de recibir el error, porque solo afectan a quien la hizo.
+		"""
+		self._lock = threading.Lock()
+		self._en_vuelo = {}
+		self.reintentar = reintentar
+
+	def ejecutar(self, clave, funcion, *args, **kwargs):
+		"""
+		Ejecuta la función o espera al resultado de la ejecución en curso con la misma clave.
+
+		:param clave: Clave que identifica la petición.
+		:param funcion: Función a ejecutar.
+		:return: El resultado de la función.
+		"""
+		while True:
+			with self._lock:
+				futuro = self._en_vuelo.get(clave)
+				propietario = futuro is None
+				if propietario:
+					futuro = Future()
+					self._en_vuelo[clave] = futuro
+			if propietario:
+				break
+			try:
+				return futuro.result()
+			except self.reintentar:
+				continue
+
+		try:
+			resultado = funcion(*args, **kwargs)
+		except BaseException as e:
+			with self._lock:
+				self._en_vuelo.pop(clave, None)
+			futuro.set_exception(e)
+			raise
+		with self._lock:
+			self._en_vuelo.pop(clave, None)
+		futuro.set_result(resultado)
+		return resultado
+
+class LimitadorTasa:
+	"""
+	Limitador de peticiones por cubo de fichas.
+
+	Permite ráfagas de hasta `rafaga` peticiones y después una media de `tasa` peticiones por segundo.
+	Es seguro entre hilos, por lo que varios hilos pueden compartir el mismo limitador.
+	"""
+	def __init__(self, tasa, rafaga):
+		"""
+		Inicializa el limitador con el cubo lleno.
+
+		:param tasa: Peticiones por segundo permitidas de media.
+		:param rafaga: Número máximo de peticiones seguidas sin esperar.
+		"""
+		self.tasa = tasa
+		self.rafaga = rafaga
+		self._fichas = rafaga
+		self._ultimo = time.monotonic()
+		self._lock = threading.Lock()
+
+	def adquirir(self, evento_parada=None):
+		"""
+		Espera hasta que haya una ficha disponible y la consume.
+
+		:param evento_parada: Evento opcional que interrumpe la espera al activarse.
+		:return: True si se obtuvo la ficha, False si la espera se interrumpió.
+		"""
+		while True:
+			with self._lock:
+				ahora = time.monotonic()
+				self._fichas = min(self.rafaga, self._fichas + (ahora - self._ultimo) * self.tasa)
+				self._ultimo = ahora
+				if self._fichas >= 1:
+					self._fichas -= 1
+					return True
+				espera = (1 - self._fichas) / self.tasa
+			if evento_parada is None:
+				time.sleep(espera)
+			elif evento_parada.wait(espera):
+				return False
+
+class InterruptorCircuito:
+	"""
+	Interruptor de circuito que deja de usar un servicio que falla o responde demasiado lento.
+
+	Cerrado: las llamadas pasan y se anota si cada una ha ido mal (error o latencia excesiva) en una
+	ventana de las últimas llamadas. Si la proporción de llamadas malas supera el umbral se abre.
+	Abierto: las llamadas se rechazan sin intentarlas hasta que pasa el tiempo de espera.
+	Semiabierto: se deja pasar una sola llamada de prueba; si va bien se cierra y si no se vuelve
+	a abrir con el doble de espera.
+
+	Cada llamada permitida se registra con registrar() o, si se abandona, se anula con liberar().
+	"""
+	CERRADO = "cerrado"
+	ABIERTO = "abierto"
+	SEMIABIERTO = "semiabierto"
+
+	def __init__(self, ventana=20, minimo=5, umbral=0.5, latencia_maxima=6.0, espera=30.0, espera_maxima=600.0):
+		"""
+		Inicializa el interruptor cerrado.
+
+		:param ventana: Número de llamadas recientes que se tienen en cuenta.
+		:param minimo: Llamadas mínimas en la ventana antes de poder abrirse.
+		:param umbral: Proporción de llamadas malas que abre el interruptor.
+		:param latencia_maxima: Segundos de red a partir de los que una llamada correcta cuenta como mala.
+		:param espera: Segundos que permanece abierto la primera vez.
+		:param espera_maxima: Segundos máximos que permanece abierto.
+		"""
+		self.minimo = minimo
+		self.umbral = umbral
+		self.latencia_maxima = latencia_maxima
+		self.espera_inicial = espera
+		self.espera_maxima = espera_maxima
+		self._lock = threading.Lock()
+		self._resultados = deque(maxlen=ventana)
+		self._estado = self.CERRADO
+		self._espera = espera
+		self._reintento = 0.0
+		self._prueba = False
+
+	@property
+	def estado(self):
+		"""
+		Obtiene el estado del interruptor.
+
+		:return: CERRADO, ABIERTO o SEMIABIERTO.
+		"""
+		return self._estado
+
+	def permitir(self):
+		"""
+		Indica si se puede llamar al servicio. Cada llamada permitida debe registrarse después.
+
+		:return: True si la llamada puede hacerse, False si el servicio se considera caído.
+		"""
+		with self._lock:
+			if self._estado == self.CERRADO:
+				return True
+			if self._estado == self.ABIERTO:
+				if time.monotonic() < self._reintento:
+					return False
+				self._estado = self.SEMIABIERTO
+				self._prueba = False
+			if self._prueba:
+				return False
+			self._prueba = True
+			return True
+
+	def registrar(self, correcto, latencia):
+		"""
+		Registra el resultado de una llamada permitida.
+
+		:param correcto: True si el servicio respondió sin errores.
+		:param latencia: Segundos de red de la petición más lenta de la llamada.
+		:return: True si el interruptor acaba de abrirse por esta llamada.
+		"""
+		mala = not correcto or latencia > self.latencia_maxima
+		with self._lock:
+			if self._estado == self.SEMIABIERTO:
+				self._prueba = False
+				if mala:
+					self._abrir()
+				else:
+					self._estado = self.CERRADO
+					self._resultados.clear()
+					self._espera = self.espera_inicial
+				return False
+			if self._estado == self.ABIERTO:
+				return False
+			self._resultados.append(mala)
+			if len(self._resultados) >= self.minimo and sum(self._resultados) >= self.umbral * len(self._resultados):
+				self._abrir()
+				return True
+			return False
+
+	def _abrir(self):
+		"""
+		Abre el interruptor y duplica la espera para la siguiente vez.
+		"""
+		self._estado = self.ABIERTO
+		self._reintento = time.monotonic() + self._espera
+		self._espera = min(self._espera * 2, self.espera_maxima)
+		self._resultados.clear()
+
+	def liberar(self):
+		"""
+		Anula una llamada permitida que se ha abandonado sin saber si el servicio funciona.
+
+		Si era la llamada de prueba del estado semiabierto se deja pasar otra.
+		"""
+		with self._lock:
+			if self._estado == self.SEMIABIERTO:
+				self._prueba = False
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Configuración de las pruebas. Los módulos probados solo necesitan de NVDA la traducción de
+# cadenas y el registro, que aquí se sustituyen por versiones mínimas.
+#
+# Carga Python
+import os
+import sys
+import types
+import builtins
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "addon", "globalPlugins", "TranslateAdvanced"))
+
+if "addonHandler" not in sys.modules:
+	sys.modules["addonHandler"] = types.SimpleNamespace(initTranslation=lambda: setattr(builtins, "_", lambda texto: texto))
+	builtins._ = lambda texto: texto
+if "logHandler" not in sys.modules:
+	_registro = types.SimpleNamespace(error=lambda *args, **kwargs: None, warning=lambda *args, **kwargs: None, info=lambda *args, **kwargs: None, debug=lambda *args, **kwargs: None)
+	sys.modules["logHandler"] = types.SimpleNamespace(log=_registro)
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import os
+# Carga personal
+from app.managers.managers_backends import obtener_servicio
+from app.managers.managers_cache import AlmacenCache, CacheTraducciones
+
+def test_clave_particion_sin_origen():
+	"""
+	Un servicio de respaldo que detecta el idioma se guarda en la caché con el origen "auto".
+	"""
+	microsoft = obtener_servicio(7)
+	assert microsoft.elige_origen
+	assert microsoft.clave_particion(None, "es") == (7, "auto", "es")
+	assert microsoft.clave_particion("en", "es") == (7, "en", "es")
+
+def test_respaldo_se_guarda_en_disco(tmp_path):
+	"""
+	Las traducciones de un servicio de respaldo sin idioma de origen se pueden escribir en el almacén.
+	"""
+	almacen = AlmacenCache(os.path.join(str(tmp_path), "cache.sqlite3"))
+	almacen.abrir()
+	cache = CacheTraducciones()
+	particion = ("notepad",) + obtener_servicio(7).clave_particion(None, "es")
+	cache.guardar(particion, "Hello", "Hola")
+	cache.guardar(particion, "Bye", "Adiós")
+	assert almacen.insertar(cache.extraer_pendientes()) == 2
+	assert cache.num_pendientes() == 0
+	assert dict((texto, traduccion) for texto, traduccion, usado in almacen.cargar(particion, 10)) == {"Hello": "Hola", "Bye": "Adiós"}
+	almacen.cerrar()
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import os
+import time
+import types
+import threading
+import pytest
+# Carga personal
+from app.managers.managers_cache import AlmacenCache, CacheTraducciones, LocalCacheHandler
+
+PARTICION = ("notepad", 2, "auto", "es")
+OTRA = ("winword", 2, "auto", "es")
+
+@pytest.fixture
+def almacen(tmp_path):
+	almacen = AlmacenCache(os.path.join(str(tmp_path), "cache.sqlite3"))
+	almacen.abrir()
+	yield almacen
+	almacen.cerrar()
+
+def test_guardar_y_obtener():
+	cache = CacheTraducciones()
+	assert cache.guardar(PARTICION, "Open", "Abrir")
+	assert cache.obtener(PARTICION, "Open") == "Abrir"
+	assert cache.obtener(OTRA, "Open") is None
+	assert cache.num_pendientes() == 1
+
+def test_admision_prefiere_los_textos_frecuentes():
+	"""
+	Con la caché llena, un texto nuevo solo desplaza a otro si se ha pedido más veces.
+	"""
+	cache = CacheTraducciones(max_entradas=2)
+	cache.guardar(PARTICION, "a", "A")
+	cache.guardar(PARTICION, "b", "B")
+	assert cache.guardar(PARTICION, "c", "C") is False
+	for i in range(3):
+		cache.obtener(PARTICION, "c")
+	assert cache.guardar(PARTICION, "c", "C") is True
+	assert len(cache) == 2
+	assert cache.obtener(PARTICION, "a") is None
+	assert cache.obtener(PARTICION, "c") == "C"
+
+def test_admision_rechaza_textos_demasiado_grandes():
+	cache = CacheTraducciones(max_bytes=8 * 1024)
+	assert cache.guardar(PARTICION, "x" * 1000, "y" * 1000) is False
+	assert cache.guardar(PARTICION, "corto", "breve") is True
+
+def test_identidad_caduca():
+	cache = CacheTraducciones(ttl_identidad=0.05)
+	assert cache.guardar(PARTICION, "NVDA", "NVDA")
+	assert cache.posible_identidad(PARTICION, "NVDA")
+	assert cache.obtener(PARTICION, "NVDA") == "NVDA"
+	time.sleep(0.1)
+	assert cache.obtener(PARTICION, "NVDA") is None
+
+def test_identidad_caducada_o_desactivada_no_se_guarda():
+	assert CacheTraducciones(ttl_identidad=0).guardar(PARTICION, "NVDA", "NVDA") is False
+	cache = CacheTraducciones(ttl_identidad=60)
+	assert cache.guardar(PARTICION, "NVDA", "NVDA", momento=time.time() - 120) is False
+	assert cache.guardar(PARTICION, "NVDA", "NVDA", momento=time.time() - 30) is True
+
+def test_descargar_particion_conserva_las_pendientes():
+	cache = CacheTraducciones()
+	cache.guardar(PARTICION, "Open", "Abrir", pendiente=False)
+	cache.guardar(PARTICION, "Close", "Cerrar")
+	cache.descargar_particion(PARTICION)
+	assert cache.obtener(PARTICION, "Open") is None
+	assert cache.obtener(PARTICION, "Close") == "Cerrar"
+
+def test_borrar_particiones():
+	cache = CacheTraducciones()
+	cache.guardar(PARTICION, "Open", "Abrir")
+	cache.guardar(OTRA, "Open", "Abrir")
+	cache.borrar_particiones(lambda particion: particion[0] == "notepad")
+	assert cache.obtener(PARTICION, "Open") is None
+	assert cache.obtener(OTRA, "Open") == "Abrir"
+	assert [pendiente[0] for pendiente in cache.extraer_pendientes()] == [OTRA]
+
+def test_almacen_persiste_entre_aperturas(almacen):
+	cache = CacheTraducciones()
+	cache.guardar(PARTICION, "Open", "Abrir")
+	cache.guardar(OTRA, "Close", "Cerrar")
+	assert almacen.insertar(cache.extraer_pendientes()) == 2
+	almacen.cerrar()
+	almacen.abrir()
+	assert almacen.buscar(PARTICION, "Open")[0] == "Abrir"
+	assert almacen.buscar(PARTICION, "Close") is None
+	assert [fila[:2] for fila in almacen.cargar(OTRA, 10)] == [("Close", "Cerrar")]
+
+def test_almacen_carga_las_mas_usadas(almacen):
+	almacen.insertar([(PARTICION, "viejo", "old")])
+	time.sleep(0.01)
+	almacen.insertar([(PARTICION, "nuevo", "new")])
+	assert [fila[0] for fila in almacen.cargar(PARTICION, 1)] == ["nuevo"]
+	time.sleep(0.01)
+	assert almacen.marcar_usadas([(PARTICION, "viejo")]) == 1
+	assert [fila[0] for fila in almacen.cargar(PARTICION, 1)] == ["viejo"]
+
+def test_almacen_borrar(almacen):
+	almacen.insertar([(PARTICION, "Open", "Abrir"), (OTRA, "Open", "Abrir")])
+	assert almacen.borrar(app="notepad") == 1
+	assert almacen.borrar() == 1
+
+def _manejador(tmp_path):
+	"""
+	Crea un manejador de la caché local con los ajustes mínimos que usa.
+	"""
+	settings = types.SimpleNamespace(dir_cache=str(tmp_path), _translationCache=CacheTraducciones())
+	registro = types.SimpleNamespace(error=lambda *args: None)
+	manejador = LocalCacheHandler(settings, types.SimpleNamespace(log=registro))
+	manejador.loadLocalCache()
+	return manejador
+
+def test_cargar_particion(tmp_path):
+	manejador = _manejador(tmp_path)
+	manejador.almacen.insertar([(PARTICION, "Open", "Abrir")])
+	manejador.loadPartition(PARTICION)
+	assert manejador.settings._translationCache.obtener(PARTICION, "Open") == "Abrir"
+	manejador.closeStore()
+
+def test_cargar_particion_espera_la_carga_en_curso(tmp_path, monkeypatch):
+	"""
+	Quien pide una partición que otro hilo está cargando encuentra sus traducciones en memoria.
+	"""
+	manejador = _manejador(tmp_path)
+	manejador.almacen.insertar([(PARTICION, "Open", "Abrir")])
+	cargar = manejador.almacen.cargar
+	empezada = threading.Event()
+	def cargar_lento(*args):
+		empezada.set()
+		time.sleep(0.2)
+		return cargar(*args)
+	monkeypatch.setattr(manejador.almacen, "cargar", cargar_lento)
+	hilo = threading.Thread(target=manejador.loadPartition, args=(PARTICION,))
+	hilo.start()
+	empezada.wait(2)
+	manejador.loadPartition(PARTICION)
+	assert manejador.settings._translationCache.obtener(PARTICION, "Open") == "Abrir"
+	hilo.join(2)
+	manejador.closeStore()
+
+def test_guardar_cache_local(tmp_path):
+	manejador = _manejador(tmp_path)
+	manejador.settings._translationCache.guardar(PARTICION, "Open", "Abrir")
+	manejador.saveLocalCache()
+	assert manejador.settings._translationCache.num_pendientes() == 0
+	assert manejador.almacen.buscar(PARTICION, "Open")[0] == "Abrir"
+	manejador.closeStore()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import pytest
+# Carga personal
+from app.utils.utils_filtro import FiltroVoz
+
+@pytest.mark.parametrize("texto, categoria", [
+	("a", "caracteres"),
+	(" ", "caracteres"),
+	("...", "puntuacion"),
+	("42%", "numeros"),
+	("12:30 p.m.", "numeros"),
+	("https://www.nvaccess.org/", "urls"),
+	("usuario@example.com", "urls"),
+	("C:\\Windows\\system32", "rutas"),
+	("informe.docx", "rutas"),
+	("Guardar como", None),
+	("Paso 3 de 5", None),
+])
+def test_clasificar(texto, categoria):
+	assert FiltroVoz().clasificar(texto) == categoria
+
+def test_omitir_cuenta_por_categoria():
+	filtro = FiltroVoz()
+	assert filtro.omitir("7")
+	assert filtro.omitir("42")
+	assert not filtro.omitir("Abrir")
+	assert filtro.contadores["caracteres"] == 1
+	assert filtro.contadores["numeros"] == 1
+	assert sum(filtro.contadores.values()) == 2
+
+def test_set_categorias_cambia_el_filtro():
+	filtro = FiltroVoz()
+	filtro.set_categorias(["urls"])
+	assert filtro.clasificar("42") is None
+	assert filtro.clasificar("a") is None
+	assert filtro.clasificar("www.example.com") == "urls"
+	filtro.set_categorias([])
+	assert filtro.clasificar("www.example.com") is None
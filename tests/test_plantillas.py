@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga personal
+from app.utils.utils_plantillas import enmascarar, derivar_plantilla, rellenar
+
+def test_enmascarar_sustituye_los_numeros():
+	plantilla, valores = enmascarar("3 de 17, 12:30 y 1.250,5")
+	assert valores == ["3", "17", "12:30", "1.250,5"]
+	assert plantilla == "\ue0000\ue001 de \ue0001\ue001, \ue0002\ue001 y \ue0003\ue001"
+
+def test_texto_sin_numeros():
+	assert enmascarar("Aceptar") == ("Aceptar", [])
+
+def test_ida_y_vuelta():
+	"""
+	La plantilla de una traducción sirve para otro texto con la misma estructura.
+	"""
+	plantilla, valores = enmascarar("3 of 17")
+	plantilla_traducida = derivar_plantilla("3 de 17", valores)
+	assert plantilla_traducida is not None
+	otra_plantilla, otros_valores = enmascarar("12 of 30")
+	assert otra_plantilla == plantilla
+	assert rellenar(plantilla_traducida, otros_valores) == "12 de 30"
+
+def test_ida_y_vuelta_con_orden_cambiado():
+	plantilla, valores = enmascarar("page 2 of 9")
+	plantilla_traducida = derivar_plantilla("9 páginas, página 2", valores)
+	assert rellenar(plantilla_traducida, ["5", "40"]) == "40 páginas, página 5"
+
+def test_numeros_distintos_no_dan_plantilla():
+	plantilla, valores = enmascarar("3 of 17")
+	assert derivar_plantilla("tres de 17", valores) is None
+	assert derivar_plantilla("3 de 17 y 4", valores) is None
+
+def test_rellenar_con_valores_que_no_corresponden():
+	plantilla, valores = enmascarar("3 of 17")
+	assert rellenar(plantilla, ["3"]) is None
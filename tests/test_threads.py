@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024 Héctor J. Benítez Corredera <xebolax@gmail.com>
+# Este archivo está cubierto por la Licencia Pública General de GNU.
+#
+# Carga Python
+import time
+import threading
+import pytest
+# Carga personal
+from app.utils.utils_threads import SingleFlight, LimitadorTasa, InterruptorCircuito
+
+class _Abandono(Exception):
+	"""
+	Error de prueba que abandona la primera llamada de un grupo.
+	"""
+
+def test_singleflight_agrupa_llamadas_simultaneas():
+	"""
+	Las llamadas con la misma clave mientras la primera está en curso reciben su resultado.
+	"""
+	vuelos = SingleFlight()
+	empezar = threading.Event()
+	seguir = threading.Event()
+	llamadas = []
+	resultados = []
+	def funcion():
+		llamadas.append(1)
+		empezar.set()
+		seguir.wait(2)
+		return "hola"
+	primero = threading.Thread(target=lambda: resultados.append(vuelos.ejecutar("k", funcion)))
+	primero.start()
+	empezar.wait(2)
+	segundo = threading.Thread(target=lambda: resultados.append(vuelos.ejecutar("k", funcion)))
+	segundo.start()
+	time.sleep(0.05)
+	seguir.set()
+	primero.join(2)
+	segundo.join(2)
+	assert resultados == ["hola", "hola"]
+	assert len(llamadas) == 1
+	# Terminada la llamada, la clave se vuelve a ejecutar
+	assert vuelos.ejecutar("k", lambda: "otra") == "otra"
+
+def test_singleflight_propaga_errores():
+	"""
+	El error de la función llega a quien la llama y la clave queda libre.
+	"""
+	vuelos = SingleFlight()
+	def falla():
+		raise ValueError("fallo")
+	with pytest.raises(ValueError):
+		vuelos.ejecutar("k", falla)
+	assert vuelos.ejecutar("k", lambda: 1) == 1
+
+def test_singleflight_reintenta_tras_abandono():
+	"""
+	Si la primera llamada se abandona, las que esperan repiten la llamada en lugar de recibir el error.
+	"""
+	vuelos = SingleFlight(reintentar=(_Abandono,))
+	empezar = threading.Event()
+	seguir = threading.Event()
+	errores = []
+	resultados = []
+	def abandona():
+		empezar.set()
+		seguir.wait(2)
+		raise _Abandono()
+	def propietario():
+		try:
+			vuelos.ejecutar("k", abandona)
+		except _Abandono:
+			errores.append(1)
+	primero = threading.Thread(target=propietario)
+	primero.start()
+	empezar.wait(2)
+	segundo = threading.Thread(target=lambda: resultados.append(vuelos.ejecutar("k", lambda: "ok")))
+	segundo.start()
+	time.sleep(0.05)
+	seguir.set()
+	primero.join(2)
+	segundo.join(2)
+	assert errores == [1]
+	assert resultados == ["ok"]
+
+def test_limitador_permite_rafaga_y_despues_espera():
+	"""
+	El cubo lleno deja pasar la ráfaga sin esperar y después limita a la tasa configurada.
+	"""
+	limitador = LimitadorTasa(tasa=20, rafaga=3)
+	inicio = time.monotonic()
+	for i in range(3):
+		assert limitador.adquirir()
+	assert time.monotonic() - inicio < 0.04
+	assert limitador.adquirir()
+	assert time.monotonic() - inicio >= 0.04
+
+def test_limitador_interrumpe_la_espera():
+	"""
+	La espera de una ficha termina sin consumirla al activarse el evento de parada.
+	"""
+	limitador = LimitadorTasa(tasa=0.1, rafaga=1)
+	assert limitador.adquirir()
+	parada = threading.Event()
+	parada.set()
+	assert limitador.adquirir(parada) is False
+
+def _abrir(circuito):
+	"""
+	Registra llamadas fallidas hasta que el interruptor se abre.
+	"""
+	for i in range(circuito.minimo):
+		assert circuito.permitir()
+		circuito.registrar(False, 0.1)
+
+def test_interruptor_se_abre_con_fallos():
+	circuito = InterruptorCircuito(minimo=3, umbral=0.5, espera=60)
+	for i in range(2):
+		assert circuito.registrar(False, 0.1) is False
+	assert circuito.estado == InterruptorCircuito.CERRADO
+	assert circuito.registrar(False, 0.1) is True
+	assert circuito.estado == InterruptorCircuito.ABIERTO
+	assert circuito.permitir() is False
+
+def test_interruptor_cuenta_la_latencia_excesiva():
+	circuito = InterruptorCircuito(minimo=3, latencia_maxima=1.0, espera=60)
+	for i in range(3):
+		circuito.registrar(True, 5.0)
+	assert circuito.estado == InterruptorCircuito.ABIERTO
+
+def test_interruptor_semiabierto_deja_una_prueba():
+	"""
+	Pasada la espera se deja pasar una sola llamada; si va bien el interruptor se cierra.
+	"""
+	circuito = InterruptorCircuito(minimo=3, espera=0.01)
+	_abrir(circuito)
+	time.sleep(0.02)
+	assert circuito.permitir() is True
+	assert circuito.estado == InterruptorCircuito.SEMIABIERTO
+	assert circuito.permitir() is False
+	circuito.registrar(True, 0.1)
+	assert circuito.estado == InterruptorCircuito.CERRADO
+	assert circuito.permitir() is True
+
+def test_interruptor_prueba_fallida_duplica_la_espera():
+	circuito = InterruptorCircuito(minimo=3, espera=0.01, espera_maxima=1.0)
+	_abrir(circuito)
+	time.sleep(0.02)
+	assert circuito.permitir()
+	circuito.registrar(False, 0.1)
+	assert circuito.estado == InterruptorCircuito.ABIERTO
+	# La espera ahora es de 0,02 segundos
+	time.sleep(0.012)
+	assert circuito.permitir() is False
+	time.sleep(0.02)
+	assert circuito.permitir() is True
+
+def test_interruptor_liberar_devuelve_la_prueba():
+	"""
+	Una prueba abandonada no deja el servicio bloqueado en el estado semiabierto.
+	"""
+	circuito = InterruptorCircuito(minimo=3, espera=0.01)
+	_abrir(circuito)
+	time.sleep(0.02)
+	assert circuito.permitir()
+	circuito.liberar()
+	assert circuito.estado == InterruptorCircuito.SEMIABIERTO
+	assert circuito.permitir() is True